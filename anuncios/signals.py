@@ -16,7 +16,9 @@ from django.dispatch import receiver
 # Importa el modelo Anuncio.
 from .models import Anuncio
 # Importa la tarea de Celery para enviar notificaciones.
-from .tasks import enviar_notificacion_nuevo_anuncio 
+from .tasks import enviar_notificacion_nuevo_anuncio
+# Importa la bandeja de salida (outbox) que publica la tarea tras el commit.
+from core.outbox import encolar_tarea
 
 # Decorador que conecta la función 'notificar_nuevo_anuncio' a la señal 'post_save' de 'Anuncio'.
 @receiver(post_save, sender=Anuncio)
@@ -24,7 +26,6 @@ def notificar_nuevo_anuncio(sender, instance, created, **kwargs):
     """Función que se ejecuta cada vez que se guarda un Anuncio."""
     # Verifica si es una creación (True) y no una edición.
     if created:
-        print(f"[Signal] Nuevo Anuncio creado: {instance.titulo}. Enviando a Celery...")
-        # Llama a la tarea de Celery de forma asíncrona (.delay) pasando solo el ID.
+        # Registra la tarea en el outbox dentro de la misma transacción (sin llamar al broker aquí).
         # Se pasa el ID y no el objeto completo porque los objetos DB no son serializables para Celery.
-        enviar_notificacion_nuevo_anuncio.delay(instance.id)
\ No newline at end of file
+        encolar_tarea(enviar_notificacion_nuevo_anuncio, instance.id)
\ No newline at end of file
@@ -11,11 +11,9 @@ Descripción:           Define tareas asíncronas de Celery para la aplicación.
 
 # Importa el decorador shared_task de Celery.
 from celery import shared_task
-# Importa la configuración de Django.
-from django.conf import settings
-# Importa las librerías de Firebase Admin.
-import firebase_admin
-from firebase_admin import messaging, credentials
+# Importa la librería de mensajería de Firebase Admin y la inicialización común.
+from firebase_admin import messaging
+from core.notificaciones import inicializar_firebase
 # Importa el modelo Anuncio.
 from .models import Anuncio
 # Importa logging para registrar eventos del sistema.
@@ -24,37 +22,6 @@ import logging
 # Obtiene una instancia del logger.
 logger = logging.getLogger(__name__)
 
-# --- Función auxiliar para inicializar Firebase de forma segura ---
-def inicializar_firebase():
-    """Verifica si la app de Firebase ya está inicializada, si no, la inicia."""
-    if not firebase_admin._apps:
-        try:
-            # Obtiene credenciales desde settings.py (variables de entorno).
-            project_id = getattr(settings, "FIREBASE_PROJECT_ID", None)
-            client_email = getattr(settings, "FIREBASE_CLIENT_EMAIL", None)
-            private_key = getattr(settings, "FIREBASE_PRIVATE_KEY", None)
-            
-            # Si existen todas las credenciales necesarias.
-            if project_id and client_email and private_key:
-                # Crea el objeto de certificado.
-                cred = credentials.Certificate({
-                    "type": "service_account",
-                    "project_id": project_id,
-                    "private_key_id": getattr(settings, "FIREBASE_PRIVATE_KEY_ID", "dummy"),
-                    "private_key": private_key.replace("\\n", "\n"), # Corrige saltos de línea.
-                    "client_email": client_email,
-                    "client_id": "dummy",
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                    "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{client_email}",
-                })
-                # Inicializa la app con las credenciales.
-                firebase_admin.initialize_app(cred)
-                logger.info("Firebase inicializado en tarea de Anuncios.")
-        except Exception as e:
-            logger.error(f"Error inicializando Firebase: {e}")
-
 # Tarea compartida de Celery para enviar la notificación.
 @shared_task
 def enviar_notificacion_nuevo_anuncio(anuncio_id):
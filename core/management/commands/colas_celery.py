@@ -0,0 +1,61 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Muestra la profundidad de cada cola de Celery (mensajes en espera
+               en el broker) y, opcionalmente, las tareas en ejecución y
+               reservadas por cada worker.
+--------------------------------------------------------------------------------
+"""
+from django.conf import settings  # Configuración del proyecto
+from django.core.management.base import BaseCommand, CommandError  # Base de comandos
+
+from proyecto_tesis.celery import app  # Aplicación Celery del proyecto
+
+
+class Command(BaseCommand):
+    help = "Mensajes en espera por cola de Celery (cpu, io, analitica) y carga de los workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", action="store_true", help="Incluye tareas activas/reservadas por worker")
+        parser.add_argument("--timeout", type=float, default=2.0, help="Espera de respuesta de los workers (s)")
+
+    def _profundidades(self): # Mensajes pendientes en el broker por cola
+        profundidades = {}
+        try:
+            with app.connection_for_read() as conexion:
+                canal = conexion.default_channel
+                for cola in settings.COLAS_CELERY:
+                    try:
+                        _, mensajes, consumidores = canal.queue_declare(queue=cola, passive=True)
+                    except Exception:
+                        mensajes, consumidores = 0, 0  # La cola aún no existe en el broker
+                    profundidades[cola] = (mensajes, consumidores)
+        except Exception as e:
+            raise CommandError(f"No se pudo conectar al broker: {e}")
+        return profundidades
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'cola':<12}{'en espera':>10}")
+        for cola, (mensajes, _) in self._profundidades().items():
+            estilo = self.style.WARNING if mensajes else self.style.SUCCESS
+            self.stdout.write(estilo(f"{cola:<12}{mensajes:>10}"))
+
+        if not options["workers"]:
+            return
+
+        inspeccion = app.control.inspect(timeout=options["timeout"])
+        activas = inspeccion.active() or {}
+        reservadas = inspeccion.reserved() or {}
+        colas = inspeccion.active_queues() or {}
+        if not colas:
+            self.stdout.write(self.style.WARNING("Ningún worker respondió."))
+            return
+
+        self.stdout.write("")
+        self.stdout.write(f"{'worker':<32}{'colas':<22}{'activas':>8}{'reservadas':>12}")
+        for worker in sorted(colas):
+            nombres = ",".join(c["name"] for c in colas[worker])
+            self.stdout.write(
+                f"{worker:<32}{nombres:<22}{len(activas.get(worker, [])):>8}{len(reservadas.get(worker, [])):>12}"
+            )
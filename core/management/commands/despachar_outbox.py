@@ -0,0 +1,55 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Relay de la bandeja de salida (TareaPendiente): publica en el
+               broker de Celery, por lotes, las tareas que las señales dejaron
+               registradas. Corre como proceso propio (Procfile) o una sola
+               vez con --una-vez (cron / pruebas).
+--------------------------------------------------------------------------------
+"""
+import signal  # Término ordenado con SIGTERM (reinicios del despliegue)
+import time  # Espera entre sondeos
+
+from django.conf import settings  # Configuración del proyecto
+from django.core.management.base import BaseCommand  # Base de comandos
+from django.db import close_old_connections  # Conexiones sanas en un proceso de larga vida
+
+from core.outbox import despachar_lote, limpiar_despachadas  # Lógica del outbox
+from proyecto_tesis.celery import app  # Aplicación Celery del proyecto
+
+
+class Command(BaseCommand):
+    help = "Publica en Celery las tareas pendientes de la bandeja de salida (outbox)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Vacía lo pendiente y termina")
+
+    def handle(self, *args, **options):
+        self._seguir = True
+        signal.signal(signal.SIGTERM, self._detener)
+
+        if options["una_vez"]:
+            total = 0
+            while (publicadas := despachar_lote(app)):
+                total += publicadas
+            self.stdout.write(self.style.SUCCESS(f"{total} tareas publicadas."))
+            return
+
+        self.stdout.write("Relay del outbox iniciado.")
+        proxima_limpieza = 0
+        while self._seguir:
+            close_old_connections()
+            try:
+                publicadas = despachar_lote(app)
+                if time.monotonic() >= proxima_limpieza:
+                    limpiar_despachadas()
+                    proxima_limpieza = time.monotonic() + 3600
+            except Exception as e:  # Base de datos caída, etc.: se reintenta en el próximo ciclo
+                self.stderr.write(f"Error despachando outbox: {e}")
+                publicadas = 0
+            if publicadas < settings.OUTBOX_LOTE:  # Lote incompleto: no queda nada pendiente
+                time.sleep(settings.OUTBOX_INTERVALO_S)
+
+    def _detener(self, *args):
+        self._seguir = False
@@ -0,0 +1,22 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Chequeo de salud de Firebase: verifica que las credenciales
+               inicializan el SDK y que se obtiene un token de acceso para FCM.
+               Termina con error si no, para usarlo en despliegues o monitoreo.
+--------------------------------------------------------------------------------
+"""
+from django.core.management.base import BaseCommand, CommandError  # Base de comandos
+
+from core.notificaciones import estado_firebase  # Inicialización común de Firebase
+
+
+class Command(BaseCommand):
+    help = "Verifica la conexión con Firebase (credenciales y token de acceso para notificaciones push)."
+
+    def handle(self, *args, **options):
+        estado = estado_firebase()
+        if not estado["ok"]:
+            raise CommandError(estado["message"])
+        self.stdout.write(self.style.SUCCESS(f"Firebase OK ({estado['proyecto']}). {estado['message']}"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dispositivofcm',
+            name='ultimo_envio_exitoso',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
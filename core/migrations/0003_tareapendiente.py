@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_dispositivofcm_ultimo_envio_exitoso'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarea', models.CharField(max_length=200)),
+                ('args', models.JSONField(blank=True, default=list)),
+                ('kwargs', models.JSONField(blank=True, default=dict)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('despachada', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Tarea pendiente',
+                'verbose_name_plural': 'Tareas pendientes',
+                'ordering': ['id'],
+            },
+        ),
+    ]
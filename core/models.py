@@ -192,10 +192,39 @@ class DispositivoFCM(models.Model):
     # Fechas de auditoría automáticas.
     creado = models.DateTimeField(auto_now_add=True)
     actualizado = models.DateTimeField(auto_now=True)
+    # Último envío push aceptado por FCM (los tokens que FCM rechaza como inválidos se eliminan).
+    ultimo_envio_exitoso = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         """Muestra el usuario y una parte del token."""
         base = f"{self.usuario.username} - {self.token[:10]}..."
         if self.nombre_dispositivo:
             return f"{base} ({self.nombre_dispositivo})"
-        return base
\ No newline at end of file
+        return base
+
+class TareaPendiente(models.Model):
+    """
+    Bandeja de salida (outbox) de tareas de Celery. Las señales escriben aquí, en la
+    misma transacción que el registro que las origina, y el comando 'despachar_outbox'
+    las publica en el broker por lotes. Si la transacción se revierte, la tarea
+    tampoco existe.
+    """
+    # Nombre registrado de la tarea (ej. "talleres.tasks.notificar_nuevo_taller").
+    tarea = models.CharField(max_length=200)
+    # Argumentos serializables a JSON (los mismos que se pasarían a .delay()).
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    creada = models.DateTimeField(auto_now_add=True)
+    # Momento en que se publicó en el broker (NULL = pendiente).
+    despachada = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Intentos fallidos de publicación y último error.
+    intentos = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Tarea pendiente"
+        verbose_name_plural = "Tareas pendientes"
+
+    def __str__(self):
+        return f"{self.tarea}{tuple(self.args)} ({'despachada' if self.despachada else 'pendiente'})"
@@ -0,0 +1,211 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Servicio común de envío de notificaciones push (FCM) a listas de
+               tokens. Los tokens se agrupan en lotes multicast de hasta 500
+               (límite de Firebase) y los lotes se envían en paralelo, de modo
+               que un aviso a toda la comunidad son unas pocas llamadas a la
+               API en vez de una por teléfono. Devuelve el conteo de envíos
+               exitosos y fallidos. Con la respuesta de cada lote se eliminan
+               los tokens que FCM declara muertos y se registra el último
+               envío exitoso de los dispositivos vivos.
+               Aquí vive también la única inicialización de Firebase del
+               proyecto: se hace una vez por proceso (al arrancar el worker),
+               con un pool de conexiones HTTP dimensionado para los envíos en
+               paralelo, y se expone un chequeo de salud.
+--------------------------------------------------------------------------------
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone as dt_timezone
+
+import firebase_admin
+from django.conf import settings
+from django.utils import timezone
+from firebase_admin import credentials, exceptions, messaging
+from requests.adapters import HTTPAdapter
+
+from .models import DispositivoFCM, Perfil
+
+logger = logging.getLogger(__name__)
+
+TOKENS_POR_LOTE = 500  # Máximo de tokens por MulticastMessage que acepta FCM
+
+_firebase_app = None
+_inicializando = threading.Lock()  # Workers con pool de threads: una sola inicialización
+
+
+def _credencial():
+    """Credencial de cuenta de servicio desde settings/.env, o None si falta algún dato."""
+    project_id = settings.FIREBASE_PROJECT_ID
+    client_email = settings.FIREBASE_CLIENT_EMAIL
+    private_key = settings.FIREBASE_PRIVATE_KEY
+    if not project_id or not client_email or not private_key:
+        return None
+    return credentials.Certificate({
+        "type": "service_account",
+        "project_id": project_id,
+        "private_key_id": settings.FIREBASE_PRIVATE_KEY_ID or "dummy",
+        "private_key": private_key.replace("\\n", "\n"),
+        "client_email": client_email,
+        "client_id": "dummy",
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+        "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{client_email}",
+    })
+
+
+def _preparar_transporte(app):
+    """
+    Crea el cliente de FCM de la app y agranda su pool de conexiones: send_each_for_multicast
+    usa un thread por token y con el pool por defecto (10) el resto abre y cierra conexiones TLS.
+    """
+    cliente = messaging._get_messaging_service(app)._client  # API interna del SDK (cliente HTTP único por app)
+    sesion = cliente.session
+    reintentos = sesion.get_adapter("https://").max_retries  # Se conservan los reintentos del SDK
+    adaptador = HTTPAdapter(pool_maxsize=settings.FCM_CONEXIONES, max_retries=reintentos)
+    sesion.mount("https://", adaptador)
+
+
+def inicializar_firebase():
+    """Inicializa Firebase una sola vez por proceso. Devuelve la app, o None si no hay credenciales."""
+    global _firebase_app
+    if _firebase_app is not None:
+        return _firebase_app
+
+    with _inicializando:
+        if _firebase_app is not None:
+            return _firebase_app
+        try:
+            app = firebase_admin.get_app()
+        except ValueError:
+            try:
+                cred = _credencial()
+                if cred is None:
+                    logger.error("Faltan credenciales de Firebase en settings/.env.")
+                    return None
+                app = firebase_admin.initialize_app(cred)
+            except Exception as e:  # Clave mal formada, etc.: las tareas siguen sin push
+                logger.error(f"Error inicializando Firebase: {e}")
+                return None
+        try:
+            _preparar_transporte(app)
+        except Exception as e:  # Sin el pool ampliado igual se puede enviar
+            logger.warning(f"No se pudo ampliar el pool HTTP de FCM: {e}")
+        _firebase_app = app
+    return _firebase_app
+
+
+def calentar_firebase():
+    """Inicializa y obtiene el token OAuth por adelantado, así el primer push no paga el arranque."""
+    app = inicializar_firebase()
+    if app is None:
+        return False
+    try:
+        app.credential.get_access_token()
+    except Exception as e:
+        logger.warning(f"Firebase inicializado, pero no se obtuvo el token de acceso: {e}")
+        return False
+    return True
+
+
+def estado_firebase():
+    """Chequeo de salud: {"ok", "message", "proyecto"} (inicialización y token de acceso vigente)."""
+    app = inicializar_firebase()
+    if app is None:
+        return {"ok": False, "message": "Faltan credenciales de Firebase.", "proyecto": None}
+    try:
+        token = app.credential.get_access_token()  # google-auth lo reutiliza mientras esté vigente
+    except Exception as e:
+        return {"ok": False, "message": f"No se pudo obtener el token de acceso: {e}", "proyecto": app.project_id}
+    vence = timezone.localtime(token.expiry.replace(tzinfo=dt_timezone.utc))  # expiry viene en UTC sin zona
+    return {"ok": True, "message": f"Token vigente hasta {vence:%d/%m/%Y %H:%M}", "proyecto": app.project_id}
+
+
+def lotes(tokens, tamano=TOKENS_POR_LOTE):
+    """Divide la lista de tokens (sin duplicados, en orden) en lotes de 'tamano'."""
+    unicos = list(dict.fromkeys(t for t in tokens if t))
+    return [unicos[i:i + tamano] for i in range(0, len(unicos), tamano)]
+
+
+def _enviar_lote(tokens, titulo, cuerpo, data):
+    """Devuelve la lista de SendResponse del lote (en el mismo orden de los tokens), o None si falló entero."""
+    mensaje = messaging.MulticastMessage(
+        notification=messaging.Notification(title=titulo, body=cuerpo),
+        data={k: str(v) for k, v in (data or {}).items()},  # FCM solo acepta valores string
+        tokens=tokens,
+    )
+    try:
+        return messaging.send_each_for_multicast(mensaje).responses
+    except Exception as e:  # Falla del lote completo (red, credenciales): cuenta como fallido
+        logger.error(f"Error enviando lote FCM de {len(tokens)} tokens: {e}")
+        return None
+
+
+def clasificar_respuestas(tokens, respuestas):
+    """
+    Separa los tokens del lote en (vivos, muertos, fallidos).
+    Muertos: FCM responde UNREGISTERED o INVALID_ARGUMENT para ese token. Si el
+    INVALID_ARGUMENT llega para todo el lote el problema es el mensaje, no los tokens.
+    """
+    vivos, muertos, fallidos = [], [], 0
+    for token, respuesta in zip(tokens, respuestas):
+        if respuesta.success:
+            vivos.append(token)
+            continue
+        fallidos += 1
+        if isinstance(respuesta.exception, (messaging.UnregisteredError, exceptions.InvalidArgumentError)):
+            muertos.append(token)
+    if len(tokens) > 1 and len(muertos) == len(tokens) and all(
+        isinstance(r.exception, exceptions.InvalidArgumentError) for r in respuestas
+    ):
+        muertos = []
+    return vivos, muertos, fallidos
+
+
+def _registrar_resultado(vivos, muertos): # Actualización masiva: una consulta por lote
+    if vivos:
+        DispositivoFCM.objects.filter(token__in=vivos).update(ultimo_envio_exitoso=timezone.now())
+    if muertos:
+        DispositivoFCM.objects.filter(token__in=muertos).delete()
+        Perfil.objects.filter(fcm_token__in=muertos).update(fcm_token=None)  # Campo legacy
+
+
+def enviar_a_tokens(tokens, titulo, cuerpo, data=None):
+    """
+    Envía la notificación a todos los tokens y devuelve
+    {"tokens": n, "lotes": n, "exitosos": n, "fallidos": n, "eliminados": n}.
+    """
+    grupos = lotes(tokens)
+    resultado = {
+        "tokens": sum(len(g) for g in grupos), "lotes": len(grupos),
+        "exitosos": 0, "fallidos": 0, "eliminados": 0,
+    }
+    if not grupos or inicializar_firebase() is None:
+        resultado["fallidos"] = resultado["tokens"]
+        return resultado
+
+    hilos = min(len(grupos), settings.FCM_LOTES_CONCURRENTES)
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        envios = [pool.submit(_enviar_lote, g, titulo, cuerpo, data) for g in grupos]
+        # La base de datos se toca solo desde este hilo, a medida que llegan los lotes
+        for grupo, envio in zip(grupos, envios):
+            respuestas = envio.result()
+            if respuestas is None:
+                resultado["fallidos"] += len(grupo)
+                continue
+            vivos, muertos, fallidos = clasificar_respuestas(grupo, respuestas)
+            _registrar_resultado(vivos, muertos)
+            resultado["exitosos"] += len(vivos)
+            resultado["fallidos"] += fallidos
+            resultado["eliminados"] += len(muertos)
+
+    if resultado["fallidos"]:
+        logger.warning(
+            f"Notificación '{titulo}': {resultado['exitosos']} enviadas, {resultado['fallidos']} fallidas, "
+            f"{resultado['eliminados']} tokens eliminados"
+        )
+    return resultado
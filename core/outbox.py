@@ -0,0 +1,74 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Bandeja de salida (outbox) transaccional para las tareas que
+               disparan las señales. encolar_tarea solo inserta una fila en la
+               misma transacción del guardado (sin viaje a Redis dentro de la
+               petición) y el relay (comando despachar_outbox) publica las
+               pendientes en el broker por lotes con una sola conexión.
+--------------------------------------------------------------------------------
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import TareaPendiente
+
+logger = logging.getLogger(__name__)
+
+
+def encolar_tarea(tarea, *args, **kwargs):
+    """
+    Registra la tarea (objeto de Celery o su nombre) para que el relay la publique.
+    Los argumentos deben ser serializables a JSON, igual que con .delay().
+    """
+    nombre = getattr(tarea, "name", tarea)
+    return TareaPendiente.objects.create(tarea=nombre, args=list(args), kwargs=kwargs)
+
+
+def despachar_lote(app, limite=None):
+    """
+    Publica hasta 'limite' tareas pendientes (las más antiguas primero) y las marca
+    como despachadas. Devuelve cuántas se publicaron. Entrega al menos una vez: si el
+    proceso muere entre publicar y marcar, la tarea se vuelve a publicar.
+    """
+    limite = limite or settings.OUTBOX_LOTE
+    # Con SKIP LOCKED varios relays pueden trabajar a la vez sin tomar las mismas filas
+    bloqueo = {"skip_locked": connection.features.has_select_for_update_skip_locked}
+    with transaction.atomic():
+        pendientes = list(
+            TareaPendiente.objects
+            .select_for_update(**bloqueo)
+            .filter(despachada__isnull=True, intentos__lt=settings.OUTBOX_MAX_INTENTOS)
+            .order_by("id")[:limite]
+        )
+        if not pendientes:
+            return 0
+
+        publicadas = []
+        with app.producer_or_acquire() as productor:  # Una conexión al broker para todo el lote
+            for pendiente in pendientes:
+                try:
+                    app.send_task(pendiente.tarea, args=pendiente.args, kwargs=pendiente.kwargs, producer=productor)
+                except Exception as e:
+                    # Broker caído: se registra el intento y se corta el lote (el resto sigue en orden)
+                    pendiente.intentos += 1
+                    pendiente.error = str(e)[:1000]
+                    pendiente.save(update_fields=["intentos", "error"])
+                    logger.error(f"No se pudo publicar {pendiente.tarea} (id {pendiente.pk}): {e}")
+                    break
+                publicadas.append(pendiente.pk)
+
+        TareaPendiente.objects.filter(pk__in=publicadas).update(despachada=timezone.now())
+    return len(publicadas)
+
+
+def limpiar_despachadas():
+    """Borra las filas ya publicadas más antiguas que OUTBOX_RETENCION_HORAS."""
+    limite = timezone.now() - timedelta(hours=settings.OUTBOX_RETENCION_HORAS)
+    borradas, _ = TareaPendiente.objects.filter(despachada__lt=limite).delete()
+    return borradas
@@ -1,3 +1,167 @@
-from django.test import TestCase
+import contextlib
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+from firebase_admin import exceptions, messaging
+
+from core import notificaciones, outbox
+from core.models import TareaPendiente
+
+
+class EnvioNotificacionesTests(SimpleTestCase):
+    def test_lotes_respetan_limite_y_quitan_duplicados(self):
+        """Los tokens repetidos o vacíos se descartan y cada lote tiene a lo más 500."""
+        tokens = [f"t{i}" for i in range(1200)] + ["t0", "", None]
+        grupos = notificaciones.lotes(tokens)
+        self.assertEqual([len(g) for g in grupos], [500, 500, 200])
+        self.assertEqual(sum(grupos, []), [f"t{i}" for i in range(1200)])
+
+    def test_envio_agrega_conteos_de_todos_los_lotes(self):
+        """Se hace una llamada multicast por lote y se suman éxitos y fallos (un lote caído cuenta entero)."""
+        def enviar(mensaje):
+            if mensaje.tokens[0] == "t1000":
+                raise RuntimeError("sin red")
+            fallo = messaging.SendResponse(None, exceptions.UnavailableError("sin servicio"))
+            exito = messaging.SendResponse({"name": "m"}, None)
+            return SimpleNamespace(responses=[fallo] + [exito] * (len(mensaje.tokens) - 1))
+
+        with mock.patch.object(notificaciones.messaging, "send_each_for_multicast", side_effect=enviar) as envio, \
+                mock.patch.object(notificaciones, "_registrar_resultado") as registrar, \
+                mock.patch.object(notificaciones, "inicializar_firebase", return_value=object()):
+            resultado = notificaciones.enviar_a_tokens(
+                [f"t{i}" for i in range(1100)], "Título", "Cuerpo", {"reunion_id": 7}
+            )
+
+        self.assertEqual(envio.call_count, 3)
+        self.assertEqual(envio.call_args_list[0].args[0].data, {"reunion_id": "7"})
+        self.assertEqual(registrar.call_count, 2)
+        self.assertEqual(
+            resultado, {"tokens": 1100, "lotes": 3, "exitosos": 998, "fallidos": 102, "eliminados": 0}
+        )
+
+    def test_tokens_muertos_se_separan_de_los_vivos(self):
+        """UNREGISTERED e INVALID_ARGUMENT marcan el token como muerto; otros errores no."""
+        respuestas = [
+            messaging.SendResponse({"name": "m"}, None),
+            messaging.SendResponse(None, messaging.UnregisteredError("no registrado")),
+            messaging.SendResponse(None, exceptions.InvalidArgumentError("token inválido")),
+            messaging.SendResponse(None, exceptions.UnavailableError("sin servicio")),
+        ]
+        vivos, muertos, fallidos = notificaciones.clasificar_respuestas(["a", "b", "c", "d"], respuestas)
+        self.assertEqual((vivos, muertos, fallidos), (["a"], ["b", "c"], 3))
+
+    def test_mensaje_invalido_no_elimina_tokens(self):
+        """Si todo el lote vuelve con INVALID_ARGUMENT el error es del mensaje y no se borra ningún token."""
+        respuestas = [messaging.SendResponse(None, exceptions.InvalidArgumentError("payload")) for _ in range(3)]
+        self.assertEqual(notificaciones.clasificar_respuestas(["a", "b", "c"], respuestas), ([], [], 3))
+
+    def test_firebase_se_inicializa_una_sola_vez(self):
+        """Las llamadas repetidas reutilizan la misma app y el pool HTTP se amplía una sola vez."""
+        app = SimpleNamespace(project_id="p")
+        with mock.patch.object(notificaciones, "_firebase_app", None), \
+                mock.patch.object(notificaciones.firebase_admin, "get_app", return_value=app) as get_app, \
+                mock.patch.object(notificaciones, "_preparar_transporte") as preparar:
+            self.assertIs(notificaciones.inicializar_firebase(), app)
+            self.assertIs(notificaciones.inicializar_firebase(), app)
+        get_app.assert_called_once()
+        preparar.assert_called_once_with(app)
+
+    def test_estado_firebase_sin_credenciales(self):
+        """Sin credenciales el chequeo de salud informa el problema en vez de lanzar una excepción."""
+        with mock.patch.object(notificaciones, "_firebase_app", None), \
+                mock.patch.object(notificaciones.firebase_admin, "get_app", side_effect=ValueError), \
+                self.settings(FIREBASE_PRIVATE_KEY=None):
+            estado = notificaciones.estado_firebase()
+        self.assertFalse(estado["ok"])
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.app = mock.Mock()
+        self.app.producer_or_acquire.return_value = contextlib.nullcontext("productor")
+
+    def test_encolar_tarea_guarda_nombre_y_argumentos(self):
+        """Se guarda el nombre registrado de la tarea y sus argumentos, sin publicar en el broker."""
+        tarea = SimpleNamespace(name="talleres.tasks.notificar_nuevo_taller", delay=mock.Mock())
+        outbox.encolar_tarea(tarea, 5, motivo="x")
+
+        pendiente = TareaPendiente.objects.get()
+        self.assertEqual(
+            (pendiente.tarea, pendiente.args, pendiente.kwargs, pendiente.despachada),
+            ("talleres.tasks.notificar_nuevo_taller", [5], {"motivo": "x"}, None),
+        )
+        tarea.delay.assert_not_called()
+
+    def test_tarea_no_existe_si_se_revierte_la_transaccion(self):
+        """La fila se escribe en la misma transacción que el guardado que la origina."""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            outbox.encolar_tarea("talleres.tasks.notificar_nuevo_taller", 5)
+            raise RuntimeError("falla el guardado")
+        self.assertFalse(TareaPendiente.objects.exists())
+
+    def test_despacho_se_corta_si_el_broker_falla(self):
+        """Si falla una publicación el lote se detiene: solo las anteriores quedan despachadas."""
+        ya_enviada = TareaPendiente.objects.create(tarea="t0", despachada=timezone.now())
+        agotada = TareaPendiente.objects.create(tarea="tx", intentos=settings.OUTBOX_MAX_INTENTOS)
+        t1, t2, t3 = (TareaPendiente.objects.create(tarea=f"t{i}", args=[i]) for i in (1, 2, 3))
+        self.app.send_task.side_effect = [None, ConnectionError("redis caído"), None]
+
+        self.assertEqual(outbox.despachar_lote(self.app, limite=10), 1)
+
+        self.assertEqual([c.args[0] for c in self.app.send_task.call_args_list], ["t1", "t2"])
+        for fila in (ya_enviada, agotada, t1, t2, t3):
+            fila.refresh_from_db()
+        self.assertIsNotNone(t1.despachada)
+        self.assertEqual((t2.despachada, t2.intentos, t2.error), (None, 1, "redis caído"))
+        self.assertEqual((t3.despachada, t3.intentos), (None, 0))
+        self.assertEqual(agotada.despachada, None)
+
+    def test_limpieza_borra_solo_despachadas_antiguas(self):
+        """Las despachadas fuera de la retención se borran; las recientes y las pendientes se quedan."""
+        antigua = timezone.now() - timedelta(hours=settings.OUTBOX_RETENCION_HORAS + 1)
+        TareaPendiente.objects.create(tarea="vieja", despachada=antigua)
+        TareaPendiente.objects.create(tarea="reciente", despachada=timezone.now())
+        TareaPendiente.objects.create(tarea="pendiente")
+
+        self.assertEqual(outbox.limpiar_despachadas(), 1)
+        self.assertCountEqual(TareaPendiente.objects.values_list("tarea", flat=True), ["reciente", "pendiente"])
+
+
+@skipUnlessDBFeature("has_select_for_update_skip_locked")
+class OutboxConcurrenciaTests(TransactionTestCase):
+    def test_relays_simultaneos_no_toman_las_mismas_filas(self):
+        """Una fila bloqueada por otro relay se salta (SKIP LOCKED) y se publica el resto."""
+        tomada = TareaPendiente.objects.create(tarea="t1")
+        TareaPendiente.objects.create(tarea="t2")
+        app = mock.Mock()
+        app.producer_or_acquire.return_value = contextlib.nullcontext("productor")
+        bloqueada, liberar = threading.Event(), threading.Event()
+
+        def otro_relay():
+            try:
+                with transaction.atomic():
+                    list(TareaPendiente.objects.select_for_update().filter(pk=tomada.pk))
+                    bloqueada.set()
+                    liberar.wait(5)
+            finally:
+                connection.close()
+
+        hilo = threading.Thread(target=otro_relay)
+        hilo.start()
+        bloqueada.wait(5)
+        try:
+            publicadas = outbox.despachar_lote(app, limite=10)
+        finally:
+            liberar.set()
+            hilo.join()
+
+        self.assertEqual(publicadas, 1)
+        self.assertEqual([c.args[0] for c in app.send_task.call_args_list], ["t2"])
+        tomada.refresh_from_db()
+        self.assertIsNone(tomada.despachada)
@@ -27,12 +27,8 @@ from django.utils import timezone
 from datetime import timedelta
 # Importa el módulo de calendario para cálculos de fechas.
 import calendar
-# Importa la función para convertir un template HTML a string (para emails).
-from django.template.loader import render_to_string
-# Importa la función para quitar etiquetas HTML del texto (versión texto plano del email).
-from django.utils.html import strip_tags
-# Importa la utilidad personalizada para enviar correos (posiblemente asíncrono).
-from usuarios.utils import enviar_correo_via_webhook
+# Importa la tarea que envía el código de recuperación desde la cola io.
+from usuarios.tasks import enviar_codigo_recuperacion
 # --- IMPORTACIONES DE TUS MODELOS ---
 # Importa modelos de otras apps para mostrar estadísticas en el dashboard.
 from reuniones.models import Reunion
@@ -100,27 +96,12 @@ class RequestRecoveryCodeAPI(APIView):
                 # Si no tiene perfil, simulamos éxito por seguridad (evita enumeración de usuarios).
                 return Response({'message': 'Código enviado correctamente'})
 
-            # 3. Preparar Contenido del correo.
-            asunto = 'Recuperación de Clave - Villa Vista al Mar'
-            
-            # Contexto para la plantilla HTML.
-            contexto = {
-                'codigo': code
-            }
-
-            # Renderiza el HTML del correo con el código insertado.
-            html_body = render_to_string('registration/email_reset_password_app.html', contexto)
-            # Crea una versión de solo texto del correo.
-            text_body = strip_tags(html_body)
-            
-            # 4. ENVIAR POR WEBHOOK (No bloquea el hilo web, mejora performance).
-            enviar_correo_via_webhook(
-                to_email=email,
-                subject=asunto,
-                html_body=html_body,
-                text_body=text_body
+            # 3. ENCOLAR EL CORREO (cola io): la petición no espera al webhook y,
+            # ante una ráfaga, el envío espera turno en vez de fallar.
+            enviar_codigo_recuperacion.delay(
+                user.pk, 'registration/email_reset_password_app.html', 'Recuperación de Clave - Villa Vista al Mar',
             )
-            
+
             # Retorna éxito.
             return Response({'message': 'Código enviado correctamente'})
 
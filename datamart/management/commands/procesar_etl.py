@@ -7,7 +7,6 @@ Descripción:   Script del proceso ETL (Extract, Transform, Load) que extrae dat
                esquema OLAP del Datamart para análisis.
 --------------------------------------------------------------------------------
 """
-import random  # Para generar datos aleatorios de prueba si faltan valores reales
 from django.core.management.base import BaseCommand  # Base para comandos de consola
 from django.db import transaction  # Para manejo de transacciones atómicas
 from django.contrib.auth.models import User  # Modelo de usuario de Django
@@ -35,11 +34,11 @@ from datamart.models import (
     DimVecino, DimTaller, DimActa, DimVotacion, DimReunion,
     FactInscripcionTaller, FactConsultaActa, FactParticipacionVotacion,
     FactAsistenciaReunion, FactMetricasDiarias, FactCalidadTranscripcion,
-    FactMetricasTecnicas,
+    FactMetricasTecnicas, EjecucionETL,
 )
 
 class Command(BaseCommand):
-    help = "ETL para BI (Solo Usuarios Activos + Precisión Manual)"
+    help = "ETL para BI (Solo Usuarios Activos + Precisión Medida)"
 
     # Método auxiliar para determinar rango etario (simulado por ahora)
     def get_rango_etario(self, user):
@@ -49,6 +48,7 @@ class Command(BaseCommand):
     @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write("Iniciando ETL...")
+        inicio = timezone.now()
 
         # ---------------------------------------------------------
         # 1. LIMPIEZA DE DATOS (Vaciar Datamart previo)
@@ -111,11 +111,14 @@ class Command(BaseCommand):
             )
 
         # Carga Dimensión Actas
-        for a in Acta.objects.all():
-            # Obtiene la calificación de precisión del admin o simula una si es 0
-            precision_real = float(getattr(a, "calificacion_precision", 0))
-            if precision_real == 0:
-                precision_real = round(random.uniform(90.0, 99.0), 1)
+        calidad = []  # Mediciones reales de precisión (WER al aprobar o nota manual)
+        for a in Acta.objects.select_related("reunion"):
+            # Precisión medida al aprobar; si no existe, la calificación manual de la directiva
+            precision_real = a.precision_transcripcion
+            origen = "WER_APROBACION"
+            if precision_real is None and a.calificacion_precision > 0:
+                precision_real = float(a.calificacion_precision)
+                origen = "MANUAL"
 
             DimActa.objects.create(
                 acta_id_oltp=a.reunion.id,
@@ -124,6 +127,17 @@ class Command(BaseCommand):
                 precision_transcripcion=precision_real,
             )
 
+            if origen == "WER_APROBACION" and precision_real is not None and a.palabras_referencia:
+                calidad.append(
+                    FactCalidadTranscripcion(
+                        fecha=(a.aprobado_en or a.reunion.fecha).date(),
+                        total_palabras=a.palabras_referencia,
+                        palabras_correctas=max(0, a.palabras_referencia - (a.errores_transcripcion or 0)),
+                        precision_porcentaje=precision_real,
+                        origen=origen,
+                    )
+                )
+
         # Carga Dimensión Votaciones
         if Votacion.objects:
             for v in Votacion.objects.all():
@@ -250,15 +264,11 @@ class Command(BaseCommand):
         except Exception:
             pass
 
-        # Datos simulados para calidad de transcripción si no existen
-        if not FactCalidadTranscripcion.objects.exists():
-            FactCalidadTranscripcion.objects.create(
-                fecha=timezone.now(),
-                total_palabras=100,
-                palabras_correctas=95,
-                precision_porcentaje=95.0,
-                origen="SIMULADO",
-            )
+        # Hecho: Calidad de transcripción (una fila por acta medida)
+        FactCalidadTranscripcion.objects.bulk_create(calidad)
+
+        # Registro de la ejecución: los informes PDF quedan asociados a estos datos
+        EjecucionETL.objects.create(inicio=inicio)
 
         # Mensaje final de éxito
         self.stdout.write(
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datamart', '0002_dimacta_datamart_di_fecha_r_b35e08_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dimacta',
+            name='precision_transcripcion',
+            field=models.FloatField(blank=True, help_text='Porcentaje 0-100', null=True),
+        ),
+    ]
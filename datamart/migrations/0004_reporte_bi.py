@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datamart', '0003_alter_dimacta_precision_transcripcion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionETL',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateTimeField()),
+                ('fin', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReporteBI',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveSmallIntegerField(default=0, help_text='0 = sin filtro de año')),
+                ('mes', models.PositiveSmallIntegerField(default=0, help_text='0 = sin filtro de mes')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('GENERANDO', 'Generando'), ('LISTO', 'Listo'), ('ERROR', 'Error')], default='PENDIENTE', max_length=10)),
+                ('progreso', models.PositiveSmallIntegerField(default=0)),
+                ('archivo', models.FileField(blank=True, null=True, upload_to='reportes_bi/')),
+                ('error', models.TextField(blank=True, default='')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('ejecucion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reportes', to='datamart.ejecucionetl')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('anio', 'mes', 'ejecucion'), name='reporte_bi_unico')],
+            },
+        ),
+    ]
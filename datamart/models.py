@@ -35,8 +35,8 @@ class DimActa(models.Model):
     acta_id_oltp = models.IntegerField(unique=True)
     titulo = models.CharField(max_length=255)
     fecha_reunion = models.DateField()
-    # Precisión de la transcripción automática del acta
-    precision_transcripcion = models.FloatField(default=0.0, help_text="Porcentaje 0-100")
+    # Precisión de la transcripción automática del acta (None si no se ha medido)
+    precision_transcripcion = models.FloatField(null=True, blank=True, help_text="Porcentaje 0-100")
 
     class Meta:
         indexes = [
@@ -186,4 +186,52 @@ class LogRendimiento(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.path} - {self.tiempo_ms}ms - {self.status_code}"
\ No newline at end of file
+        return f"{self.path} - {self.tiempo_ms}ms - {self.status_code}"
+
+# =========================
+# EJECUCIONES DEL ETL E INFORMES PDF
+# =========================
+
+class EjecucionETL(models.Model):
+    """Una fila por cada carga completa del Datamart (identifica los datos vigentes)."""
+    inicio = models.DateTimeField()
+    fin = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"ETL #{self.pk} ({self.fin:%d/%m/%Y %H:%M})"
+
+
+class ReporteBI(models.Model):
+    """
+    Informe PDF del panel BI, generado en segundo plano (cola analitica).
+    Hay uno por (año, mes, ejecución del ETL): mientras no cambien los datos,
+    las descargas repetidas reutilizan el mismo archivo.
+    """
+    ESTADO_PENDIENTE = "PENDIENTE"
+    ESTADO_GENERANDO = "GENERANDO"
+    ESTADO_LISTO = "LISTO"
+    ESTADO_ERROR = "ERROR"
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, "Pendiente"),
+        (ESTADO_GENERANDO, "Generando"),
+        (ESTADO_LISTO, "Listo"),
+        (ESTADO_ERROR, "Error"),
+    ]
+
+    anio = models.PositiveSmallIntegerField(default=0, help_text="0 = sin filtro de año")
+    mes = models.PositiveSmallIntegerField(default=0, help_text="0 = sin filtro de mes")
+    ejecucion = models.ForeignKey(EjecucionETL, on_delete=models.CASCADE, null=True, blank=True, related_name="reportes")
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE)
+    progreso = models.PositiveSmallIntegerField(default=0)  # 0-100
+    archivo = models.FileField(upload_to="reportes_bi/", null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    creado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["anio", "mes", "ejecucion"], name="reporte_bi_unico"),
+        ]
+
+    def __str__(self):
+        return f"Informe BI {self.anio or 'todos'}/{self.mes or 'todos'} ({self.estado})"
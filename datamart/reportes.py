@@ -0,0 +1,114 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Informes PDF del panel BI generados en segundo plano. Cada informe
+               queda guardado en el almacenamiento (Cellar/S3) por año, mes y
+               ejecución del ETL: se vuelve a generar solo cuando el ETL carga
+               datos nuevos.
+--------------------------------------------------------------------------------
+"""
+import logging
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.template.loader import get_template
+from django.utils import timezone
+from xhtml2pdf import pisa
+
+from .models import EjecucionETL, ReporteBI
+
+logger = logging.getLogger(__name__)
+
+PLANTILLA_REPORTE = "datamart/reporte_pdf.html"
+GENERACION_ABANDONADA = timedelta(minutes=15)  # Sin avance en este tiempo se asume que el worker murió
+
+
+def ejecucion_vigente(): # Última carga del Datamart (None si el ETL nunca corrió)
+    return EjecucionETL.objects.order_by("-pk").first()
+
+
+def solicitar_reporte(anio=None, mes=None):
+    """
+    Devuelve (reporte, nuevo). 'nuevo' es True si hay que encolar la generación:
+    el informe no existía para estos datos, o el intento anterior falló o quedó abandonado.
+    """
+    clave = {"anio": anio or 0, "mes": mes or 0, "ejecucion": ejecucion_vigente()}
+    reporte = ReporteBI.objects.filter(**clave).first()
+    if reporte is None:
+        try:
+            with transaction.atomic():
+                return ReporteBI.objects.create(**clave), True
+        except IntegrityError:  # Otra petición lo creó al mismo tiempo
+            return ReporteBI.objects.get(**clave), False
+
+    # Reintento tras un error o un worker caído: el update condicional evita encolarlo dos veces
+    fallido = Q(estado=ReporteBI.ESTADO_ERROR) | Q(
+        estado=ReporteBI.ESTADO_GENERANDO, actualizado__lt=timezone.now() - GENERACION_ABANDONADA,
+    )
+    reintentar = ReporteBI.objects.filter(fallido, pk=reporte.pk).update(
+        estado=ReporteBI.ESTADO_PENDIENTE, progreso=0, error="",
+    )
+    if reintentar:
+        reporte.refresh_from_db()
+    return reporte, bool(reintentar)
+
+
+def _avance(reporte, progreso): # Progreso visible para la consulta de estado
+    ReporteBI.objects.filter(pk=reporte.pk).update(progreso=progreso, actualizado=timezone.now())
+
+
+def generar_reporte(reporte):
+    """Construye los datos, renderiza el PDF y lo guarda en reporte.archivo."""
+    from .views import construir_datos_panel_bi
+
+    _avance(reporte, 10)
+    datos = construir_datos_panel_bi(reporte.mes or None, reporte.anio or None)
+    _avance(reporte, 50)
+
+    contexto = {
+        "fecha_generacion": timezone.localtime(),  # Sin "Generado por": el mismo archivo se entrega a todos
+        "ocupacion_talleres": datos["ocupacion_talleres"],
+        "consulta_actas": datos["consulta_actas"],
+        "participacion": datos["participacion"],
+        "demografia_sector": datos["demografia_sector"],
+        "data_asistencia": datos["data_asistencia"],
+        "metricas": datos["metricas"],
+        "precision": datos["precision"],
+        "detalle_precision": datos["detalle_precision"],
+        "detalle_rendimiento": datos["detalle_rendimiento"],
+        "detalle_disponibilidad": datos["detalle_disponibilidad"],
+        "tiempo_segundos": datos["tiempo_segundos"],
+        "tiempo_p95_seg": datos["tiempo_p95_seg"],
+    }
+    html = get_template(PLANTILLA_REPORTE).render(contexto)
+    _avance(reporte, 60)
+
+    resultado = BytesIO()
+    pdf = pisa.CreatePDF(html, dest=resultado)
+    if pdf.err:
+        raise RuntimeError(f"xhtml2pdf devolvió {pdf.err} errores")
+    _avance(reporte, 90)
+
+    nombre = f"informe-bi-{reporte.anio or 'todos'}-{reporte.mes or 'todos'}-etl{reporte.ejecucion_id or 0}.pdf"
+    reporte.archivo.save(nombre, ContentFile(resultado.getvalue()), save=False)
+    reporte.estado = ReporteBI.ESTADO_LISTO
+    reporte.progreso = 100
+    reporte.save(update_fields=["archivo", "estado", "progreso", "actualizado"])
+    return reporte
+
+
+def limpiar_reportes_antiguos():
+    """Borra los informes (y sus archivos) de ejecuciones del ETL ya reemplazadas."""
+    vigente = ejecucion_vigente()
+    antiguos = ReporteBI.objects.exclude(ejecucion=vigente) if vigente else ReporteBI.objects.none()
+    borrados = 0
+    for reporte in antiguos:
+        if reporte.archivo:
+            reporte.archivo.delete(save=False)
+        reporte.delete()
+        borrados += 1
+    return borrados
@@ -1,9 +1,10 @@
 """
 --------------------------------------------------------------------------------
 Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
-Fecha de Modificación: 19/12/2025
+Fecha de Modificación: 18/10/2026
 Descripción:   Definición de tareas asíncronas utilizando Celery para ejecutar 
-               el proceso ETL en segundo plano sin bloquear al usuario.
+               el proceso ETL y generar los informes PDF en segundo plano sin
+               bloquear al usuario.
 --------------------------------------------------------------------------------
 """
 from celery import shared_task  # Decorador para crear tareas compartidas de Celery
@@ -11,6 +12,9 @@ from django.core.management import call_command  # Permite ejecutar comandos de
 from django.core.cache import cache  # Para interactuar con la caché
 import logging
 
+from .models import ReporteBI
+from .reportes import generar_reporte, limpiar_reportes_antiguos
+
 logger = logging.getLogger(__name__)  # Configuración del logger
 
 @shared_task
@@ -27,9 +31,35 @@ def tarea_actualizar_bi_async():
         # Guarda la marca de tiempo de finalización en caché
         # Esto permite saber cuándo fue la última actualización exitosa
         cache.set('ultima_actualizacion_bi_timestamp', True, timeout=None)
+
+        # Los informes PDF de cargas anteriores ya no corresponden a los datos
+        limpiar_reportes_antiguos()
         
         logger.info(" ETL BI finalizado correctamente.")
         return "ETL OK"
     except Exception as e:
         logger.error(f" Error en ETL BI: {e}")
-        return f"Error: {e}"
\ No newline at end of file
+        return f"Error: {e}"
+
+
+@shared_task
+def generar_reporte_bi(reporte_pk):
+    """
+    Genera el informe PDF del panel BI (cola analitica) y lo deja en el
+    almacenamiento. El progreso se consulta en la vista de estado.
+    """
+    # Se toma el informe con un update condicional: una entrega repetida no lo genera dos veces
+    tomado = ReporteBI.objects.filter(pk=reporte_pk, estado=ReporteBI.ESTADO_PENDIENTE).update(
+        estado=ReporteBI.ESTADO_GENERANDO,
+    )
+    if not tomado:
+        return f"Informe {reporte_pk} ya generado o en curso."
+    reporte = ReporteBI.objects.get(pk=reporte_pk)
+    try:
+        generar_reporte(reporte)
+    except Exception as e:
+        logger.error(f"Error generando informe BI {reporte_pk}: {e}")
+        ReporteBI.objects.filter(pk=reporte_pk).update(estado=ReporteBI.ESTADO_ERROR, error=str(e)[:1000])
+        return f"Error: {e}"
+    logger.info(f"Informe BI {reporte_pk} listo: {reporte.archivo.name}")
+    return f"Informe {reporte_pk} OK"
@@ -7,13 +7,19 @@ Descripción:   Pruebas unitarias y de integración para validar el Datamart,
                seguridad y concurrencia.
 --------------------------------------------------------------------------------
 """
+import shutil
+import tempfile
 import time
 import threading
+from unittest import mock
+from django.core.files.storage import FileSystemStorage
 from django.test import TestCase, TransactionTestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils import timezone
-from datamart.models import DimVecino, DimTaller, DimActa, FactConsultaActa
+from datamart.models import DimVecino, DimTaller, DimActa, EjecucionETL, FactConsultaActa, ReporteBI
+from datamart.reportes import _avance, solicitar_reporte
+from datamart.tasks import generar_reporte_bi
 from datamart.views import construir_datos_panel_bi
 
 # -------------------------------------------------------------------------
@@ -214,4 +220,71 @@ class ConcurrencyTest(TransactionTestCase):
             errores = [r for r in resultados if r != 200]
             print(f" -> Detalle del error: {errores[0]}")
 
-        self.assertEqual(exitos, cantidad_usuarios, f"Hubo {fallos} fallos bajo carga concurrente.")
\ No newline at end of file
+        self.assertEqual(exitos, cantidad_usuarios, f"Hubo {fallos} fallos bajo carga concurrente.")
+
+
+# -------------------------------------------------------------------------
+# 5. INFORME PDF EN SEGUNDO PLANO
+# -------------------------------------------------------------------------
+class ReportePdfTest(TestCase):
+    DATOS = {
+        "ocupacion_talleres": [{"nombre": "Yoga", "inscritos": 3, "cupos": 10}],
+        "consulta_actas": [], "participacion": {"total_vecinos": 1, "total_participantes": 0,
+                                                "porcentaje_actual": 0.0, "porcentaje_meta": 50.0},
+        "demografia_sector": [], "data_asistencia": [], "metricas": None, "precision": 0,
+        "detalle_precision": [], "detalle_rendimiento": [], "detalle_disponibilidad": [],
+        "tiempo_segundos": 0, "tiempo_p95_seg": 0,
+    }
+
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        self.storage = FileSystemStorage(location=directorio)
+        almacenamiento = mock.patch.object(ReporteBI._meta.get_field("archivo"), "storage", self.storage)
+        almacenamiento.start()
+        self.addCleanup(almacenamiento.stop)
+        datos = mock.patch("datamart.views.construir_datos_panel_bi", return_value=self.DATOS)
+        self.construir = datos.start()
+        self.addCleanup(datos.stop)
+        self.ejecucion = EjecucionETL.objects.create(inicio=timezone.now())
+
+    def test_informe_se_guarda_con_nombre_por_periodo_y_ejecucion(self):
+        """La tarea deja el PDF en el almacenamiento, nombrado por año, mes y ejecución del ETL, con progreso 100."""
+        reporte, nuevo = solicitar_reporte(2026, 9)
+        self.assertTrue(nuevo)
+        with mock.patch("datamart.reportes._avance", wraps=_avance) as avance:
+            generar_reporte_bi(reporte.pk)
+
+        reporte.refresh_from_db()
+        self.construir.assert_called_once_with(9, 2026)
+        self.assertGreaterEqual(avance.call_count, 3)  # Progreso intermedio visible
+        self.assertEqual((reporte.estado, reporte.progreso), (ReporteBI.ESTADO_LISTO, 100))
+        self.assertEqual(reporte.archivo.name, f"reportes_bi/informe-bi-2026-9-etl{self.ejecucion.pk}.pdf")
+        with self.storage.open(reporte.archivo.name, "rb") as f:
+            self.assertEqual(f.read(4), b"%PDF")
+
+        # Mismos datos: se entrega el mismo archivo sin volver a generarlo
+        self.assertEqual(solicitar_reporte(2026, 9), (reporte, False))
+        self.assertEqual(generar_reporte_bi(reporte.pk), f"Informe {reporte.pk} ya generado o en curso.")
+        self.construir.assert_called_once()
+
+    def test_informe_con_error_se_vuelve_a_solicitar(self):
+        """Si la generación falló, la siguiente solicitud lo deja pendiente para reintentarlo."""
+        reporte, _ = solicitar_reporte(2026, 9)
+        with mock.patch("datamart.reportes.pisa.CreatePDF", return_value=mock.Mock(err=2)), \
+                self.assertLogs("datamart.tasks", "ERROR"):
+            generar_reporte_bi(reporte.pk)
+        reporte.refresh_from_db()
+        self.assertEqual(reporte.estado, ReporteBI.ESTADO_ERROR)
+
+        reporte, nuevo = solicitar_reporte(2026, 9)
+        self.assertTrue(nuevo)
+        self.assertEqual((reporte.estado, reporte.error), (ReporteBI.ESTADO_PENDIENTE, ""))
+        self.assertEqual(ReporteBI.objects.count(), 1)
+
+    def test_informe_compartido_no_imprime_quien_lo_solicito(self):
+        """El PDF se entrega a todos los usuarios, así que no lleva el nombre de quien lo pidió primero."""
+        reporte, _ = solicitar_reporte(2026, 9)
+        with mock.patch("datamart.reportes.pisa.CreatePDF", return_value=mock.Mock(err=0)) as crear:
+            generar_reporte_bi(reporte.pk)
+        self.assertNotIn("Generado por", crear.call_args.args[0])
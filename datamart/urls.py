@@ -16,4 +16,6 @@ urlpatterns = [
     path('ejecutar-etl/', views.ejecutar_etl_view, name='ejecutar_etl'),
     # Ruta para descargar el reporte en PDF
     path('descargar-informe/', views.generar_pdf_view, name='descargar_pdf'),
+    # Ruta para consultar el progreso del reporte que se genera en segundo plano
+    path('descargar-informe/<int:pk>/estado/', views.estado_reporte_view, name='estado_reporte_pdf'),
 ]
\ No newline at end of file
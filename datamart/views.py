@@ -1,9 +1,10 @@
 """
 --------------------------------------------------------------------------------
 Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
-Fecha de Modificación: 21/12/2025
+Fecha de Modificación: 18/10/2026
 Descripción:   Vistas encargadas de construir los datos para el dashboard de BI, 
-               manejar el caché, ejecutar el ETL asíncrono y generar reportes PDF.
+               manejar el caché, ejecutar el ETL asíncrono y solicitar los
+               reportes PDF (se generan en segundo plano, ver reportes.py).
 --------------------------------------------------------------------------------
 """
 import json
@@ -15,17 +16,19 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db.models import Count, Avg
 from django.db.models.functions import ExtractYear
-from django.http import HttpResponse
-from django.shortcuts import render, redirect
-from django.template.loader import get_template
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render, redirect
+from django.urls import reverse
 from django.utils import timezone
-from xhtml2pdf import pisa
 
-from datamart.tasks import tarea_actualizar_bi_async
+from core.outbox import encolar_tarea
+from datamart.tasks import generar_reporte_bi, tarea_actualizar_bi_async
 from datamart.models import (
     FactInscripcionTaller, DimTaller, FactConsultaActa, FactParticipacionVotacion,
     DimVecino, FactAsistenciaReunion, DimActa, FactMetricasDiarias, LogRendimiento,
+    ReporteBI,
 )
+from datamart.reportes import solicitar_reporte
 
 MESES_ES = [
     "", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
@@ -116,7 +119,7 @@ def construir_datos_panel_bi(mes=None, anio=None):
     metricas = FactMetricasDiarias.objects.last()
 
     # 7) KPI: Calidad de Transcripción
-    calidad_qs = filtrar_por_fecha(DimActa.objects.all(), "fecha_reunion")
+    calidad_qs = filtrar_por_fecha(DimActa.objects.filter(precision_transcripcion__isnull=False), "fecha_reunion")
     precision_avg = calidad_qs.aggregate(p=Avg("precision_transcripcion"))["p"] or 0
     detalle_precision = list(
         calidad_qs.values("titulo", "fecha_reunion", "precision_transcripcion")
@@ -230,30 +233,46 @@ def ejecutar_etl_view(request):
         messages.success(request, "Datos actualizados. El panel se refrescará con nueva información.")
     return redirect("panel_bi")
 
+def _periodo(request): # (mes, anio) desde la querystring, None si no vienen o son inválidos
+    try:
+        mes = int(request.GET["mes"]) if request.GET.get("mes") else None
+        anio = int(request.GET["anio"]) if request.GET.get("anio") else None
+    except ValueError:
+        return None, None
+    return mes, anio
+
+def _estado_reporte(reporte):
+    listo = reporte.estado == ReporteBI.ESTADO_LISTO
+    return {
+        "ok": reporte.estado != ReporteBI.ESTADO_ERROR,
+        "message": reporte.error or reporte.get_estado_display(),
+        "estado": reporte.estado,
+        "progreso": reporte.progreso,
+        "estado_url": reverse("estado_reporte_pdf", args=[reporte.pk]),
+        "descarga_url": reporte.archivo.url if listo else None,  # URL firmada del bucket
+    }
+
 @login_required
 def generar_pdf_view(request):
-    datos = construir_datos_panel_bi()
-    context = {
-        "fecha_generacion": timezone.localtime(),
-        "usuario": request.user.get_full_name() or request.user.username,
-        "ocupacion_talleres": datos["ocupacion_talleres"],
-        "consulta_actas": datos["consulta_actas"],
-        "participacion": datos["participacion"],
-        "demografia_sector": datos["demografia_sector"],
-        "data_asistencia": datos["data_asistencia"],
-        "metricas": datos["metricas"],
-        "precision": datos["precision"],
-        "detalle_precision": datos["detalle_precision"],
-        "detalle_rendimiento": datos["detalle_rendimiento"],
-        "detalle_disponibilidad": datos["detalle_disponibilidad"],
-        "tiempo_segundos": datos["tiempo_segundos"],
-        "tiempo_p95_seg": datos["tiempo_p95_seg"],
-    }
-    template = get_template("datamart/reporte_pdf.html")
-    html = template.render(context, request=request)
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="Informe.pdf"'
-    pisa_status = pisa.CreatePDF(html, dest=response)
-    if pisa_status.err:
-        return HttpResponse("Error PDF")
-    return response
\ No newline at end of file
+    """
+    Solicita el informe PDF del periodo. Si ya existe para la ejecución vigente del
+    ETL se descarga directamente; si no, se encola su generación en la cola analitica.
+    """
+    mes, anio = _periodo(request)
+    reporte, nuevo = solicitar_reporte(anio, mes)
+    if nuevo:
+        encolar_tarea(generar_reporte_bi, reporte.pk)
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":  # Botón del panel: sigue el progreso
+        return JsonResponse(_estado_reporte(reporte))
+
+    if reporte.estado == ReporteBI.ESTADO_LISTO:
+        return redirect(reporte.archivo.url)
+    messages.info(request, "El informe se está generando. Vuelve a presionar \"Descargar Informe\" en unos segundos.")
+    return redirect("panel_bi")
+
+@login_required
+def estado_reporte_view(request, pk):
+    """Estado y progreso del informe PDF; incluye el enlace de descarga cuando está listo."""
+    reporte = get_object_or_404(ReporteBI, pk=pk)
+    return JsonResponse(_estado_reporte(reporte))
@@ -8,10 +8,10 @@ Descripción:   Configuración ASGI para el proyecto. Permite manejar tanto
 --------------------------------------------------------------------------------
 """
 import os  # Importa el módulo para interactuar con el sistema operativo
+import logging  # Registro de eventos (precarga del modelo)
 from django.core.asgi import get_asgi_application  # Importa la aplicación ASGI estándar de Django
 from channels.routing import ProtocolTypeRouter, URLRouter  # Importa enrutadores para manejar diferentes protocolos
 from channels.auth import AuthMiddlewareStack  # Middleware para gestionar autenticación en WebSockets
-from reuniones.routing import websocket_urlpatterns  # Importa las rutas de WebSockets definidas en la app 'reuniones'
 
 # Establece la variable de entorno que apunta al archivo de configuración de Django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "proyecto_tesis.settings")
@@ -19,6 +19,18 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "proyecto_tesis.settings")
 # Inicializa la aplicación ASGI para manejar peticiones HTTP
 django_asgi = get_asgi_application()
 
+# Las rutas WS importan modelos: deben cargarse después de inicializar Django
+from reuniones.routing import websocket_urlpatterns  # noqa: E402  Importa las rutas de WebSockets definidas en la app 'reuniones'
+
+# Precarga el modelo Vosk al iniciar el servidor (evita la espera en la primera conexión STT)
+from django.conf import settings  # noqa: E402
+if settings.VOSK_PRECARGAR:
+    from reuniones.modelo_vosk import precargar_modelo  # noqa: E402
+    try:
+        precargar_modelo()
+    except Exception as e:
+        logging.getLogger(__name__).error("No se pudo precargar el modelo Vosk: %s", e)
+
 # Define el enrutador principal de protocolos
 application = ProtocolTypeRouter({
     "http": django_asgi,  # Si el protocolo es HTTP, usa la aplicación Django estándar
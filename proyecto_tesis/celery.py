@@ -7,8 +7,10 @@ Descripción:   Configuración de Celery, el gestor de tareas asíncronas.
                en segundo plano sin bloquear la respuesta al usuario.
 --------------------------------------------------------------------------------
 """
+import logging  # Registro de la configuración aplicada al worker
 import os  # Importa módulo del sistema operativo
 from celery import Celery  # Importa la clase base de Celery
+from celery.signals import celeryd_init, worker_process_init, worker_ready  # Señales del ciclo de vida del worker
 
 # Establece la variable de entorno para que Celery sepa dónde están tus settings de Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'proyecto_tesis.settings')
@@ -21,4 +23,60 @@ app = Celery('proyecto_tesis')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Busca y carga automáticamente las tareas (tasks.py) definidas en cada aplicación instalada
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+
+logger = logging.getLogger(__name__)
+
+
+def colas_del_worker(app_):
+    """Nombres de las colas que consume este worker (-Q, o la cola por defecto)."""
+    colas = app_.amqp.queues
+    return set(colas.consume_from or colas)
+
+
+@celeryd_init.connect
+def configurar_worker_por_cola(sender=None, conf=None, options=None, **kwargs):
+    """
+    Aplica el prefetch según las colas del worker (COLAS_CELERY). Si consume
+    varias (entorno de desarrollo) se usa el menor.
+    """
+    from django.conf import settings
+
+    pedidas = (options or {}).get("queues") or conf.task_default_queue
+    if isinstance(pedidas, str):
+        pedidas = pedidas.split(",")
+    ajustes = [settings.COLAS_CELERY[c.strip()] for c in pedidas if c.strip() in settings.COLAS_CELERY]
+    if not ajustes:
+        return
+
+    conf.worker_prefetch_multiplier = min(a["prefetch"] for a in ajustes)
+    logger.info(f"Worker {sender}: colas {','.join(pedidas)}, prefetch {conf.worker_prefetch_multiplier}")
+
+
+def _envia_notificaciones(app_): # Las notificaciones push van a la cola io
+    return "io" in colas_del_worker(app_)
+
+
+@worker_process_init.connect
+def calentar_firebase_proceso(**kwargs):
+    """
+    Prefork: cada proceso hijo inicializa Firebase al nacer (no se hereda del padre,
+    las conexiones HTTP no deben compartirse entre procesos).
+    """
+    if not _envia_notificaciones(app):
+        return
+    from core.notificaciones import calentar_firebase
+    calentar_firebase()
+
+
+@worker_ready.connect
+def calentar_firebase_worker(sender=None, **kwargs):
+    """Pools threads/solo: las tareas corren en el proceso principal, se inicializa aquí."""
+    from celery.concurrency.prefork import TaskPool
+
+    if isinstance(getattr(sender, "pool", None), TaskPool) or not _envia_notificaciones(app):
+        return
+    from core.notificaciones import calentar_firebase
+    if calentar_firebase():
+        logger.info("Firebase inicializado al arrancar el worker.")
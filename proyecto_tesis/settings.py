@@ -58,6 +58,10 @@ FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
 FIREBASE_CLIENT_EMAIL = os.getenv("FIREBASE_CLIENT_EMAIL")
 FIREBASE_PRIVATE_KEY = os.getenv("FIREBASE_PRIVATE_KEY")
 FIREBASE_PRIVATE_KEY_ID = os.getenv("FIREBASE_PRIVATE_KEY_ID", "")
+# Lotes multicast (500 tokens c/u) que se envían en paralelo por notificación
+FCM_LOTES_CONCURRENTES = int(os.getenv("FCM_LOTES_CONCURRENTES", "4"))
+# Conexiones HTTP reutilizables hacia FCM por proceso (el SDK usa un thread por token del lote)
+FCM_CONEXIONES = int(os.getenv("FCM_CONEXIONES", "50"))
 
 
 # -----------------------------------------------------------------------------
@@ -257,6 +261,45 @@ CHANNEL_LAYERS = {
 # Configuración del modelo de reconocimiento de voz (Vosk)
 MODEL_PATH_RELATIVO = Path(r"vosk-model-small-es-0.42")
 MODEL_PATH = os.path.join(settings.BASE_DIR, MODEL_PATH_RELATIVO)
+# Cargar el modelo al iniciar el worker / ASGI (False en procesos que no transcriben)
+VOSK_PRECARGAR = os.getenv("VOSK_PRECARGAR", "True").lower() == "true"
+
+# Transcripción en vivo (STTConsumer)
+STT_HILOS = int(os.getenv("STT_HILOS", "0"))  # Hilos para AcceptWaveform (0 = núcleos disponibles)
+STT_COLA_MAX_FRAMES = int(os.getenv("STT_COLA_MAX_FRAMES", "100"))  # Frames en espera por sesión antes de descartar
+STT_BLOQUE_MIN_BYTES = 6400  # 0,2 s de PCM16 a 16 kHz por llamada al reconocedor
+STT_BLOQUE_MAX_BYTES = 32000  # 1 s como máximo por llamada
+STT_ESPERA_MAX_MS = 150  # Espera máxima para completar un bloque pequeño
+STT_PARCIALES_POR_SEGUNDO = float(os.getenv("STT_PARCIALES_POR_SEGUNDO", "4"))
+STT_METRICAS_CADA_S = 10  # Cada cuánto se envían métricas al hablante
+STT_GRABAR_AUDIO = os.getenv("STT_GRABAR_AUDIO", "True").lower() == "true"  # Guardar el audio en vivo como grabación
+STT_RESPALDO_S = int(os.getenv("STT_RESPALDO_S", "30"))  # Cada cuánto se guarda el audio aún no subido como tramo
+
+# Transcripción offline: número de procesos (0 = todos los núcleos, 1 = secuencial)
+TRANSCRIPCION_PROCESOS = int(os.getenv("TRANSCRIPCION_PROCESOS", "0"))
+# Duración aproximada de cada segmento enviado al pool (se corta en el silencio más cercano)
+TRANSCRIPCION_SEGMENTO_SEGUNDOS = int(os.getenv("TRANSCRIPCION_SEGMENTO_SEGUNDOS", "300"))
+# Descartar los tramos sin voz antes de Kaldi (VAD por energía)
+TRANSCRIPCION_VAD = os.getenv("TRANSCRIPCION_VAD", "True").lower() == "true"
+# Cada cuánto se guarda el avance (checkpoint) de una transcripción larga
+TRANSCRIPCION_CHECKPOINT_SEGUNDOS = int(os.getenv("TRANSCRIPCION_CHECKPOINT_SEGUNDOS", "30"))
+# Un acta en PROCESANDO sin avances en este tiempo se considera interrumpida y se re-encola
+TRANSCRIPCION_REANUDAR_TRAS_SEGUNDOS = int(os.getenv("TRANSCRIPCION_REANUDAR_TRAS_SEGUNDOS", "900"))
+# Transcripciones guardadas por contenido del audio (se eliminan las menos usadas sobre este número)
+TRANSCRIPCION_CACHE_MAX_ENTRADAS = int(os.getenv("TRANSCRIPCION_CACHE_MAX_ENTRADAS", "200"))
+# Subida de grabaciones por partes directo al bucket (mínimo 5 MB por parte, exigido por S3)
+SUBIDA_AUDIO_TAMANO_PARTE = max(5 * 1024 * 1024, int(os.getenv("SUBIDA_AUDIO_TAMANO_PARTE", str(8 * 1024 * 1024))))
+SUBIDA_AUDIO_URL_VALIDEZ_S = int(os.getenv("SUBIDA_AUDIO_URL_VALIDEZ_S", "3600"))  # Vigencia de las URLs firmadas
+# Tras transcribir, se guarda una copia en Opus (voz) para escuchar/descargar; el original se
+# conserva salvo que se active GRABACIONES_BORRAR_ORIGINAL (la copia es mono a 24 kbps)
+AUDIO_OPUS_BITRATE = os.getenv("AUDIO_OPUS_BITRATE", "24k")
+GRABACIONES_BORRAR_ORIGINAL = os.getenv("GRABACIONES_BORRAR_ORIGINAL", "False").lower() == "true"
+# Envío masivo del acta por correo (tarea en la cola io)
+CORREO_ACTA_LOTE = int(os.getenv("CORREO_ACTA_LOTE", "25"))  # Destinatarios por grupo (una actualización del log)
+CORREO_ACTA_CONCURRENCIA = int(os.getenv("CORREO_ACTA_CONCURRENCIA", "4"))  # Llamadas simultáneas al webhook
+# PDF del acta aprobada: se genera una vez en la cola cpu y, si hay certificado, se firma con pyHanko
+ACTA_PDF_FIRMA_PKCS12 = os.getenv("ACTA_PDF_FIRMA_PKCS12", "")  # Ruta al .p12/.pfx de la directiva (vacío = sin firma)
+ACTA_PDF_FIRMA_CLAVE = os.getenv("ACTA_PDF_FIRMA_CLAVE", "")
 
 # =================================================
 # --- CONFIGURACIÓN DE CELERY (CON REDIS) ---
@@ -268,6 +311,34 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Colas separadas para que una transcripción larga no bloquee notificaciones ni el ETL:
+#   cpu       -> transcripción (pool solo: el paralelismo lo da el pool de procesos de la transcripción)
+#   io        -> notificaciones FCM, correos y webhooks (threads, alta concurrencia)
+#   analitica -> ETL del Data Mart
+CELERY_TASK_DEFAULT_QUEUE = "io"
+CELERY_TASK_ROUTES = {
+    "procesar_audio_vosk": {"queue": "cpu"},
+    "medir_precision_transcripcion": {"queue": "cpu"},
+    "comprimir_audio_acta": {"queue": "cpu"},
+    "generar_pdf_acta": {"queue": "cpu"},
+    "datamart.tasks.tarea_actualizar_bi_async": {"queue": "analitica"},
+    "datamart.tasks.generar_reporte_bi": {"queue": "analitica"},
+}
+# Outbox: las señales registran la tarea en la base (TareaPendiente) y el relay
+# 'despachar_outbox' la publica en el broker fuera de la petición
+OUTBOX_LOTE = int(os.getenv("OUTBOX_LOTE", "100"))  # Tareas publicadas por transacción
+OUTBOX_INTERVALO_S = float(os.getenv("OUTBOX_INTERVALO_S", "1"))  # Espera cuando no hay pendientes
+OUTBOX_MAX_INTENTOS = int(os.getenv("OUTBOX_MAX_INTENTOS", "10"))  # Luego queda para revisión manual
+OUTBOX_RETENCION_HORAS = int(os.getenv("OUTBOX_RETENCION_HORAS", "72"))  # Historial de despachadas
+# Ajustes por cola que el worker aplica según las colas que consume (-Q), ver proyecto_tesis/celery.py.
+# No se fijan límites de tiempo por cola: los pools solo y threads (los de todos los workers
+# del Procfile) no aplican task_time_limit ni task_soft_time_limit.
+COLAS_CELERY = {
+    "cpu": {"prefetch": 1},  # No reservar trabajos de 40 min que otro worker podría tomar
+    "io": {"prefetch": 8},  # Tareas cortas: se reservan varias por hilo
+    "analitica": {"prefetch": 1},
+}
+
 # =================================================
 # --- CONFIGURACIÓN DE CLEVER CLOUD STORAGE (CELLAR / S3) ---
 # =================================================
@@ -328,6 +399,14 @@ AUTHENTICATION_BACKENDS = [
 # =================================================
 APPSCRIPT_WEBHOOK_URL = os.getenv("APPSCRIPT_WEBHOOK_URL")
 APPSCRIPT_WEBHOOK_SECRET = os.getenv("APPSCRIPT_WEBHOOK_SECRET")
+# Cliente HTTP del webhook: conexiones reutilizables; en tareas, reintentos ante 429/503 y límite de envíos
+APPSCRIPT_WEBHOOK_CONEXIONES = int(os.getenv("APPSCRIPT_WEBHOOK_CONEXIONES", "10"))
+APPSCRIPT_WEBHOOK_REINTENTOS = int(os.getenv("APPSCRIPT_WEBHOOK_REINTENTOS", "4"))
+# Token bucket por proceso (uno por worker io): con N workers io la tasa total es N x POR_SEGUNDO,
+# así que la cuota de Apps Script (ejecuciones simultáneas y correos/día) se divide entre ellos
+APPSCRIPT_WEBHOOK_POR_SEGUNDO = float(os.getenv("APPSCRIPT_WEBHOOK_POR_SEGUNDO", "2"))
+APPSCRIPT_WEBHOOK_RAFAGA = int(os.getenv("APPSCRIPT_WEBHOOK_RAFAGA", "10"))
+APPSCRIPT_WEBHOOK_ESPERA_MAX_S = float(os.getenv("APPSCRIPT_WEBHOOK_ESPERA_MAX_S", "120"))  # Solo tareas; la web no espera
 
 # =================================================
 # --- CONFIGURACIÓN DE CACHÉ (REDIS) ---
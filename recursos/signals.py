@@ -10,6 +10,7 @@ from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from .models import SolicitudReserva, Recurso
 from .tasks import notificar_actualizacion_solicitud, notificar_nuevo_recurso
+from core.outbox import encolar_tarea
 
 @receiver(pre_save, sender=SolicitudReserva)
 def detectar_cambio_estado(sender, instance, **kwargs):
@@ -34,7 +35,7 @@ def trigger_notificacion_recurso(sender, instance, created, **kwargs):
     """
     if hasattr(instance, '_estado_cambio') and instance._estado_cambio:
         if instance.estado in ['APROBADA', 'RECHAZADA']:
-            notificar_actualizacion_solicitud.delay(instance.id)
+            encolar_tarea(notificar_actualizacion_solicitud, instance.id)
 
 @receiver(post_save, sender=Recurso)
 def trigger_notificacion_nuevo_recurso(sender, instance, created, **kwargs):
@@ -42,4 +43,4 @@ def trigger_notificacion_nuevo_recurso(sender, instance, created, **kwargs):
     Notifica a todos cuando se crea un nuevo recurso en el sistema.
     """
     if created:
-        notificar_nuevo_recurso.delay(instance.id)
\ No newline at end of file
+        encolar_tarea(notificar_nuevo_recurso, instance.id)
\ No newline at end of file
@@ -8,41 +8,14 @@ Descripción:   Definición de tareas asíncronas (Celery) para enviar notificac
 --------------------------------------------------------------------------------
 """
 from celery import shared_task
-from django.conf import settings
-import firebase_admin
-from firebase_admin import messaging, credentials
+from firebase_admin import messaging
 from .models import SolicitudReserva, Recurso
 from core.models import DispositivoFCM
+from core.notificaciones import enviar_a_tokens, inicializar_firebase
 import logging
 
 logger = logging.getLogger(__name__)
 
-def inicializar_firebase():
-    """Inicializa la app de Firebase con las credenciales del entorno"""
-    if not firebase_admin._apps:
-        try:
-            project_id = getattr(settings, "FIREBASE_PROJECT_ID", None)
-            client_email = getattr(settings, "FIREBASE_CLIENT_EMAIL", None)
-            private_key = getattr(settings, "FIREBASE_PRIVATE_KEY", None)
-
-            if project_id and client_email and private_key:
-                cred = credentials.Certificate({
-                    "type": "service_account",
-                    "project_id": project_id,
-                    "private_key_id": getattr(settings, "FIREBASE_PRIVATE_KEY_ID", "dummy"),
-                    "private_key": private_key.replace("\\n", "\n"),
-                    "client_email": client_email,
-                    "client_id": "dummy",
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                    "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{client_email}",
-                })
-                firebase_admin.initialize_app(cred)
-        except Exception as e:
-            logger.error(f"Error inicializando Firebase en Recursos: {e}")
-
-
 @shared_task
 def notificar_actualizacion_solicitud(solicitud_id):
     """
@@ -70,26 +43,22 @@ def notificar_actualizacion_solicitud(solicitud_id):
 
         estado_legible = solicitud.get_estado_display()
 
-        # Enviar mensaje a cada dispositivo
-        for token in tokens:
-            try:
-                message = messaging.Message(
-                    notification=messaging.Notification(
-                        title="Solicitud Actualizada",
-                        body=f"Tu solicitud para '{solicitud.recurso.nombre}' ha sido {estado_legible}. Revisa los detalles en la app."
-                    ),
-                    token=token,
-                    data={
-                        "tipo": "actualizacion_solicitud",
-                        "solicitud_id": str(solicitud.id),
-                        "nuevo_estado": str(solicitud.estado)
-                    }
-                )
-                messaging.send(message)
-            except Exception as e:
-                logger.error(f"Error enviando notificación a token {token}: {e}")
+        # Un solo envío multicast a todos los dispositivos del usuario
+        resultado = enviar_a_tokens(
+            tokens,
+            "Solicitud Actualizada",
+            f"Tu solicitud para '{solicitud.recurso.nombre}' ha sido {estado_legible}. Revisa los detalles en la app.",
+            {
+                "tipo": "actualizacion_solicitud",
+                "solicitud_id": solicitud.id,
+                "nuevo_estado": solicitud.estado,
+            },
+        )
 
-        return f"Notificación enviada a {usuario.username} en {len(tokens)} dispositivo(s)."
+        return (
+            f"Notificación enviada a {usuario.username}: {resultado['exitosos']} de "
+            f"{resultado['tokens']} dispositivo(s)."
+        )
 
     except SolicitudReserva.DoesNotExist:
         return f"Solicitud {solicitud_id} no encontrada."
@@ -0,0 +1,143 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Utilidades de acceso al almacenamiento (Cellar/S3) para los
+               archivos de audio. Permite leer un archivo por fragmentos sin
+               descargarlo completo a memoria ni a disco, y escribir un
+               archivo que crece por partes (subida multipart).
+--------------------------------------------------------------------------------
+"""
+import hashlib
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+TAMANO_FRAGMENTO = 256 * 1024  # 256 KB por lectura desde el almacenamiento
+
+
+def clave_s3(storage, nombre):
+    """Clave del objeto en el bucket (aplica el prefijo LOCATION del storage)."""
+    from storages.utils import clean_name
+    return storage._normalize_name(clean_name(nombre))
+
+
+def es_s3(storage): # Indica si el storage es S3Boto3Storage (Cellar)
+    return hasattr(storage, "bucket") and hasattr(storage, "bucket_name")
+
+
+def iterar_archivo(field_file, tamano=TAMANO_FRAGMENTO):
+    """
+    Genera el contenido de un FileField por fragmentos.
+    En S3 se lee directamente el cuerpo HTTP del objeto (S3File descargaría
+    el archivo completo a un temporal antes de entregar el primer byte).
+    """
+    storage = field_file.storage
+    if es_s3(storage):
+        cuerpo = storage.bucket.Object(clave_s3(storage, field_file.name)).get()["Body"]
+        try:
+            for fragmento in cuerpo.iter_chunks(tamano):
+                yield fragmento
+        finally:
+            cuerpo.close()
+        return
+
+    # Almacenamiento local (desarrollo)
+    with storage.open(field_file.name, "rb") as f:
+        for fragmento in f.chunks(tamano):
+            yield fragmento
+
+
+
+def con_huella(fragmentos, hasher):
+    """Deja pasar los fragmentos actualizando el hash (se calcula mientras se transcribe)."""
+    for fragmento in fragmentos:
+        hasher.update(fragmento)
+        yield fragmento
+
+
+def huella_archivo(archivo):
+    """SHA-256 de un archivo subido (UploadedFile) leyéndolo por fragmentos."""
+    hasher = hashlib.sha256()
+    for fragmento in archivo.chunks(TAMANO_FRAGMENTO):
+        hasher.update(fragmento)
+    archivo.seek(0)
+    return hasher.hexdigest()
+
+
+def huella_almacenada(field_file):
+    """SHA-256 de un archivo ya guardado (FileField), leído por fragmentos desde el almacenamiento."""
+    hasher = hashlib.sha256()
+    for fragmento in iterar_archivo(field_file):
+        hasher.update(fragmento)
+    return hasher.hexdigest()
+
+TAMANO_PARTE_MIN = 5 * 1024 * 1024  # S3 exige al menos 5 MB en cada parte salvo la última
+
+
+class EscritorMultipart:
+    """
+    Escribe un objeto que crece por partes (S3 multipart upload). El estado
+    (upload_id y partes subidas) se puede guardar en la BD para completar la
+    subida desde otro proceso. Fuera de S3 agrega las partes a un archivo local.
+    """
+
+    def __init__(self, storage, nombre, content_type="application/octet-stream", upload_id="", partes=None):
+        self.storage = storage
+        self.nombre = nombre
+        self.content_type = content_type
+        self.upload_id = upload_id
+        self.partes = list(partes or [])  # [{"PartNumber": n, "ETag": "..."}]
+
+    def _cliente(self):
+        return self.storage.bucket.meta.client
+
+    def _clave(self):
+        return clave_s3(self.storage, self.nombre)
+
+    def iniciar(self):
+        self.nombre = self.storage.get_available_name(self.nombre)
+        if es_s3(self.storage):
+            respuesta = self._cliente().create_multipart_upload(
+                Bucket=self.storage.bucket_name, Key=self._clave(), ContentType=self.content_type,
+            )
+            self.upload_id = respuesta["UploadId"]
+        else:
+            ruta = self.storage.path(self.nombre)
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            open(ruta, "wb").close()
+        return self.nombre
+
+    def subir_parte(self, data): # Sube una parte y devuelve su descriptor
+        numero = len(self.partes) + 1
+        if es_s3(self.storage):
+            respuesta = self._cliente().upload_part(
+                Bucket=self.storage.bucket_name, Key=self._clave(),
+                UploadId=self.upload_id, PartNumber=numero, Body=data,
+            )
+            parte = {"PartNumber": numero, "ETag": respuesta["ETag"]}
+        else:
+            with open(self.storage.path(self.nombre), "ab") as f:
+                f.write(data)
+            parte = {"PartNumber": numero, "ETag": ""}
+        self.partes.append(parte)
+        return parte
+
+    def completar(self):
+        if es_s3(self.storage):
+            self._cliente().complete_multipart_upload(
+                Bucket=self.storage.bucket_name, Key=self._clave(),
+                UploadId=self.upload_id, MultipartUpload={"Parts": self.partes},
+            )
+
+    def abortar(self): # Descarta lo subido (no deja partes huérfanas cobrando espacio)
+        try:
+            if es_s3(self.storage):
+                self._cliente().abort_multipart_upload(
+                    Bucket=self.storage.bucket_name, Key=self._clave(), UploadId=self.upload_id,
+                )
+            else:
+                self.storage.delete(self.nombre)
+        except Exception as e:
+            logger.warning("No se pudo abortar la subida de %s: %s", self.nombre, e)
@@ -12,6 +12,7 @@ from rest_framework import viewsets, permissions, filters, status # Importa util
 from rest_framework.pagination import PageNumberPagination # Importa paginación
 from django.db.models import Q # Importa objeto Q para consultas complejas
 from .models import Reunion, Acta, Asistencia, LogConsultaActa # Importa modelos locales
+from .indice_palabras import buscar as buscar_en_indice, cargar_palabras # Índice de palabras transcritas
 from .serializers import ReunionSerializer, ActaSerializer,AsistenciaSerializer # Importa serializadores
 from django.utils import timezone # Importa utilidades de tiempo
 from datetime import timedelta # Importa manejo de deltas de tiempo
@@ -96,8 +97,7 @@ class ActaViewSet(viewsets.ReadOnlyModelViewSet): # ViewSet de solo lectura para
     serializer_class = ActaSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = DefaultPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["contenido", "reunion__titulo"]
+    filter_backends = [filters.OrderingFilter] # La búsqueda se arma en get_queryset
     ordering_fields = ["reunion__fecha"]
 
     def get_queryset(self):
@@ -106,9 +106,57 @@ class ActaViewSet(viewsets.ReadOnlyModelViewSet): # ViewSet de solo lectura para
         if reunion_id: # Filtra por ID de reunión si se proporciona
             qs = qs.filter(reunion_id=reunion_id)
         search = self.request.query_params.get("search")
-        if search: # Filtra por texto en contenido o título
-            qs = qs.filter(Q(contenido__icontains=search) | Q(reunion__titulo__icontains=search))
+        if search: # Texto del acta, título o transcripción automática indexada
+            en_indice = list(buscar_en_indice(search, actas=qs))
+            qs = qs.filter(
+                Q(pk__in=en_indice)
+                | Q(reunion__titulo__icontains=search)
+                # El índice viene de la transcripción sin corregir: lo que la directiva
+                # editó o agregó en el acta solo está en 'contenido'
+                | Q(contenido__icontains=search)
+            )
         return qs
+
+    @action(detail=False, methods=["get"], url_path="buscar")
+    def buscar(self, request): # Actas donde aparece la frase y los segundos de cada aparición
+        consulta = request.query_params.get("q", "").strip()
+        if not consulta:
+            return Response({"detail": "Falta el parámetro q."}, status=status.HTTP_400_BAD_REQUEST)
+
+        encontradas = buscar_en_indice(consulta, actas=self.get_queryset())
+        actas = Acta.objects.select_related("reunion").filter(pk__in=encontradas).order_by("-reunion__fecha")
+        resultados = [
+            {
+                "acta_id": acta.pk,
+                "reunion_id": acta.reunion_id,
+                "titulo": acta.reunion.titulo,
+                "fecha": acta.reunion.fecha,
+                "audio_url": acta.archivo_audio.url if acta.archivo_audio else None,
+                "segundos": encontradas[acta.pk],
+            }
+            for acta in actas
+        ]
+        page = self.paginate_queryset(resultados)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(resultados)
+
+    @action(detail=True, methods=["get"], url_path="palabras")
+    def palabras(self, request, pk=None): # Palabras con tiempos (opcional ?desde=&hasta= en segundos)
+        acta = self.get_object()
+        registro = getattr(acta, "palabras", None) # RelatedObjectDoesNotExist -> None
+        if registro is None:
+            return Response({"detail": "El acta no tiene palabras indexadas."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            desde = float(request.query_params["desde"]) if "desde" in request.query_params else None
+            hasta = float(request.query_params["hasta"]) if "hasta" in request.query_params else None
+        except ValueError:
+            return Response({"detail": "desde/hasta deben ser números."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "acta_id": acta.pk,
+            "total": registro.total,
+            "palabras": cargar_palabras(registro, desde, hasta),
+        })
     
     # --- ACCIÓN PARA REGISTRAR LA CONSULTA  ---
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated], url_path="consultar")
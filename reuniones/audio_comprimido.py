@@ -0,0 +1,151 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Compresión de las grabaciones una vez transcritas. El audio se
+               convierte a Ogg/Opus mono optimizado para voz y, en la misma
+               pasada, se calcula la forma de onda reducida (picos) con la que
+               el reproductor dibuja y busca sin descargar el archivo completo.
+--------------------------------------------------------------------------------
+"""
+import logging
+import queue
+import threading
+
+import ffmpeg
+import numpy as np
+from django.conf import settings
+
+from .almacenamiento import TAMANO_PARTE_MIN, EscritorMultipart, iterar_archivo
+from .transcripcion import SAMPLE_RATE, DecodificadorFFmpeg
+
+logger = logging.getLogger(__name__)
+
+PICOS_POR_SEGUNDO = 10  # Resolución de la forma de onda (2 h de audio = 72.000 bytes)
+
+
+class TranscodificadorOpus(DecodificadorFFmpeg):
+    """Mismo flujo por pipes que DecodificadorFFmpeg, pero entrega Ogg/Opus mono 16 kHz (voz)."""
+
+    def __init__(self, fragmentos, bitrate=None):
+        super().__init__(fragmentos, filtro=None, frames=32 * 1024)  # Lecturas de 64 KB
+        self.bitrate = bitrate or settings.AUDIO_OPUS_BITRATE
+
+    def _iniciar(self):
+        return (
+            ffmpeg
+            .input("pipe:0")
+            .output(
+                "pipe:1", format="ogg", acodec="libopus", ac=1, ar=str(SAMPLE_RATE),
+                application="voip", vn=None, **{"b:a": self.bitrate},
+            )
+            .global_args("-hide_banner", "-loglevel", "error")
+            .run_async(pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
+        )
+
+
+class AcumuladorPicos:
+    """Máximo absoluto de cada tramo de 1/PICOS_POR_SEGUNDO s, a partir de PCM s16le por bloques."""
+
+    def __init__(self, rate=SAMPLE_RATE, por_segundo=PICOS_POR_SEGUNDO):
+        self.rate = rate
+        self.tramo = rate // por_segundo
+        self.muestras = 0
+        self._picos = []
+        self._resto = np.empty(0, dtype=np.int16)  # Muestras que aún no completan un tramo
+
+    def agregar(self, pcm):
+        muestras = np.frombuffer(pcm, dtype="<i2")
+        self.muestras += len(muestras)
+        if len(self._resto):
+            muestras = np.concatenate([self._resto, muestras])
+        completos = len(muestras) // self.tramo * self.tramo
+        if completos:
+            tramos = np.abs(muestras[:completos].astype(np.int32)).reshape(-1, self.tramo)
+            self._picos.append(tramos.max(axis=1))
+        self._resto = muestras[completos:].copy()
+
+    def duracion_s(self):
+        return self.muestras / self.rate
+
+    def resultado(self):
+        """Picos en uint8 (0-255), normalizados al máximo de la grabación."""
+        partes = list(self._picos)
+        if len(self._resto):
+            partes.append(np.abs(self._resto.astype(np.int32)).max(keepdims=True))
+        if not partes:
+            return b""
+        picos = np.concatenate(partes)
+        return np.round(picos * 255 / max(int(picos.max()), 1)).astype("u1").tobytes()
+
+
+def comprimir_audio(field_file, storage, nombre):
+    """
+    Convierte el audio de field_file a Opus y lo sube por partes a 'nombre'.
+    Los picos se calculan decodificando el propio Opus generado (en otro hilo),
+    así la forma de onda coincide exactamente con el archivo que se reproduce.
+    Devuelve dict con nombre, bytes, picos y duracion_s.
+    """
+    cola = queue.Queue(maxsize=32)  # Opus hacia el cálculo de picos (memoria acotada)
+    picos = AcumuladorPicos()
+    errores = []
+    fin = threading.Event()  # El consumidor ya recibió el marcador de término
+
+    def opus_desde_cola():
+        while True:
+            fragmento = cola.get()
+            if fragmento is None:
+                fin.set()
+                return
+            yield fragmento
+
+    def calcular_picos(): # Hilo: Opus -> PCM -> picos
+        try:
+            for pcm in DecodificadorFFmpeg(opus_desde_cola(), filtro=None):
+                picos.agregar(pcm)
+        except Exception as e:
+            errores.append(e)
+        finally:
+            # Si el decodificador falló se sigue vaciando la cola para no bloquear al productor
+            while not fin.is_set():
+                try:
+                    if cola.get(timeout=1) is None:
+                        fin.set()
+                except queue.Empty:
+                    pass
+
+    hilo = threading.Thread(target=calcular_picos, daemon=True)
+    hilo.start()
+
+    escritor = EscritorMultipart(storage, nombre, "audio/ogg")
+    escritor.iniciar()
+    total = 0
+    pendiente = bytearray()
+    try:
+        for fragmento in TranscodificadorOpus(iterar_archivo(field_file)):
+            cola.put(fragmento)
+            pendiente += fragmento
+            total += len(fragmento)
+            if len(pendiente) >= TAMANO_PARTE_MIN:
+                escritor.subir_parte(bytes(pendiente))
+                pendiente.clear()
+        if pendiente:
+            escritor.subir_parte(bytes(pendiente))
+        if not escritor.partes:
+            raise RuntimeError("FFmpeg no produjo audio")
+        escritor.completar()
+    except Exception:
+        escritor.abortar()
+        raise
+    finally:
+        cola.put(None)
+        hilo.join()
+
+    if errores:
+        logger.warning(f"No se pudo calcular la forma de onda de {nombre}: {errores[0]}")
+    return {
+        "nombre": escritor.nombre,
+        "bytes": total,
+        "picos": picos.resultado() if not errores else b"",
+        "duracion_s": picos.duracion_s() if not errores else None,
+    }
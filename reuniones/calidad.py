@@ -0,0 +1,72 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Medición de la precisión de la transcripción automática. Al
+               aprobar el acta se compara el texto del reconocedor con el texto
+               aprobado por la directiva (WER: distancia de edición en palabras
+               dividida por las palabras de referencia).
+--------------------------------------------------------------------------------
+"""
+import numpy as np
+
+from .indice_palabras import terminos
+
+
+def _a_ids(referencia, hipotesis): # Palabras -> enteros (comparaciones vectorizadas)
+    vocabulario = {}
+    ref = np.array([vocabulario.setdefault(p, len(vocabulario)) for p in referencia], dtype=np.int32)
+    hip = np.array([vocabulario.setdefault(p, len(vocabulario)) for p in hipotesis], dtype=np.int32)
+    return ref, hip
+
+
+def distancia_palabras(referencia, hipotesis):
+    """
+    Distancia de Levenshtein entre dos listas de palabras.
+
+    Se recorre la matriz fila por fila con numpy: sustitución y borrado se
+    calculan para toda la fila a la vez, y la inserción (que depende de la
+    celda de la izquierda) se resuelve con un mínimo acumulado:
+    fila[j] = j + min(k <= j) (tmp[k] - k). Memoria O(m), sin bucle por celda.
+    """
+    # El prefijo y sufijo comunes no aportan errores (actas poco editadas)
+    inicio = 0
+    while inicio < min(len(referencia), len(hipotesis)) and referencia[inicio] == hipotesis[inicio]:
+        inicio += 1
+    fin = 0
+    while (fin < min(len(referencia), len(hipotesis)) - inicio
+           and referencia[-1 - fin] == hipotesis[-1 - fin]):
+        fin += 1
+    referencia = referencia[inicio:len(referencia) - fin]
+    hipotesis = hipotesis[inicio:len(hipotesis) - fin]
+
+    if not referencia or not hipotesis:
+        return max(len(referencia), len(hipotesis))
+
+    ref, hip = _a_ids(referencia, hipotesis)
+    columnas = np.arange(len(hip) + 1, dtype=np.int64)
+    fila = columnas.copy()  # Fila 0: insertar j palabras
+    for i, palabra in enumerate(ref, start=1):
+        tmp = np.empty_like(fila)
+        tmp[0] = i
+        np.minimum(fila[:-1] + (hip != palabra), fila[1:] + 1, out=tmp[1:])  # Sustitución / borrado
+        fila = np.minimum.accumulate(tmp - columnas) + columnas  # Inserción
+    return int(fila[-1])
+
+
+def medir_precision(texto_aprobado, texto_automatico):
+    """
+    Compara el acta aprobada (referencia) con la transcripción automática.
+    Devuelve dict con palabras, errores, wer y precision (0-100).
+    """
+    referencia = terminos(texto_aprobado or "")
+    hipotesis = terminos(texto_automatico or "")
+    errores = distancia_palabras(referencia, hipotesis)
+    palabras = len(referencia)
+    wer = errores / palabras if palabras else (1.0 if hipotesis else 0.0)
+    return {
+        "palabras": palabras,
+        "errores": errores,
+        "wer": wer,
+        "precision": round(max(0.0, 1.0 - wer) * 100, 2),
+    }
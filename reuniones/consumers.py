@@ -7,67 +7,405 @@ Descripción:   Consumer de WebSockets para transcripción en tiempo real (STT)
 --------------------------------------------------------------------------------
 """
 # reuniones/consumers.py
-import asyncio, json, logging # Importa librerías estándar
+import asyncio, json, logging, os, time # Importa librerías estándar
+from collections import deque # Ventana de latencias recientes
+from urllib.parse import parse_qs # Lectura de parámetros de la URL del WS
+from channels.db import database_sync_to_async # Acceso a BD desde código asíncrono
 from channels.generic.websocket import AsyncWebsocketConsumer # Importa consumidor asíncrono
 from concurrent.futures import ThreadPoolExecutor # Importa ejecutor de hilos
 from django.conf import settings # Importa configuraciones de Django
+from django.core.cache import cache # Bloqueo del hablante por reunión (Redis)
+from core.authz import can # Verificación de permisos por rol
+from .transcripcion import FORMATOS_EN_VIVO, DecodificadorEnVivo # Decodificación Opus en streaming
+from . import grabacion_en_vivo # Grabación del audio de la sesión en el almacenamiento
+from .almacenamiento import TAMANO_PARTE_MIN
 
 logger = logging.getLogger(__name__)
 
 SAMPLE_RATE = 16000 # Frecuencia de muestreo para el audio
-EXECUTOR = ThreadPoolExecutor(max_workers=2) # Ejecutor para tareas pesadas
-_VOSK_MODEL = None  # carga perezosa y compartida del modelo
+EXECUTOR = ThreadPoolExecutor(max_workers=settings.STT_HILOS or os.cpu_count() or 2) # Ejecutor para tareas pesadas
+HABLANTE_TTL = 60  # Segundos que dura el bloqueo del hablante sin renovarse
+HABLANTE_RENOVAR_CADA = 20  # Cada cuántos segundos se renueva mientras llega audio
+TASAS_PCM = (8000, 11025, 16000, 22050, 24000, 32000, 44100, 48000)  # Frecuencias PCM aceptadas
+
+
+class MetricasSesion:
+    """Profundidad de cola, descartes y latencia de subtítulos de una sesión."""
+    def __init__(self):
+        self.inicio = time.monotonic()
+        self.frames = 0
+        self.descartados = 0
+        self.llamadas = 0  # Llamadas a AcceptWaveform (tras agrupar frames)
+        self.profundidad_max = 0
+        self.latencias_ms = deque(maxlen=200)  # Llegada del audio -> envío del texto final
+
+    def registrar_frame(self, profundidad):
+        self.frames += 1
+        self.profundidad_max = max(self.profundidad_max, profundidad)
+
+    def percentil(self, p):
+        if not self.latencias_ms:
+            return None
+        ordenadas = sorted(self.latencias_ms)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+    def resumen(self, profundidad):
+        return {
+            "cola": profundidad,
+            "cola_max": self.profundidad_max,
+            "frames": self.frames,
+            "descartados": self.descartados,
+            "frames_por_llamada": round(self.frames / self.llamadas, 1) if self.llamadas else None,
+            "latencia_p50_ms": self.percentil(50),
+            "latencia_p95_ms": self.percentil(95),
+        }
+
+
+def _en_hilo(func):
+    """Ejecuta func (BD + almacenamiento) en un hilo propio, sin bloquear el hilo compartido de la BD."""
+    return database_sync_to_async(func, thread_sensitive=False)
+
+
+@database_sync_to_async
+def _reunion_realizada(reunion_id):
+    from .models import EstadoReunion, Reunion
+    return Reunion.objects.filter(pk=reunion_id, estado=EstadoReunion.REALIZADA).exists()
+
+
+@database_sync_to_async
+def _puede(user, recurso, accion): # can() consulta el Perfil en la BD
+    return can(user, recurso, accion)
+
 
 class STTConsumer(AsyncWebsocketConsumer):
+    """
+    Conexión del hablante: recibe el audio y es la única que tiene reconocedor.
+    Solo se permite una por reunión (bloqueo en caché); el resto debe usar
+    OyenteConsumer para recibir los textos.
+    """
     async def connect(self): # Maneja la conexión WS
         self.reunion_id = self.scope["url_route"]["kwargs"]["reunion_id"] # Obtiene ID de reunión
         self.group_name  = f"reunion-{self.reunion_id}" # Define nombre de grupo
         self.last_final  = None
         self.rec         = None
+        self.es_hablante = False
+        self.ultima_renovacion = 0.0
+        self.cola = asyncio.Queue(maxsize=settings.STT_COLA_MAX_FRAMES) # Frames pendientes, en orden
+        self.tarea = None  # Único consumidor de la cola
+        self.pausado = False  # Se pidió al cliente bajar el ritmo
+        self.metricas = MetricasSesion()
+        self.ultimo_parcial = (0.0, "")
+        self.ultimo_aviso = 0.0
+        self.decodificador = None  # Solo si el cliente envía audio comprimido
+        self.grabacion = None  # GrabacionEnVivo de esta sesión
+        self.buffer_grabacion = bytearray()  # Audio aún no subido como parte (< 5 MB)
+        self.respaldado = 0  # Bytes del buffer ya guardados como tramo de respaldo
+        self.ultimo_respaldo = time.monotonic()
+        self.subida = None  # Parte subiéndose en segundo plano
+        self.escala = 1.0  # Tamaño de bloque relativo a PCM 16 kHz
+
+        # Negociación del formato: ?formato=webm|ogg (Opus) o ?formato=pcm&rate=48000
+        params = parse_qs(self.scope.get("query_string", b"").decode())
+        self.formato = params.get("formato", ["pcm"])[0].lower()
+        try:
+            self.rate = int(params.get("rate", [SAMPLE_RATE])[0])
+        except ValueError:
+            self.rate = 0
+        if self.formato in FORMATOS_EN_VIVO:
+            self.rate = SAMPLE_RATE  # FFmpeg entrega siempre 16 kHz
+        elif self.formato != "pcm" or self.rate not in TASAS_PCM:
+            await self._rechazar(f"Formato no soportado: {self.formato} {self.rate} Hz", 4415)
+            return
+        self.escala = self.rate / SAMPLE_RATE
+
+        # Solo la directiva autenticada puede transcribir
+        if not await _puede(self.scope.get("user"), "actas", "edit"):
+            await self._rechazar("No autorizado para transcribir", 4003)
+            return
+
+        # Un único hablante por reunión
+        self.es_hablante = await cache.aadd(grabacion_en_vivo.clave_hablante(self.reunion_id), self.channel_name, HABLANTE_TTL)
+        if not self.es_hablante:
+            await self._rechazar("Ya hay un hablante activo en esta reunión; conéctate como oyente", 4009)
+            return
+        self.ultima_renovacion = time.monotonic()
 
-        # Cargar Vosk con manejo de errores
+        # Crear reconocedor sobre el modelo compartido (precargado en asgi.py)
         try:
-            global _VOSK_MODEL
-            if _VOSK_MODEL is None:
-                from vosk import Model
-                logger.info("Cargando modelo Vosk: %s", settings.MODEL_PATH_RELATIVO)
-                _VOSK_MODEL = Model(str(settings.MODEL_PATH_RELATIVO)) # Carga el modelo globalmente
             from vosk import KaldiRecognizer
-            self.rec = KaldiRecognizer(_VOSK_MODEL, SAMPLE_RATE) # Inicializa reconocedor
+            from .modelo_vosk import modelo_cargado, obtener_modelo
+            if modelo_cargado():
+                modelo = obtener_modelo()
+            else:
+                # Si no se precargó, la carga no debe bloquear el event loop
+                modelo = await asyncio.get_running_loop().run_in_executor(EXECUTOR, obtener_modelo)
+            # Para PCM a otra frecuencia Kaldi remuestrea internamente (sin proceso extra)
+            self.rec = KaldiRecognizer(modelo, self.rate) # Inicializa reconocedor
             self.rec.SetWords(True)
+            if self.formato in FORMATOS_EN_VIVO:
+                self.decodificador = DecodificadorEnVivo(self.formato, self._encolar)
+                await self.decodificador.iniciar()
         except Exception as e:
-            await self.accept()
-            await self.send(json.dumps({"type":"status","msg":f"Error Vosk: {e}"}))
-            await self.close()
+            await self._liberar_hablante()
+            await self._rechazar(f"Error Vosk: {e}")
             return
 
         await self.channel_layer.group_add(self.group_name, self.channel_name) # Une al grupo
         await self.accept() # Acepta conexión
-        await self.send(json.dumps({"type":"status","msg":"WS conectado"}))
+        await self.send(json.dumps({"type":"status","msg":"WS conectado","formato":self.formato,"rate":self.rate}))
+        self.tarea = asyncio.create_task(self._procesar_cola())
+
+        # Grabar el audio tal como llega (se usa como grabación de la reunión)
+        if settings.STT_GRABAR_AUDIO:
+            try:
+                self.grabacion, cabecera = await _en_hilo(grabacion_en_vivo.iniciar_grabacion)(
+                    self.reunion_id, self.formato, self.rate
+                )
+                self.buffer_grabacion += cabecera
+            except Exception as e:
+                logger.error("No se pudo iniciar la grabación de la reunión %s: %s", self.reunion_id, e)
+                self.grabacion = None
+
+    async def _rechazar(self, msg, code=None): # Informa el motivo y cierra
+        await self.accept()
+        await self.send(json.dumps({"type":"status","msg":msg}))
+        await self.close(code=code)
+
+    async def _liberar_hablante(self): # Suelta el bloqueo solo si es nuestro
+        if not self.es_hablante:
+            return
+        self.es_hablante = False
+        clave = grabacion_en_vivo.clave_hablante(self.reunion_id)
+        if await cache.aget(clave) == self.channel_name:
+            await cache.adelete(clave)
 
     async def receive(self, text_data=None, bytes_data=None): # Recibe datos (audio)
         if not self.rec or not bytes_data:
             return
+        ahora = time.monotonic()
+        if ahora - self.ultima_renovacion > HABLANTE_RENOVAR_CADA:
+            self.ultima_renovacion = ahora
+            await cache.atouch(grabacion_en_vivo.clave_hablante(self.reunion_id), HABLANTE_TTL)
+
+        if self.grabacion:
+            await self._grabar(bytes_data)
+
+        if self.decodificador:
+            # Audio comprimido: FFmpeg lo decodifica y _encolar recibe el PCM
+            await self.decodificador.escribir(bytes_data, ahora)
+        else:
+            await self._encolar(bytes_data, ahora)
+
+    async def _encolar(self, bytes_data, ahora):
+        # Cola acotada: si está llena se descarta el frame y se avisa al cliente
+        try:
+            self.cola.put_nowait((bytes_data, ahora))
+        except asyncio.QueueFull:
+            self.metricas.descartados += 1
+            if ahora - self.ultimo_aviso > 1.0:  # Máximo un aviso por segundo
+                self.ultimo_aviso = ahora
+                await self._control("descartando", descartados=self.metricas.descartados)
+            return
+        profundidad = self.cola.qsize()
+        self.metricas.registrar_frame(profundidad)
+        if not self.pausado and profundidad >= self.cola.maxsize * 0.75:
+            self.pausado = True
+            await self._control("pausar", cola=profundidad)
+
+    async def _grabar(self, bytes_data):
+        """
+        Acumula el audio y sube una parte cada TAMANO_PARTE_MIN bytes. Entre partes,
+        cada STT_RESPALDO_S guarda lo nuevo como tramo corto para no perderlo si la
+        conexión se cae. Las escrituras van de a una y en orden.
+        """
+        self.buffer_grabacion += bytes_data
+        if len(self.buffer_grabacion) >= TAMANO_PARTE_MIN:
+            if self.subida:
+                await self.subida  # La escritura anterior aún no termina
+            parte = bytes(self.buffer_grabacion)
+            self.buffer_grabacion.clear()
+            self.respaldado = 0
+            self.ultimo_respaldo = time.monotonic()
+            self.subida = asyncio.create_task(_en_hilo(grabacion_en_vivo.subir_parte)(self.grabacion.pk, parte))
+            return
+
+        if time.monotonic() - self.ultimo_respaldo < settings.STT_RESPALDO_S:
+            return
+        if self.subida and not self.subida.done():
+            return  # Se reintenta con el próximo frame
+        tramo = bytes(self.buffer_grabacion[self.respaldado:])
+        self.respaldado = len(self.buffer_grabacion)
+        self.ultimo_respaldo = time.monotonic()
+        self.subida = asyncio.create_task(_en_hilo(grabacion_en_vivo.guardar_respaldo)(self.grabacion.pk, tramo))
+
+    async def _cerrar_grabacion(self):
+        """Sube el resto del audio, completa el objeto y, si la reunión ya terminó, lo pasa al acta."""
+        grabacion, self.grabacion = self.grabacion, None
+        try:
+            if self.subida:
+                await self.subida
+            await _en_hilo(grabacion_en_vivo.completar_grabacion)(grabacion.pk, bytes(self.buffer_grabacion))
+            if await _reunion_realizada(self.reunion_id):
+                await _en_hilo(grabacion_en_vivo.consolidar_en_acta)(grabacion.acta_id)
+        except Exception as e:
+            logger.error("Error cerrando la grabación %s: %s", grabacion.archivo, e)
+        self.buffer_grabacion.clear()
+        self.respaldado = 0
+
+    async def _control(self, accion, **datos): # Señal de control de flujo al cliente
+        await self.send(json.dumps({"type":"control", "accion":accion, **datos}))
+
+    async def _procesar_cola(self):
+        """
+        Único consumidor de la cola de la sesión (mantiene el orden). Junta los
+        frames pequeños en bloques de STT_BLOQUE_MIN_BYTES..STT_BLOQUE_MAX_BYTES
+        antes de llamar a AcceptWaveform.
+        """
+        pendiente = bytearray()
+        llegada = None  # Llegada del último frame incluido en el bloque
+        ultimo_reporte = time.monotonic()
+        while True:
+            try:
+                # Con audio pendiente no se espera más de STT_ESPERA_MAX_MS por el siguiente frame
+                espera = settings.STT_ESPERA_MAX_MS / 1000 if pendiente else None
+                data, llegada = await asyncio.wait_for(self.cola.get(), espera)
+                pendiente += data
+                while len(pendiente) < settings.STT_BLOQUE_MAX_BYTES * self.escala and not self.cola.empty():
+                    data, llegada = self.cola.get_nowait()
+                    pendiente += data
+                if len(pendiente) < settings.STT_BLOQUE_MIN_BYTES * self.escala:
+                    continue
+            except asyncio.TimeoutError:
+                pass
+
+            bloque = bytes(pendiente)
+            pendiente.clear()
+            try:
+                await self._reconocer(bloque, llegada)
+            except Exception as e:
+                logger.error("Error en reconocimiento STT (reunión %s): %s", self.reunion_id, e)
+
+            # Cola bajo la mitad: el cliente puede retomar el ritmo normal
+            if self.pausado and self.cola.qsize() <= self.cola.maxsize // 2:
+                self.pausado = False
+                await self._control("reanudar")
+
+            ahora = time.monotonic()
+            if ahora - ultimo_reporte >= settings.STT_METRICAS_CADA_S:
+                ultimo_reporte = ahora
+                await self.send(json.dumps({"type":"metricas", **self.metricas.resumen(self.cola.qsize())}))
+
+    async def _reconocer(self, bloque, llegada): # Pasa un bloque al reconocedor
         loop = asyncio.get_running_loop()
         # Procesa el audio en un hilo separado para no bloquear
-        accepted = await loop.run_in_executor(EXECUTOR, self.rec.AcceptWaveform, bytes_data)
+        self.metricas.llamadas += 1
+        accepted = await loop.run_in_executor(EXECUTOR, self.rec.AcceptWaveform, bloque)
         if accepted:
             data = json.loads(self.rec.Result())
             txt  = (data.get("text") or "").strip()
             if txt and txt != self.last_final:        # anti-duplicado
                 self.last_final = txt
+                self.metricas.latencias_ms.append(int((time.monotonic() - llegada) * 1000))
+                if self.grabacion:
+                    await database_sync_to_async(grabacion_en_vivo.agregar_texto)(self.grabacion.pk, txt)
                 await self.channel_layer.group_send( # Envía resultado final al grupo
                     self.group_name,
                     {"type":"stt_broadcast", "payload":{"type":"final","text":txt}}
                 )
         else:
+            # Parciales limitados a STT_PARCIALES_POR_SEGUNDO y solo si cambió el texto
+            ahora = time.monotonic()
+            ultimo_envio, ultimo_texto = self.ultimo_parcial
+            if ahora - ultimo_envio < 1.0 / settings.STT_PARCIALES_POR_SEGUNDO:
+                return
             parc = json.loads(self.rec.PartialResult()).get("partial","").strip()
-            if parc:
+            if parc and parc != ultimo_texto:
+                self.ultimo_parcial = (ahora, parc)
                 await self.send(json.dumps({"type":"partial","text":parc})) # Envía parcial al cliente
 
     async def disconnect(self, code): # Desconexión
         # No vuelvas a enviar FinalResult aquí; solo cierra
+        if self.decodificador:
+            await self.decodificador.cerrar()
+        if self.tarea:
+            self.tarea.cancel()
+            logger.info("Sesión STT reunión %s finalizada: %s", self.reunion_id, self.metricas.resumen(self.cola.qsize()))
+        if self.grabacion:
+            await self._cerrar_grabacion()
+        await self._liberar_hablante()
+        self.rec = None
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def stt_broadcast(self, event): # Envía mensaje a clientes
-        await self.send(json.dumps(event["payload"]))
\ No newline at end of file
+        await self.send(json.dumps(event["payload"]))
+
+    async def stt_finalizar(self, event): # La reunión terminó (finalizar_reunion)
+        await self.send(json.dumps({"type":"status","msg":"Reunión finalizada"}))
+        await self.close()
+
+
+class OyenteConsumer(AsyncWebsocketConsumer):
+    """
+    Conexión de solo lectura para ver los subtítulos en vivo: se une al grupo
+    de la reunión y recibe los stt_broadcast, sin crear reconocedor.
+    """
+    async def connect(self):
+        self.reunion_id = self.scope["url_route"]["kwargs"]["reunion_id"]
+        self.group_name = f"reunion-{self.reunion_id}"
+
+        if not await _puede(self.scope.get("user"), "actas", "view"):
+            await self.close(code=4003)
+            return
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send(json.dumps({"type":"status","msg":"WS conectado (oyente)"}))
+
+    async def receive(self, text_data=None, bytes_data=None): # Los oyentes no envían audio
+        return
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def stt_broadcast(self, event):
+        await self.send(json.dumps(event["payload"]))
+
+@database_sync_to_async
+def _estado_actual(acta_pk):
+    from .estado_acta import estado_acta
+    from .models import Acta
+    acta = Acta.objects.filter(pk=acta_pk).first()
+    return estado_acta(acta) if acta else None
+
+
+class EstadoActaConsumer(AsyncWebsocketConsumer):
+    """
+    Estado de la transcripción de un acta. Al conectar envía el estado actual
+    y luego cada evento que la tarea publica en el grupo del acta.
+    """
+    async def connect(self):
+        from .estado_acta import grupo_acta
+
+        self.acta_pk = self.scope["url_route"]["kwargs"]["reunion_id"]  # El acta usa el pk de la reunión
+        self.group_name = grupo_acta(self.acta_pk)
+
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated:
+            await self.close(code=4003)
+            return
+
+        # Primero el grupo y después el estado actual: no se pierde un evento entre ambos
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        datos = await _estado_actual(self.acta_pk)
+        if datos:
+            await self.send(json.dumps(datos))
+
+    async def receive(self, text_data=None, bytes_data=None): # Solo lectura
+        return
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def acta_estado(self, event):
+        await self.send(json.dumps(event["payload"]))
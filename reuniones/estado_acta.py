@@ -0,0 +1,51 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Estado de la transcripción de un acta y su publicación por
+               WebSocket. La tarea de Celery envía cada cambio de estado y cada
+               checkpoint al grupo del acta; la página de detalle se suscribe
+               al grupo en vez de consultar get_acta_estado cada pocos segundos.
+--------------------------------------------------------------------------------
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from .models import Acta, TrabajoTranscripcion
+
+logger = logging.getLogger(__name__)
+
+
+def grupo_acta(acta_pk): # Grupo de channels de los suscritos al estado del acta
+    return f"acta-{acta_pk}"
+
+
+def estado_acta(acta, trabajo=None):
+    """Estado, avance y tiempo restante de la transcripción (mismo formato que get_acta_estado)."""
+    datos = {
+        "estado": acta.estado_transcripcion,
+        "estado_display": acta.get_estado_transcripcion_display(),
+        "progreso": None,
+        "eta_segundos": None,
+    }
+    # Avance y tiempo restante estimado (solo mientras se procesa)
+    if acta.estado_transcripcion == Acta.ESTADO_PROCESANDO:
+        if trabajo is None:
+            trabajo = TrabajoTranscripcion.objects.filter(acta=acta).first()
+        if trabajo:
+            datos["progreso"] = trabajo.progreso()
+            datos["eta_segundos"] = trabajo.eta_segundos()
+    return datos
+
+
+def publicar_estado_acta(acta, trabajo=None):
+    """Envía el estado actual al grupo del acta. Un fallo del channel layer no detiene la tarea."""
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            grupo_acta(acta.pk),
+            {"type": "acta_estado", "payload": estado_acta(acta, trabajo)},
+        )
+    except Exception as e:
+        logger.warning(f"No se pudo publicar el estado del acta {acta.pk}: {e}")
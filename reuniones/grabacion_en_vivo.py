@@ -0,0 +1,201 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Grabación de la reunión a partir del audio de la transcripción
+               en vivo. El audio que llega al STTConsumer se sube por partes al
+               almacenamiento y los textos finales se acumulan, de modo que al
+               finalizar la reunión el acta ya tiene su audio y su borrador sin
+               una segunda subida ni una segunda transcripción. Mientras no se
+               junta una parte de 5 MB, el audio se guarda cada pocos segundos
+               en tramos cortos para no perderlo si se cae la conexión.
+--------------------------------------------------------------------------------
+"""
+import logging
+import struct
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from .almacenamiento import EscritorMultipart
+from .estado_acta import publicar_estado_acta
+from .models import Acta, GrabacionEnVivo, Reunion
+from .tasks import encolar_compresion_audio
+
+logger = logging.getLogger(__name__)
+
+BORRADOR_INICIAL = "Borrador del acta..."  # Valor por defecto de Acta.contenido
+CONTENT_TYPES = {"webm": "audio/webm", "ogg": "audio/ogg", "wav": "audio/wav"}
+
+
+def clave_hablante(reunion_id): # Clave en caché del hablante activo de la reunión (canal WS)
+    return f"stt-hablante-{reunion_id}"
+
+
+def cabecera_wav_streaming(rate, canales=1, bits=16):
+    """
+    Cabecera WAV para un archivo cuyo largo aún no se conoce: los tamaños van
+    en 0xFFFFFFFF (FFmpeg lo lee hasta el final del archivo).
+    """
+    bloque = canales * bits // 8
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, canales, rate, rate * bloque, bloque, bits)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def _escritor(grabacion):
+    return EscritorMultipart(
+        default_storage, grabacion.archivo, CONTENT_TYPES[grabacion.formato],
+        upload_id=grabacion.upload_id, partes=grabacion.partes,
+    )
+
+
+def iniciar_grabacion(reunion_id, formato, rate):
+    """
+    Crea la grabación de la sesión e inicia la subida multipart.
+    Devuelve (grabacion, bytes iniciales a escribir antes del audio).
+    """
+    reunion = Reunion.objects.get(pk=reunion_id)
+    acta, _ = Acta.objects.get_or_create(reunion=reunion)
+    extension = formato if formato in ("webm", "ogg") else "wav"
+
+    nombre = f"audios_reuniones/en_vivo/reunion-{reunion_id}-{timezone.now():%Y%m%d-%H%M%S}.{extension}"
+    escritor = EscritorMultipart(default_storage, nombre, CONTENT_TYPES[extension])
+    escritor.iniciar()
+
+    grabacion = GrabacionEnVivo.objects.create(
+        acta=acta, archivo=escritor.nombre, formato=extension, upload_id=escritor.upload_id,
+    )
+    cabecera = cabecera_wav_streaming(rate) if extension == "wav" else b""
+    return grabacion, cabecera
+
+
+def guardar_respaldo(grabacion_pk, data):
+    """
+    Guarda como objeto aparte el audio recibido desde el último respaldo. Si la
+    conexión o el proceso mueren antes de la siguiente parte, completar_grabacion
+    los junta como parte final.
+    """
+    try:
+        grabacion = GrabacionEnVivo.objects.get(pk=grabacion_pk)
+        nombre = default_storage.save(
+            f"{grabacion.archivo}.respaldo-{len(grabacion.respaldos) + 1:05d}", ContentFile(data),
+        )
+        GrabacionEnVivo.objects.filter(pk=grabacion_pk).update(respaldos=grabacion.respaldos + [nombre])
+    except Exception as e:  # El audio sigue en memoria: la grabación continúa aunque falle el respaldo
+        logger.error(f"No se pudo guardar el respaldo de la grabación {grabacion_pk}: {e}")
+
+
+def _borrar_respaldos(nombres):
+    for nombre in nombres:
+        try:
+            default_storage.delete(nombre)
+        except Exception as e:
+            logger.warning(f"No se pudo borrar el respaldo {nombre}: {e}")
+
+
+def subir_parte(grabacion_pk, data):
+    """Sube una parte (>= 5 MB) y guarda el avance. La parte incluye el audio de los respaldos vigentes."""
+    grabacion = GrabacionEnVivo.objects.get(pk=grabacion_pk)
+    escritor = _escritor(grabacion)
+    escritor.subir_parte(data)
+    GrabacionEnVivo.objects.filter(pk=grabacion_pk).update(
+        partes=escritor.partes, bytes_subidos=F("bytes_subidos") + len(data), respaldos=[],
+    )
+    _borrar_respaldos(grabacion.respaldos)
+
+
+def _leer_respaldos(nombres): # Audio de los tramos guardados, en orden
+    datos = bytearray()
+    for nombre in nombres:
+        with default_storage.open(nombre, "rb") as f:
+            datos += f.read()
+    return bytes(datos)
+
+
+def agregar_texto(grabacion_pk, texto): # Agrega un segmento final (UPDATE atómico)
+    GrabacionEnVivo.objects.filter(pk=grabacion_pk).update(texto=Concat("texto", Value(texto + "\n")))
+
+
+def completar_grabacion(grabacion_pk, ultima_parte=None):
+    """
+    Sube el resto del audio y cierra la subida multipart. Sin 'ultima_parte'
+    (la conexión no alcanzó a cerrarla) se usan los respaldos guardados.
+    """
+    grabacion = GrabacionEnVivo.objects.get(pk=grabacion_pk)
+    if grabacion.estado != GrabacionEnVivo.ESTADO_ACTIVA:
+        return grabacion
+
+    escritor = _escritor(grabacion)
+    try:
+        if ultima_parte is None:
+            ultima_parte = _leer_respaldos(grabacion.respaldos)
+        if ultima_parte:
+            escritor.subir_parte(ultima_parte)
+            grabacion.bytes_subidos += len(ultima_parte)
+        if escritor.partes:
+            escritor.completar()
+            grabacion.estado = GrabacionEnVivo.ESTADO_COMPLETADA
+        else:
+            escritor.abortar()  # Sesión sin audio
+            grabacion.estado = GrabacionEnVivo.ESTADO_ABORTADA
+    except Exception as e:
+        logger.error(f"No se pudo completar la grabación {grabacion.archivo}: {e}")
+        escritor.abortar()
+        grabacion.estado = GrabacionEnVivo.ESTADO_ABORTADA
+
+    _borrar_respaldos(grabacion.respaldos)
+    grabacion.respaldos = []
+    grabacion.partes = escritor.partes
+    grabacion.finalizada = timezone.now()
+    grabacion.save()
+    return grabacion
+
+
+def consolidar_en_acta(acta_pk):
+    """
+    Copia al acta el audio y el texto de las grabaciones en vivo terminadas.
+    No hace nada mientras quede una sesión grabando ni si el acta ya está
+    aprobada, y no reemplaza un audio que el acta ya tenga.
+    """
+    with transaction.atomic():
+        acta = Acta.objects.select_for_update().get(pk=acta_pk)
+        grabaciones = list(acta.grabaciones_en_vivo.filter(incorporada=False).exclude(estado=GrabacionEnVivo.ESTADO_ABORTADA))
+        if not grabaciones or any(g.estado == GrabacionEnVivo.ESTADO_ACTIVA for g in grabaciones):
+            return False
+        if acta.aprobada:  # El acta oficial no se toca: las grabaciones quedan disponibles sin incorporar
+            logger.warning(f"Acta {acta_pk} aprobada: no se incorporan {len(grabaciones)} grabaciones en vivo")
+            return False
+
+        texto = "\n".join(g.texto.strip() for g in grabaciones if g.texto.strip())
+        if texto:
+            actual = (acta.contenido or "").strip()
+            acta.contenido = texto if actual in ("", BORRADOR_INICIAL) else f"{actual}\n{texto}"
+            previo = acta.transcripcion_automatica.strip() if actual not in ("", BORRADOR_INICIAL) else ""
+            acta.transcripcion_automatica = f"{previo}\n{texto}".strip()
+
+        # Si hubo reconexiones queda cada sesión guardada; el acta usa la más larga
+        principal = max(grabaciones, key=lambda g: g.bytes_subidos)
+        audio_nuevo = not acta.archivo_audio
+        if audio_nuevo:
+            acta.archivo_audio.name = principal.archivo
+            acta.huella_audio = ""  # La huella anterior correspondía a otro audio
+            acta.estado_transcripcion = Acta.ESTADO_COMPLETADO
+        else:  # Audio subido antes o sesión previa ya incorporada: se conserva
+            logger.info(f"Acta {acta_pk} ya tiene audio; la grabación en vivo queda en {principal.archivo}")
+        acta.save()
+
+        GrabacionEnVivo.objects.filter(pk__in=[g.pk for g in grabaciones]).update(incorporada=True)
+
+    publicar_estado_acta(acta)
+    if audio_nuevo:
+        encolar_compresion_audio(acta)
+    if len(grabaciones) > 1:
+        logger.info(f"Acta {acta_pk}: {len(grabaciones)} sesiones en vivo; audio principal {principal.archivo}")
+    return True
@@ -0,0 +1,167 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Almacenamiento compacto de las palabras transcritas con sus
+               tiempos y un índice invertido sobre ellas. Permite buscar una
+               palabra o frase en todas las actas y saltar al segundo exacto de
+               la grabación sin cargar ni recorrer las transcripciones completas.
+--------------------------------------------------------------------------------
+"""
+import re
+import unicodedata
+
+import numpy as np
+from django.db import transaction
+
+from .models import IndicePalabra, PalabrasActa
+
+_NO_LETRAS = re.compile(r"[^a-z0-9ñ]+")
+MAX_TERMINO = 64  # Largo de IndicePalabra.termino
+
+
+def normalizar(palabra):
+    """Minúsculas y sin tildes ('Presupuésto' -> 'presupuesto'); conserva la ñ."""
+    palabra = palabra.lower().replace("ñ", "\0")
+    sin_tildes = "".join(c for c in unicodedata.normalize("NFKD", palabra) if not unicodedata.combining(c))
+    return _NO_LETRAS.sub("", sin_tildes.replace("\0", "ñ"))[:MAX_TERMINO]
+
+
+def terminos(texto): # Términos normalizados de una consulta
+    return [t for t in (normalizar(p) for p in texto.split()) if t]
+
+
+# ---------------------------
+# Formato compacto
+# ---------------------------
+
+def _a_bytes(valores, tipo):
+    return np.asarray(valores, dtype=tipo).tobytes()
+
+
+def _desde_bytes(datos, tipo):
+    return np.frombuffer(bytes(datos or b""), dtype=tipo)
+
+
+def cargar_palabras(registro, desde_s=None, hasta_s=None):
+    """Devuelve las palabras de un PalabrasActa como dicts, opcionalmente solo de un rango de tiempo."""
+    inicios = _desde_bytes(registro.inicios_ms, "<u4")
+    ids = _desde_bytes(registro.ids, "<u4")
+    duraciones = _desde_bytes(registro.duraciones_ms, "<u2")
+    confianzas = _desde_bytes(registro.confianzas, "u1")
+    vocabulario = registro.vocabulario.split("\n")
+
+    # Los inicios están ordenados: el rango se ubica por búsqueda binaria
+    a = 0 if desde_s is None else int(np.searchsorted(inicios, desde_s * 1000, side="left"))
+    b = len(inicios) if hasta_s is None else int(np.searchsorted(inicios, hasta_s * 1000, side="right"))
+    return [
+        {
+            "word": vocabulario[ids[i]],
+            "start": inicios[i] / 1000,
+            "end": (int(inicios[i]) + int(duraciones[i])) / 1000,
+            "conf": round(confianzas[i] / 255, 3),
+        }
+        for i in range(a, b)
+    ]
+
+
+# ---------------------------
+# Indexación
+# ---------------------------
+
+def indexar_acta(acta, palabras):
+    """
+    Guarda las palabras del acta (lista de dicts word/start/end/conf) en
+    formato compacto y reconstruye sus entradas del índice invertido.
+    """
+    palabras = sorted((p for p in palabras if p.get("word")), key=lambda p: p["start"])
+
+    vocabulario, ids = {}, []
+    for p in palabras:
+        ids.append(vocabulario.setdefault(p["word"], len(vocabulario)))
+    inicios = [int(round(p["start"] * 1000)) for p in palabras]
+    duraciones = [min(65535, max(0, int(round((p["end"] - p["start"]) * 1000)))) for p in palabras]
+    confianzas = [int(round(min(1.0, max(0.0, p.get("conf", 1.0))) * 255)) for p in palabras]
+
+    # Posiciones de cada término normalizado (varias formas pueden dar el mismo término)
+    apariciones = {}
+    for posicion, p in enumerate(palabras):
+        termino = normalizar(p["word"])
+        if termino:
+            apariciones.setdefault(termino, []).append(posicion)
+
+    with transaction.atomic():
+        PalabrasActa.objects.update_or_create(
+            acta=acta,
+            defaults={
+                "archivo": acta.archivo_audio.name or "",
+                "vocabulario": "\n".join(vocabulario),
+                "ids": _a_bytes(ids, "<u4"),
+                "inicios_ms": _a_bytes(inicios, "<u4"),
+                "duraciones_ms": _a_bytes(duraciones, "<u2"),
+                "confianzas": _a_bytes(confianzas, "u1"),
+                "total": len(palabras),
+            },
+        )
+        IndicePalabra.objects.filter(acta=acta).delete()
+        IndicePalabra.objects.bulk_create(
+            [
+                IndicePalabra(
+                    termino=termino,
+                    acta=acta,
+                    frecuencia=len(posiciones),
+                    posiciones=_a_bytes(posiciones, "<u4"),
+                    inicios_ms=_a_bytes([inicios[i] for i in posiciones], "<u4"),
+                )
+                for termino, posiciones in apariciones.items()
+            ],
+            batch_size=1000,
+        )
+
+
+# ---------------------------
+# Búsqueda
+# ---------------------------
+
+def coincidencias_frase(entradas):
+    """
+    Dadas las entradas del índice de cada término de la frase (misma acta y en
+    orden), devuelve los segundos donde la frase aparece completa y seguida.
+    """
+    inicio = _desde_bytes(entradas[0].posiciones, "<u4").astype(np.int64)
+    validas = inicio
+    for desplazamiento, entrada in enumerate(entradas[1:], start=1):
+        siguientes = _desde_bytes(entrada.posiciones, "<u4").astype(np.int64) - desplazamiento
+        validas = np.intersect1d(validas, siguientes, assume_unique=True)
+        if len(validas) == 0:
+            return []
+    inicios = _desde_bytes(entradas[0].inicios_ms, "<u4")
+    indices = np.searchsorted(inicio, validas)
+    return [int(ms) / 1000 for ms in inicios[indices]]
+
+
+def buscar(consulta, actas=None):
+    """
+    Busca la palabra o frase en el índice. Devuelve {acta_id: [segundos...]}
+    solo con las actas donde aparece. 'actas' permite restringir a un queryset.
+    """
+    lista = terminos(consulta)
+    if not lista:
+        return {}
+
+    qs = IndicePalabra.objects.filter(termino__in=set(lista))
+    if actas is not None:
+        qs = qs.filter(acta__in=actas)
+
+    por_acta = {}
+    for entrada in qs.only("termino", "acta_id", "posiciones", "inicios_ms"):
+        por_acta.setdefault(entrada.acta_id, {})[entrada.termino] = entrada
+
+    resultados = {}
+    for acta_id, entradas in por_acta.items():
+        if any(t not in entradas for t in lista):
+            continue  # Falta algún término en esta acta
+        segundos = coincidencias_frase([entradas[t] for t in lista])
+        if segundos:
+            resultados[acta_id] = segundos
+    return resultados
@@ -0,0 +1,95 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Comando de benchmark de la transcripción offline. Transcribe un
+               WAV normalizado (16 kHz, mono, PCM 16 bits) en modo secuencial y
+               en modo paralelo por segmentos, reportando el factor de tiempo
+               real (RTF) de cada modo y si los textos coinciden.
+--------------------------------------------------------------------------------
+"""
+import os  # Para contar núcleos disponibles
+import time  # Para medir tiempos
+import wave  # Para leer el archivo WAV
+
+from django.conf import settings  # Configuración del proyecto
+from django.core.management.base import BaseCommand, CommandError  # Base de comandos
+
+from reuniones.modelo_vosk import estadisticas, precargar_modelo
+from reuniones.transcripcion import (
+    SAMPLE_RATE, leer_bloques_wav, transcribir_bloques, transcribir_en_paralelo,
+)
+
+
+class Command(BaseCommand):
+    help = "Mide el RTF de la transcripción secuencial vs. paralela con el modelo Vosk del proyecto."
+
+    def add_arguments(self, parser):
+        parser.add_argument("wav", help="WAV 16 kHz mono PCM16 (ej: salida de ffmpeg -ar 16000 -ac 1)")
+        parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1, help="Procesos del modo paralelo")
+        parser.add_argument("--segmento", type=int, default=settings.TRANSCRIPCION_SEGMENTO_SEGUNDOS,
+                            help="Duración objetivo de cada segmento (segundos)")
+        parser.add_argument("--solo-paralelo", action="store_true", help="Omite la pasada secuencial")
+
+    def _abrir_wav(self, ruta): # Valida el formato del WAV de entrada
+        try:
+            wf = wave.open(ruta, "rb")
+        except (OSError, wave.Error) as e:
+            raise CommandError(f"No se pudo abrir {ruta}: {e}")
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != SAMPLE_RATE:
+            wf.close()
+            raise CommandError("El WAV debe ser mono, 16 bits y 16 kHz.")
+        return wf
+
+    def _medir(self, etiqueta, funcion): # Ejecuta una pasada y calcula su RTF
+        inicio = time.perf_counter()
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        rtf = duracion / resultado["segundos"] if resultado["segundos"] else 0.0
+        self.stdout.write(
+            f"{etiqueta:<12} tiempo={duracion:8.2f}s  audio={resultado['segundos']:8.2f}s  RTF={rtf:.3f}"
+        )
+        return resultado, duracion
+
+    def handle(self, *args, **options):
+        from vosk import SetLogLevel
+
+        SetLogLevel(-1)
+        ruta_modelo = settings.MODEL_PATH
+        try:
+            modelo = precargar_modelo()
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+        datos = estadisticas()
+        self.stdout.write(
+            f"Modelo cargado en {datos['segundos_carga']:.2f}s ({ruta_modelo}), "
+            f"RSS {datos['rss_antes_mb'] or 0:.0f} MB -> {datos['rss_despues_mb'] or 0:.0f} MB"
+        )
+
+        secuencial = None
+        if not options["solo_paralelo"]:
+            with self._abrir_wav(options["wav"]) as wf:
+                secuencial, t_seq = self._medir(
+                    "secuencial", lambda: transcribir_bloques(modelo, leer_bloques_wav(wf))
+                )
+
+        with self._abrir_wav(options["wav"]) as wf:
+            paralelo, t_par = self._medir(
+                f"paralelo x{options['procesos']}",
+                lambda: transcribir_en_paralelo(
+                    modelo, ruta_modelo, leer_bloques_wav(wf), options["procesos"], options["segmento"]
+                ),
+            )
+
+        if secuencial is not None:
+            self.stdout.write(f"Aceleración: {t_seq / t_par:.2f}x")
+            palabras_seq = secuencial["texto"].split()
+            palabras_par = paralelo["texto"].split()
+            if palabras_seq == palabras_par:
+                self.stdout.write(self.style.SUCCESS("Los textos coinciden."))
+            else:
+                distintas = sum(a != b for a, b in zip(palabras_seq, palabras_par))
+                distintas += abs(len(palabras_seq) - len(palabras_par))
+                self.stdout.write(self.style.WARNING(
+                    f"Los textos difieren en ~{distintas} de {len(palabras_seq)} palabras."
+                ))
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoTranscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(help_text='Audio al que corresponde este checkpoint', max_length=255)),
+                ('bytes_pcm', models.BigIntegerField(default=0)),
+                ('bytes_entrada', models.BigIntegerField(default=0)),
+                ('bytes_totales', models.BigIntegerField(default=0, help_text='Tamaño del archivo original')),
+                ('segundos_audio', models.FloatField(default=0.0)),
+                ('segundos_proceso', models.FloatField(default=0.0)),
+                ('iniciado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('finalizado', models.DateTimeField(blank=True, null=True)),
+                ('acta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trabajo_transcripcion', to='reuniones.acta')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['finalizado'], name='reuniones_t_finaliz_97357b_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TramoTranscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bytes_pcm', models.BigIntegerField(help_text='Checkpoint en el que termina el tramo')),
+                ('texto', models.TextField(blank=True, default='')),
+                ('palabras', models.JSONField(blank=True, default=list, help_text='Palabras con marcas de tiempo')),
+                ('trabajo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tramos', to='reuniones.trabajotranscripcion')),
+            ],
+            options={
+                'ordering': ['bytes_pcm'],
+                'constraints': [models.UniqueConstraint(fields=('trabajo', 'bytes_pcm'), name='tramo_transcripcion_unico')],
+            },
+        ),
+    ]
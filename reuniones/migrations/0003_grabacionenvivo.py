@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0002_trabajotranscripcion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GrabacionEnVivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(help_text='Nombre del objeto en el almacenamiento', max_length=255)),
+                ('formato', models.CharField(help_text='webm, ogg o wav', max_length=10)),
+                ('upload_id', models.CharField(blank=True, default='', max_length=255)),
+                ('partes', models.JSONField(blank=True, default=list)),
+                ('respaldos', models.JSONField(blank=True, default=list)),
+                ('bytes_subidos', models.BigIntegerField(default=0)),
+                ('texto', models.TextField(blank=True, default='', help_text='Segmentos finales reconocidos en vivo')),
+                ('estado', models.CharField(choices=[('ACTIVA', 'Grabando'), ('COMPLETADA', 'Completada'), ('ABORTADA', 'Abortada')], default='ACTIVA', max_length=12)),
+                ('incorporada', models.BooleanField(default=False, help_text='Ya se copió al acta')),
+                ('iniciada', models.DateTimeField(auto_now_add=True)),
+                ('finalizada', models.DateTimeField(blank=True, null=True)),
+                ('acta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grabaciones_en_vivo', to='reuniones.acta')),
+            ],
+            options={
+                'ordering': ['iniciada'],
+                'indexes': [models.Index(fields=['acta', 'estado'], name='reuniones_g_acta_id_d960dc_idx')],
+            },
+        ),
+    ]
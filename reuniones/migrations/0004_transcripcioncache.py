@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0003_grabacionenvivo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='acta',
+            name='huella_audio',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='TranscripcionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('huella', models.CharField(help_text='SHA-256 del archivo de audio', max_length=64)),
+                ('version_modelo', models.CharField(max_length=100)),
+                ('firma_filtros', models.CharField(max_length=255)),
+                ('texto', models.TextField(blank=True, default='')),
+                ('palabras', models.JSONField(blank=True, default=list)),
+                ('segundos_audio', models.FloatField(default=0.0)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('ultimo_uso', models.DateTimeField(auto_now_add=True)),
+                ('usos', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ultimo_uso'], name='reuniones_t_ultimo__fd132e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('huella', 'version_modelo', 'firma_filtros'), name='transcripcion_cache_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0004_transcripcioncache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PalabrasActa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(blank=True, default='', help_text='Audio al que corresponden los tiempos', max_length=255)),
+                ('vocabulario', models.TextField(blank=True, default='', help_text='Palabras distintas, una por línea')),
+                ('ids', models.BinaryField(default=b'')),
+                ('inicios_ms', models.BinaryField(default=b'')),
+                ('duraciones_ms', models.BinaryField(default=b'')),
+                ('confianzas', models.BinaryField(default=b'')),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('acta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='palabras', to='reuniones.acta')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IndicePalabra',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(help_text='Palabra normalizada (minúsculas, sin tildes)', max_length=64)),
+                ('frecuencia', models.PositiveIntegerField(default=0)),
+                ('posiciones', models.BinaryField(default=b'', help_text='uint32: posición de cada aparición en el acta')),
+                ('inicios_ms', models.BinaryField(default=b'', help_text='uint32: segundo exacto (ms) de cada aparición')),
+                ('acta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indice_palabras', to='reuniones.acta')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('termino', 'acta'), name='indice_palabra_unico')],
+            },
+        ),
+    ]
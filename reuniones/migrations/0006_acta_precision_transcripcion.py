@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0005_palabras_indice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='acta',
+            name='errores_transcripcion',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='acta',
+            name='palabras_referencia',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='acta',
+            name='precision_transcripcion',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='acta',
+            name='transcripcion_automatica',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
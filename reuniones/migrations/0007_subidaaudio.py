@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0006_acta_precision_transcripcion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaAudio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_original', models.CharField(max_length=255)),
+                ('archivo', models.CharField(help_text='Nombre del objeto en el almacenamiento', max_length=255)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('tamano', models.BigIntegerField(help_text='Tamaño total declarado (bytes)')),
+                ('tamano_parte', models.PositiveIntegerField()),
+                ('upload_id', models.CharField(blank=True, default='', max_length=255)),
+                ('partes', models.JSONField(blank=True, default=list)),
+                ('estado', models.CharField(choices=[('INICIADA', 'En curso'), ('COMPLETADA', 'Completada'), ('ABORTADA', 'Abortada')], default='INICIADA', max_length=12)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('actualizada', models.DateTimeField(auto_now=True)),
+                ('acta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas_audio', to='reuniones.acta')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['acta', 'estado'], name='reuniones_s_acta_id_19eee9_idx')],
+            },
+        ),
+    ]
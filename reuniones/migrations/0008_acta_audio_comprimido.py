@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0007_subidaaudio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='acta',
+            name='audio_comprimido',
+            field=models.FileField(blank=True, null=True, upload_to='audios_reuniones/opus/'),
+        ),
+        migrations.AddField(
+            model_name='acta',
+            name='duracion_audio_s',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='acta',
+            name='picos_audio',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
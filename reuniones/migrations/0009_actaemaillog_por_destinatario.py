@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:10
+
+import re
+import uuid
+
+from django.db import migrations, models
+
+SEPARADORES = re.compile(r"[,;\s]+")  # Los envíos antiguos guardaban la lista de correos en un solo texto
+
+
+def separar_destinatarios(apps, schema_editor):
+    """Cada envío antiguo pasa a una fila por destinatario, con su propio lote y marcado como ENVIADO."""
+    ActaEmailLog = apps.get_model("reuniones", "ActaEmailLog")
+    antiguos = list(ActaEmailLog.objects.order_by("pk").values_list(
+        "pk", "acta_id", "enviado_por_id", "destinatario", "fecha_envio",
+    ))
+    for pk, acta_id, enviado_por_id, destinatarios, fecha_envio in antiguos:
+        correos = [c[:254] for c in SEPARADORES.split(destinatarios or "") if c] or [""]
+        lote = uuid.uuid4()
+        historial = {"lote": lote, "estado": "ENVIADO", "actualizado": fecha_envio}
+        ActaEmailLog.objects.filter(pk=pk).update(destinatario=correos[0], **historial)
+        if len(correos) > 1:
+            ActaEmailLog.objects.bulk_create([
+                ActaEmailLog(acta_id=acta_id, enviado_por_id=enviado_por_id, destinatario=c, **historial)
+                for c in correos[1:]
+            ])
+            # fecha_envio es auto_now_add: se devuelve la fecha del envío original
+            ActaEmailLog.objects.filter(lote=lote).update(fecha_envio=fecha_envio)
+
+
+def unir_destinatarios(apps, schema_editor):
+    """Vuelta atrás: una fila por lote con los correos separados por comas."""
+    ActaEmailLog = apps.get_model("reuniones", "ActaEmailLog")
+    lotes = {}
+    for pk, lote, destinatario in ActaEmailLog.objects.order_by("pk").values_list("pk", "lote", "destinatario"):
+        lotes.setdefault(lote, []).append((pk, destinatario))
+    for filas in lotes.values():
+        ActaEmailLog.objects.filter(pk=filas[0][0]).update(destinatario=", ".join(d for _, d in filas if d))
+        ActaEmailLog.objects.filter(pk__in=[pk for pk, _ in filas[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0008_acta_audio_comprimido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actaemaillog',
+            name='lote',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, help_text='Envío al que pertenece (id del trabajo)'),
+        ),
+        migrations.AddField(
+            model_name='actaemaillog',
+            name='estado',
+            field=models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ENVIADO', 'Enviado'), ('FALLIDO', 'Fallido')], default='PENDIENTE', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='actaemaillog',
+            name='error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='actaemaillog',
+            name='actualizado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RenameField(
+            model_name='actaemaillog',
+            old_name='destinatarios',
+            new_name='destinatario',
+        ),
+        # Antes de angostar la columna: la lista de correos de cada fila antigua se reparte en filas
+        migrations.RunPython(separar_destinatarios, unir_destinatarios),
+        migrations.AlterField(
+            model_name='actaemaillog',
+            name='destinatario',
+            field=models.CharField(max_length=254),
+        ),
+    ]
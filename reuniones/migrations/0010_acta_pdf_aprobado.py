@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 04:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reuniones', '0009_actaemaillog_por_destinatario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='acta',
+            name='huella_pdf',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='acta',
+            name='pdf_aprobado',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='actas_pdf/'),
+        ),
+    ]
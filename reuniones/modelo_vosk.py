@@ -0,0 +1,106 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Registro único del modelo Vosk por proceso. El modelo se precarga
+               al iniciar el worker de Celery (antes del fork del pool) y el
+               proceso ASGI, de modo que los procesos hijos comparten sus páginas
+               de memoria (copy-on-write) y ninguna petición paga la carga.
+--------------------------------------------------------------------------------
+"""
+import gc
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_modelo = None  # Instancia única del modelo en este proceso
+_lock = threading.Lock()  # Evita cargas simultáneas desde varios hilos
+_estadisticas = {"segundos_carga": None, "rss_antes_mb": None, "rss_despues_mb": None, "pid": None}
+
+
+def ruta_modelo(): # Ruta absoluta del modelo configurado
+    return str(settings.MODEL_PATH)
+
+
+def version_modelo(): # Identifica el modelo en la caché de transcripciones
+    return os.path.basename(os.path.normpath(ruta_modelo()))
+
+
+def memoria_residente_mb():
+    """Memoria residente (RSS) actual del proceso en MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) / 1024  # Valor en kB
+    except OSError:
+        pass
+    try:
+        import resource  # Fallback (macOS/BSD): máximo RSS, no el actual
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except Exception:
+        return None
+
+
+def _cargar():
+    global _modelo
+    ruta = ruta_modelo()
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"Modelo VOSK no encontrado en {ruta}")
+
+    from vosk import Model
+
+    rss_antes = memoria_residente_mb()
+    inicio = time.perf_counter()
+    _modelo = Model(ruta)
+    _estadisticas.update(
+        segundos_carga=time.perf_counter() - inicio,
+        rss_antes_mb=rss_antes,
+        rss_despues_mb=memoria_residente_mb(),
+        pid=os.getpid(),
+    )
+    logger.info(
+        "Modelo Vosk cargado en %.2fs (pid %s, RSS %.0f MB -> %.0f MB)",
+        _estadisticas["segundos_carga"], _estadisticas["pid"],
+        rss_antes or 0, _estadisticas["rss_despues_mb"] or 0,
+    )
+
+
+def obtener_modelo():
+    """Devuelve el modelo del proceso, cargándolo si aún no se precargó."""
+    if _modelo is None:
+        with _lock:
+            if _modelo is None:
+                logger.warning("Modelo Vosk no precargado; se carga bajo demanda (pid %s)", os.getpid())
+                _cargar()
+    return _modelo
+
+
+def precargar_modelo():
+    """
+    Carga el modelo al iniciar el proceso. Llamar antes del fork: después se
+    congela el heap (gc.freeze) para que el recolector de basura no toque los
+    objetos heredados y las páginas compartidas no se copien en cada hijo.
+    """
+    with _lock:
+        if _modelo is None:
+            _cargar()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+    return _modelo
+
+
+def modelo_cargado():
+    return _modelo is not None
+
+
+def estadisticas(): # Datos de la carga y memoria actual (para logs / diagnóstico)
+    datos = dict(_estadisticas)
+    datos["cargado"] = modelo_cargado()
+    datos["rss_actual_mb"] = memoria_residente_mb()
+    return datos
@@ -6,9 +6,11 @@ Descripción:   Modelos de BD para la gestión de Reuniones, Actas, Asistencias
                y Logs. Define estados de reunión y de transcripción de actas.
 --------------------------------------------------------------------------------
 """
+import uuid
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -96,6 +98,28 @@ class Acta(models.Model): # Modelo de Acta
         default=0, 
         help_text="Calificación manual de la precisión (0-100) asignada por la directiva."
     )
+    huella_audio = models.CharField( # SHA-256 del archivo de audio (caché de transcripciones)
+        max_length=64, blank=True, default=""
+    )
+    transcripcion_automatica = models.TextField( # Texto tal como lo entregó el reconocedor
+        blank=True, default=""
+    )
+    palabras_referencia = models.PositiveIntegerField(null=True, blank=True) # Palabras del acta aprobada
+    errores_transcripcion = models.PositiveIntegerField(null=True, blank=True) # Distancia de edición en palabras
+    precision_transcripcion = models.FloatField( # 100 * (1 - WER), medida al aprobar
+        null=True, blank=True
+    )
+    audio_comprimido = models.FileField( # Versión Opus liviana para escuchar/descargar
+        upload_to="audios_reuniones/opus/", null=True, blank=True
+    )
+    picos_audio = models.BinaryField(blank=True, default=b"", editable=False) # Forma de onda (uint8 por tramo)
+    duracion_audio_s = models.FloatField(null=True, blank=True)
+    pdf_aprobado = models.FileField( # PDF oficial ya generado (se sirve sin volver a renderizar)
+        upload_to="actas_pdf/", null=True, blank=True, editable=False
+    )
+    huella_pdf = models.CharField( # SHA-256 del contenido con que se generó pdf_aprobado
+        max_length=64, blank=True, default="", editable=False
+    )
     # --- FIN DE CAMPOS NUEVOS ---
 
     def __str__(self):
@@ -114,14 +138,27 @@ class Asistencia(models.Model): # Modelo de Asistencia
         estado = "Presente" if self.presente else "Ausente"
         return f"{self.vecino.username} - {self.reunion.titulo} ({estado})"
     
-class ActaEmailLog(models.Model): # Log de envío de actas por correo
+class ActaEmailLog(models.Model): # Log de envío de actas por correo (una fila por destinatario)
+    ESTADO_PENDIENTE = "PENDIENTE"
+    ESTADO_ENVIADO = "ENVIADO"
+    ESTADO_FALLIDO = "FALLIDO"
+    ESTADOS = [
+        (ESTADO_PENDIENTE, "Pendiente"),
+        (ESTADO_ENVIADO, "Enviado"),
+        (ESTADO_FALLIDO, "Fallido"),
+    ]
+
     acta = models.ForeignKey("Acta", on_delete=models.CASCADE, related_name="emails_enviados")
-    destinatarios = models.TextField()  
+    lote = models.UUIDField(default=uuid.uuid4, db_index=True, help_text="Envío al que pertenece (id del trabajo)")
+    destinatario = models.CharField(max_length=254)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=ESTADO_PENDIENTE)
+    error = models.CharField(max_length=255, blank=True)
     enviado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     fecha_envio = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(null=True, blank=True)  # Momento del resultado
 
     def __str__(self):
-        return f"Email de acta {self.acta_id} enviado a {self.destinatarios[:50]}..."
+        return f"Email de acta {self.acta_id} a {self.destinatario} ({self.estado})"
 
 class LogConsultaActa(models.Model): # Log transaccional de lectura de actas
     acta = models.ForeignKey(Acta, on_delete=models.CASCADE, related_name="consultas")
@@ -133,4 +170,259 @@ class LogConsultaActa(models.Model): # Log transaccional de lectura de actas
         verbose_name_plural = "Logs de Consultas de Actas"
 
     def __str__(self):
-        return f"{self.vecino.username} consultó {self.acta.reunion.titulo}"
\ No newline at end of file
+        return f"{self.vecino.username} consultó {self.acta.reunion.titulo}"
+
+class TrabajoTranscripcion(models.Model): # Progreso y checkpoint de la transcripción offline
+    acta = models.OneToOneField(Acta, on_delete=models.CASCADE, related_name="trabajo_transcripcion")
+    archivo = models.CharField(max_length=255, help_text="Audio al que corresponde este checkpoint")
+
+    # Posición: bytes PCM ya transcritos (punto de reanudación) y su equivalente en el archivo original
+    bytes_pcm = models.BigIntegerField(default=0)
+    bytes_entrada = models.BigIntegerField(default=0)
+    bytes_totales = models.BigIntegerField(default=0, help_text="Tamaño del archivo original")
+
+    # Los resultados hasta el checkpoint quedan en TramoTranscripcion (una fila por checkpoint)
+
+    # Métricas para calcular el factor de tiempo real (RTF)
+    segundos_audio = models.FloatField(default=0.0)
+    segundos_proceso = models.FloatField(default=0.0)
+
+    iniciado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+    finalizado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["finalizado"]),
+        ]
+
+    def __str__(self):
+        return f"Transcripción acta {self.acta_id} ({self.progreso():.0f}%)"
+
+    @classmethod
+    def rtf_historico(cls, ultimos=20):
+        """RTF medio (segundos de proceso por segundo de audio) de los últimos trabajos terminados."""
+        trabajos = list(
+            cls.objects.filter(finalizado__isnull=False, segundos_audio__gt=0)
+            .order_by("-finalizado")
+            .values_list("segundos_proceso", "segundos_audio", "bytes_totales")[:ultimos]
+        )
+        if not trabajos:
+            return None, None
+        audio = sum(t[1] for t in trabajos)
+        rtf = sum(t[0] for t in trabajos) / audio
+        total_bytes = sum(t[2] for t in trabajos)
+        segundos_por_byte = audio / total_bytes if total_bytes else None
+        return rtf, segundos_por_byte
+
+    def progreso(self): # Porcentaje 0-100 según lo avanzado en el archivo original
+        if self.finalizado:
+            return 100.0
+        if not self.bytes_totales:
+            return 0.0
+        return min(99.0, 100.0 * self.bytes_entrada / self.bytes_totales)
+
+    def eta_segundos(self):
+        """
+        Tiempo restante estimado: audio que falta por el RTF de trabajos
+        anteriores (o el del trabajo actual si aún no hay historial).
+        """
+        if self.finalizado:
+            return 0
+        rtf, segundos_por_byte = self.rtf_historico()
+        if rtf is None and self.segundos_audio > 0:
+            rtf = self.segundos_proceso / self.segundos_audio
+        if rtf is None:
+            return None
+
+        fraccion = self.progreso() / 100.0
+        if fraccion > 0 and self.segundos_audio > 0:
+            duracion_total = self.segundos_audio / fraccion
+        elif segundos_por_byte and self.bytes_totales:
+            duracion_total = self.bytes_totales * segundos_por_byte
+        else:
+            return None
+        return max(0, int((duracion_total - self.segundos_audio) * rtf))
+
+
+class TramoTranscripcion(models.Model): # Texto y palabras transcritos entre dos checkpoints
+    trabajo = models.ForeignKey(TrabajoTranscripcion, on_delete=models.CASCADE, related_name="tramos")
+    bytes_pcm = models.BigIntegerField(help_text="Checkpoint en el que termina el tramo")
+    texto = models.TextField(blank=True, default="")
+    palabras = models.JSONField(default=list, blank=True, help_text="Palabras con marcas de tiempo")
+
+    class Meta:
+        ordering = ["bytes_pcm"]
+        constraints = [
+            models.UniqueConstraint(fields=["trabajo", "bytes_pcm"], name="tramo_transcripcion_unico"),
+        ]
+
+    def __str__(self):
+        return f"Tramo del trabajo {self.trabajo_id} hasta {self.bytes_pcm} bytes"
+
+
+class GrabacionEnVivo(models.Model): # Audio guardado durante una sesión de transcripción en vivo
+    ESTADO_ACTIVA = "ACTIVA"
+    ESTADO_COMPLETADA = "COMPLETADA"
+    ESTADO_ABORTADA = "ABORTADA"
+
+    ESTADO_CHOICES = [
+        (ESTADO_ACTIVA, "Grabando"),
+        (ESTADO_COMPLETADA, "Completada"),
+        (ESTADO_ABORTADA, "Abortada"),
+    ]
+
+    acta = models.ForeignKey(Acta, on_delete=models.CASCADE, related_name="grabaciones_en_vivo")
+    archivo = models.CharField(max_length=255, help_text="Nombre del objeto en el almacenamiento")
+    formato = models.CharField(max_length=10, help_text="webm, ogg o wav")
+
+    # Estado de la subida multipart (permite completarla desde otro proceso)
+    upload_id = models.CharField(max_length=255, blank=True, default="")
+    partes = models.JSONField(default=list, blank=True)
+    bytes_subidos = models.BigIntegerField(default=0)
+    # Tramos cortos aún no incluidos en una parte (respaldo ante una caída antes de juntar 5 MB)
+    respaldos = models.JSONField(default=list, blank=True)
+
+    texto = models.TextField(blank=True, default="", help_text="Segmentos finales reconocidos en vivo")
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default=ESTADO_ACTIVA)
+    incorporada = models.BooleanField(default=False, help_text="Ya se copió al acta")
+    iniciada = models.DateTimeField(auto_now_add=True)
+    finalizada = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["iniciada"]
+        indexes = [
+            models.Index(fields=["acta", "estado"]),
+        ]
+
+    def __str__(self):
+        return f"Grabación en vivo {self.archivo} ({self.get_estado_display()})"
+
+
+class SubidaAudio(models.Model): # Subida por partes (reanudable) del audio de un acta
+    ESTADO_INICIADA = "INICIADA"
+    ESTADO_COMPLETADA = "COMPLETADA"
+    ESTADO_ABORTADA = "ABORTADA"
+
+    ESTADO_CHOICES = [
+        (ESTADO_INICIADA, "En curso"),
+        (ESTADO_COMPLETADA, "Completada"),
+        (ESTADO_ABORTADA, "Abortada"),
+    ]
+
+    acta = models.ForeignKey(Acta, on_delete=models.CASCADE, related_name="subidas_audio")
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    nombre_original = models.CharField(max_length=255)
+    archivo = models.CharField(max_length=255, help_text="Nombre del objeto en el almacenamiento")
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    tamano = models.BigIntegerField(help_text="Tamaño total declarado (bytes)")
+    tamano_parte = models.PositiveIntegerField()
+
+    # Multipart en S3 (upload_id) o partes recibidas por el servidor (almacenamiento local)
+    upload_id = models.CharField(max_length=255, blank=True, default="")
+    partes = models.JSONField(default=list, blank=True)
+
+    estado = models.CharField(max_length=12, choices=ESTADO_CHOICES, default=ESTADO_INICIADA)
+    creada = models.DateTimeField(auto_now_add=True)
+    actualizada = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["acta", "estado"]),
+        ]
+
+    def total_partes(self):
+        return max(1, -(-self.tamano // self.tamano_parte))  # División hacia arriba
+
+    def __str__(self):
+        return f"Subida {self.nombre_original} ({self.get_estado_display()})"
+
+
+class TranscripcionCache(models.Model): # Resultado reutilizable para un mismo archivo de audio
+    # Clave: contenido del audio + versión del modelo + cadena de filtros
+    huella = models.CharField(max_length=64, help_text="SHA-256 del archivo de audio")
+    version_modelo = models.CharField(max_length=100)
+    firma_filtros = models.CharField(max_length=255)
+
+    texto = models.TextField(blank=True, default="")
+    palabras = models.JSONField(default=list, blank=True)
+    segundos_audio = models.FloatField(default=0.0)
+
+    creado = models.DateTimeField(auto_now_add=True)
+    ultimo_uso = models.DateTimeField(auto_now_add=True)
+    usos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["huella", "version_modelo", "firma_filtros"], name="transcripcion_cache_unica"),
+        ]
+        indexes = [
+            models.Index(fields=["ultimo_uso"]),
+        ]
+
+    def __str__(self):
+        return f"Caché {self.huella[:12]} ({self.version_modelo})"
+
+    @classmethod
+    def buscar(cls, huella, version_modelo, firma_filtros):
+        """Devuelve la entrada (y registra su uso para el LRU) o None."""
+        if not huella:
+            return None
+        entrada = cls.objects.filter(huella=huella, version_modelo=version_modelo, firma_filtros=firma_filtros).first()
+        if entrada:
+            cls.objects.filter(pk=entrada.pk).update(ultimo_uso=timezone.now(), usos=models.F("usos") + 1)
+        return entrada
+
+    @classmethod
+    def guardar(cls, huella, version_modelo, firma_filtros, resultado, maximo):
+        """Guarda un resultado y elimina las entradas menos usadas recientemente sobre el máximo."""
+        cls.objects.update_or_create(
+            huella=huella, version_modelo=version_modelo, firma_filtros=firma_filtros,
+            defaults={
+                "texto": resultado["texto"],
+                "palabras": resultado["palabras"],
+                "segundos_audio": resultado["segundos"],
+                "ultimo_uso": timezone.now(),
+            },
+        )
+        sobrantes = cls.objects.order_by("-ultimo_uso").values_list("pk", flat=True)[maximo:]
+        pks = list(sobrantes)
+        if pks:
+            cls.objects.filter(pk__in=pks).delete()
+
+
+class PalabrasActa(models.Model): # Palabras de la transcripción con sus tiempos (formato compacto)
+    """
+    Guarda las palabras reconocidas como arreglos binarios: por cada palabra
+    su índice en el vocabulario del acta, su inicio en ms (uint32), su
+    duración en ms (uint16) y su confianza (uint8). Unas 11 bytes por palabra
+    en lugar de ~60 en JSON.
+    """
+    acta = models.OneToOneField(Acta, on_delete=models.CASCADE, related_name="palabras")
+    archivo = models.CharField(max_length=255, blank=True, default="", help_text="Audio al que corresponden los tiempos")
+    vocabulario = models.TextField(blank=True, default="", help_text="Palabras distintas, una por línea")
+    ids = models.BinaryField(default=b"")
+    inicios_ms = models.BinaryField(default=b"")
+    duraciones_ms = models.BinaryField(default=b"")
+    confianzas = models.BinaryField(default=b"")
+    total = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Palabras acta {self.acta_id} ({self.total})"
+
+
+class IndicePalabra(models.Model): # Índice invertido: término -> actas y posiciones
+    termino = models.CharField(max_length=64, help_text="Palabra normalizada (minúsculas, sin tildes)")
+    acta = models.ForeignKey(Acta, on_delete=models.CASCADE, related_name="indice_palabras")
+    frecuencia = models.PositiveIntegerField(default=0)
+    posiciones = models.BinaryField(default=b"", help_text="uint32: posición de cada aparición en el acta")
+    inicios_ms = models.BinaryField(default=b"", help_text="uint32: segundo exacto (ms) de cada aparición")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["termino", "acta"], name="indice_palabra_unico"),
+        ]
+
+    def __str__(self):
+        return f"{self.termino} -> acta {self.acta_id} ({self.frecuencia})"
@@ -0,0 +1,140 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Generación del PDF de las actas con xhtml2pdf. Lo usan tanto la
+               descarga desde la web como el envío por correo en segundo plano.
+               El PDF del acta aprobada se genera una sola vez (tarea en la cola
+               cpu), opcionalmente firmado con pyHanko, y se guarda en el
+               almacenamiento con el nombre acta-<pk>-<huella>.pdf: solo se
+               vuelve a renderizar si cambia el contenido.
+--------------------------------------------------------------------------------
+"""
+import hashlib
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.template.loader import get_template
+from django.utils.text import slugify
+from xhtml2pdf import pisa
+
+logger = logging.getLogger(__name__)
+
+PLANTILLA_ACTA = "reuniones/acta_pdf_template.html"
+CARPETA_PDF = "actas_pdf"
+
+
+def pdf_desde_xhtml(template_path: str, context: dict) -> bytes:
+    """
+    Renderiza un template HTML a PDF (bytes) usando xhtml2pdf.
+    Devuelve bytes del PDF listo para adjuntar (b"" si falla).
+    """
+    template = get_template(template_path)
+    html = template.render(context)
+
+    result = BytesIO()
+    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), dest=result, encoding="UTF-8")
+
+    if not pdf.err:
+        return result.getvalue()
+
+    logger.error(f"Error al generar PDF: {pdf.err}")
+    return b""
+
+
+def pdf_acta(acta):
+    """PDF del acta con la plantilla oficial."""
+    return pdf_desde_xhtml(PLANTILLA_ACTA, {"reunion": acta.reunion, "acta": acta})
+
+
+def nombre_pdf_acta(reunion): # Nombre del archivo para descarga y adjunto
+    return f"Acta_{slugify(getattr(reunion, 'titulo', f'reunion-{reunion.pk}'))}.pdf"
+
+
+def huella_acta(acta):
+    """
+    SHA-256 de todo lo que determina el PDF: campos que usa la plantilla, el
+    código fuente de la plantilla y si se firma. Si no cambia, el PDF guardado
+    sigue vigente.
+    """
+    reunion = acta.reunion
+    partes = [
+        get_template(PLANTILLA_ACTA).template.source,  # Editar la plantilla invalida los PDF guardados
+        reunion.titulo,
+        str(reunion.tipo),
+        reunion.fecha.isoformat() if reunion.fecha else "",
+        acta.contenido,
+        settings.ACTA_PDF_FIRMA_PKCS12,
+    ]
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()
+
+
+def firmar_pdf(pdf_bytes):
+    """
+    Firma el PDF con el certificado PKCS#12 de ACTA_PDF_FIRMA_PKCS12 (pyHanko).
+    Sin certificado configurado, o si la firma falla, devuelve el PDF sin firmar.
+    """
+    if not settings.ACTA_PDF_FIRMA_PKCS12 or not pdf_bytes:
+        return pdf_bytes
+    try:
+        from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
+        from pyhanko.sign import signers
+
+        firmante = signers.SimpleSigner.load_pkcs12(
+            settings.ACTA_PDF_FIRMA_PKCS12,
+            passphrase=settings.ACTA_PDF_FIRMA_CLAVE.encode() or None,
+        )
+        if firmante is None:
+            raise ValueError("no se pudo leer el certificado")
+        salida = signers.sign_pdf(
+            IncrementalPdfFileWriter(BytesIO(pdf_bytes)),
+            signers.PdfSignatureMetadata(field_name="FirmaDirectiva", reason="Acta aprobada"),
+            signer=firmante,
+        )
+        return salida.getvalue()
+    except Exception as e:
+        logger.error(f"No se pudo firmar el PDF del acta: {e}")
+        return pdf_bytes
+
+
+def pdf_vigente(acta):
+    """True si el PDF guardado corresponde al contenido actual del acta aprobada."""
+    return bool(acta.aprobada and acta.pdf_aprobado and acta.huella_pdf == huella_acta(acta))
+
+
+def generar_pdf_aprobado(acta):
+    """
+    Renderiza, firma y guarda el PDF del acta aprobada si el guardado no está vigente.
+    Devuelve el nombre del archivo en el almacenamiento ("" si no se pudo generar).
+    """
+    huella = huella_acta(acta)
+    if acta.pdf_aprobado and acta.huella_pdf == huella:
+        return acta.pdf_aprobado.name
+
+    pdf_bytes = firmar_pdf(pdf_acta(acta))
+    if not pdf_bytes:
+        return ""
+
+    anterior = acta.pdf_aprobado.name if acta.pdf_aprobado else ""
+    storage = acta._meta.get_field("pdf_aprobado").storage
+    nombre = storage.save(f"{CARPETA_PDF}/acta-{acta.pk}-{huella[:16]}.pdf", ContentFile(pdf_bytes))
+    # update() y no save(): no se disparan las señales de aprobación del acta
+    type(acta).objects.filter(pk=acta.pk).update(pdf_aprobado=nombre, huella_pdf=huella)
+    acta.pdf_aprobado.name, acta.huella_pdf = nombre, huella
+
+    if anterior and anterior != nombre:
+        storage.delete(anterior)
+    return nombre
+
+
+def pdf_acta_guardado(acta):
+    """PDF del acta: el guardado si está vigente, si no se renderiza en el momento."""
+    if pdf_vigente(acta):
+        try:
+            with acta.pdf_aprobado.open("rb") as f:
+                return f.read()
+        except Exception as e:  # Objeto borrado del bucket, etc.
+            logger.warning(f"No se pudo leer {acta.pdf_aprobado.name}: {e}")
+    return pdf_acta(acta)
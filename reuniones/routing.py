@@ -8,8 +8,10 @@ Descripción:   Definición de rutas URL para WebSockets, mapeando la URL de
 """
 # reuniones/routing.py
 from django.urls import path
-from .consumers import STTConsumer
+from .consumers import EstadoActaConsumer, OyenteConsumer, STTConsumer
 
 websocket_urlpatterns = [
-    path("ws/transcribir/<int:reunion_id>/", STTConsumer.as_asgi()), # Ruta WS para transcripción
+    path("ws/transcribir/<int:reunion_id>/", STTConsumer.as_asgi()), # Ruta WS para transcripción (hablante)
+    path("ws/transcribir/<int:reunion_id>/escuchar/", OyenteConsumer.as_asgi()), # Solo recibe los textos
+    path("ws/actas/<int:reunion_id>/estado/", EstadoActaConsumer.as_asgi()), # Estado de la transcripción del acta
 ]
\ No newline at end of file
@@ -6,7 +6,6 @@ Descripción:   Gestión de señales para disparar notificaciones asíncronas
                basadas en cambios de estado de Reuniones y Actas.
 --------------------------------------------------------------------------------
 """
-from django.db import transaction
 from django.db.models.signals import pre_save, post_save
 from django.dispatch import receiver
 from .models import Reunion, EstadoReunion, Acta
@@ -16,6 +15,7 @@ from .tasks import (
     enviar_notificacion_reunion_iniciada,
     enviar_notificacion_acta_aprobada
 )
+from core.outbox import encolar_tarea
 
 # --- REUNIONES ---
 
@@ -33,16 +33,16 @@ def guardar_estado_anterior_reunion(sender, instance, **kwargs):
 @receiver(post_save, sender=Reunion) # Dispara notificaciones tras guardar
 def gestionar_notificaciones_reunion(sender, instance, created, **kwargs):
     if created:
-        transaction.on_commit(lambda: enviar_notificacion_nueva_reunion.delay(instance.pk))
+        encolar_tarea(enviar_notificacion_nueva_reunion, instance.pk)
     else:
         prev = getattr(instance, "_estado_anterior", None)
         curr = instance.estado
 
         if prev != EstadoReunion.REALIZADA and curr == EstadoReunion.REALIZADA:
-            transaction.on_commit(lambda: enviar_notificacion_reunion_finalizada.delay(instance.pk))
+            encolar_tarea(enviar_notificacion_reunion_finalizada, instance.pk)
 
         if prev != EstadoReunion.EN_CURSO and curr == EstadoReunion.EN_CURSO:
-            transaction.on_commit(lambda: enviar_notificacion_reunion_iniciada.delay(instance.pk))
+            encolar_tarea(enviar_notificacion_reunion_iniciada, instance.pk)
 
 # --- ACTAS ---
 
@@ -64,5 +64,5 @@ def gestionar_notificaciones_acta(sender, instance, created, **kwargs):
 
     # Notificar solo si pasa de No Aprobada -> Aprobada
     if not was_approved and is_approved:
-        # Usamos .pk aquí, lo cual es seguro
-        transaction.on_commit(lambda: enviar_notificacion_acta_aprobada.delay(instance.pk))
\ No newline at end of file
+        # Se registra en el outbox junto con el guardado del acta
+        encolar_tarea(enviar_notificacion_acta_aprobada, instance.pk)
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Subida reanudable de grabaciones por partes. En Cellar/S3 el
+               navegador sube cada parte directo al bucket con una URL firmada
+               (multipart upload) y el servidor solo coordina y ensambla; el
+               audio nunca pasa por la memoria de los workers web. Con
+               almacenamiento local (desarrollo) las partes llegan al servidor
+               y se escriben a disco por fragmentos.
+--------------------------------------------------------------------------------
+"""
+import logging
+import os
+import shutil
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.text import get_valid_filename
+
+from .almacenamiento import TAMANO_FRAGMENTO, EscritorMultipart, clave_s3, es_s3
+from .models import SubidaAudio
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_AUDIO = (".webm", ".ogg", ".wav", ".mp3")  # Mismas que acepta el formulario
+
+
+class SubidaInvalida(Exception): # Error de protocolo que se informa al cliente
+    pass
+
+
+def _escritor(subida):
+    return EscritorMultipart(
+        default_storage, subida.archivo, subida.content_type or "application/octet-stream",
+        upload_id=subida.upload_id, partes=subida.partes,
+    )
+
+
+def _tamano_esperado(subida, numero): # La última parte puede ser menor
+    if numero < subida.total_partes():
+        return subida.tamano_parte
+    return subida.tamano - subida.tamano_parte * (subida.total_partes() - 1)
+
+
+def _ruta_parte(subida, numero): # Parte recibida por el servidor (almacenamiento local)
+    return f"{default_storage.path(subida.archivo)}.parte-{numero:05d}"
+
+
+def iniciar_subida(acta, usuario, nombre, tamano, content_type=""):
+    """
+    Crea la subida, o devuelve la que está en curso para el mismo archivo
+    (mismo nombre y tamaño) para continuarla desde las partes ya subidas.
+    """
+    if not nombre.lower().endswith(EXTENSIONES_AUDIO):
+        raise SubidaInvalida("Formato de audio no soportado.")
+    if tamano <= 0:
+        raise SubidaInvalida("El archivo está vacío.")
+
+    en_curso = SubidaAudio.objects.filter(acta=acta, estado=SubidaAudio.ESTADO_INICIADA)
+    previa = en_curso.filter(nombre_original=nombre, tamano=tamano).order_by("-creada").first()
+    if previa:
+        return previa
+
+    # Otro archivo: se descartan las subidas anteriores que quedaron a medias
+    for anterior in en_curso:
+        abortar_subida(anterior)
+
+    subida = SubidaAudio.objects.create(
+        acta=acta, usuario=usuario, nombre_original=nombre, archivo="",
+        content_type=content_type, tamano=tamano, tamano_parte=settings.SUBIDA_AUDIO_TAMANO_PARTE,
+    )
+    # Clave única por subida: en S3 el objeto no existe hasta completar el multipart, así que
+    # get_available_name no evita que dos actas que suben "grabacion.webm" a la vez se pisen
+    base = get_valid_filename(os.path.basename(nombre))[-150:]
+    escritor = EscritorMultipart(
+        default_storage, f"audios_reuniones/acta-{acta.pk}-{subida.pk}-{base}",
+        content_type or "application/octet-stream",
+    )
+    try:
+        escritor.iniciar()
+    except Exception:
+        subida.delete()
+        raise
+    subida.archivo, subida.upload_id = escritor.nombre, escritor.upload_id
+    subida.save(update_fields=["archivo", "upload_id", "actualizada"])
+    return subida
+
+
+def partes_subidas(subida):
+    """Partes que ya están en el almacenamiento: [{"PartNumber", "ETag", "Size"}]."""
+    if es_s3(default_storage):
+        cliente = default_storage.bucket.meta.client
+        paginas = cliente.get_paginator("list_parts").paginate(
+            Bucket=default_storage.bucket_name, Key=clave_s3(default_storage, subida.archivo),
+            UploadId=subida.upload_id,
+        )
+        return [
+            {"PartNumber": p["PartNumber"], "ETag": p["ETag"], "Size": p["Size"]}
+            for pagina in paginas for p in pagina.get("Parts", [])
+        ]
+
+    partes = []
+    for numero in range(1, subida.total_partes() + 1):
+        ruta = _ruta_parte(subida, numero)
+        if os.path.exists(ruta):
+            partes.append({"PartNumber": numero, "ETag": "", "Size": os.path.getsize(ruta)})
+    return partes
+
+
+def urls_partes(subida, numeros, url_servidor):
+    """
+    URL a la que el cliente envía (PUT) cada parte: firmada al bucket en S3,
+    o la del servidor (url_servidor(numero)) con almacenamiento local.
+    """
+    validos = [n for n in numeros if 1 <= n <= subida.total_partes()]
+    if not es_s3(default_storage):
+        return {n: url_servidor(n) for n in validos}
+
+    cliente = default_storage.bucket.meta.client
+    clave = clave_s3(default_storage, subida.archivo)
+    return {
+        n: cliente.generate_presigned_url(
+            "upload_part",
+            Params={"Bucket": default_storage.bucket_name, "Key": clave, "UploadId": subida.upload_id, "PartNumber": n},
+            ExpiresIn=settings.SUBIDA_AUDIO_URL_VALIDEZ_S,
+        )
+        for n in validos
+    }
+
+
+def guardar_parte_local(subida, numero, entrada):
+    """Escribe a disco una parte recibida por el servidor, leyendo el cuerpo por fragmentos."""
+    if es_s3(default_storage):
+        raise SubidaInvalida("Las partes se suben directamente al bucket.")
+    if not 1 <= numero <= subida.total_partes():
+        raise SubidaInvalida("Número de parte fuera de rango.")
+
+    esperado = _tamano_esperado(subida, numero)
+    ruta = _ruta_parte(subida, numero)
+    escritos = 0
+    with open(ruta + ".tmp", "wb") as f:
+        while escritos <= esperado:
+            fragmento = entrada.read(TAMANO_FRAGMENTO)
+            if not fragmento:
+                break
+            f.write(fragmento)
+            escritos += len(fragmento)
+    if escritos != esperado:
+        os.remove(ruta + ".tmp")
+        raise SubidaInvalida(f"La parte {numero} debe medir {esperado} bytes (llegaron {escritos}).")
+    os.replace(ruta + ".tmp", ruta)  # Una parte a medio escribir nunca cuenta como subida
+
+
+def completar_subida(subida):
+    """
+    Verifica que estén todas las partes con el tamaño correcto y ensambla el
+    objeto final. Solo después de esto el audio pasa al acta.
+    """
+    partes = sorted(partes_subidas(subida), key=lambda p: p["PartNumber"])
+    numeros = [p["PartNumber"] for p in partes]
+    if numeros != list(range(1, subida.total_partes() + 1)):
+        faltan = sorted(set(range(1, subida.total_partes() + 1)) - set(numeros))
+        raise SubidaInvalida(f"Faltan partes: {faltan[:20]}")
+    if sum(p["Size"] for p in partes) != subida.tamano:
+        raise SubidaInvalida("El tamaño subido no coincide con el del archivo.")
+
+    if es_s3(default_storage):
+        escritor = _escritor(subida)
+        escritor.partes = [{"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in partes]
+        escritor.completar()
+    else:
+        with open(default_storage.path(subida.archivo), "wb") as destino:
+            for numero in numeros:
+                with open(_ruta_parte(subida, numero), "rb") as origen:
+                    shutil.copyfileobj(origen, destino, TAMANO_FRAGMENTO)
+        for numero in numeros:
+            os.remove(_ruta_parte(subida, numero))
+
+    subida.partes = [{"PartNumber": p["PartNumber"], "ETag": p["ETag"]} for p in partes]
+    subida.estado = SubidaAudio.ESTADO_COMPLETADA
+    subida.save(update_fields=["partes", "estado", "actualizada"])
+    return subida
+
+
+def abortar_subida(subida): # Libera las partes subidas (no quedan cobrando espacio)
+    if not es_s3(default_storage):
+        for numero in range(1, subida.total_partes() + 1):
+            for ruta in (_ruta_parte(subida, numero), _ruta_parte(subida, numero) + ".tmp"):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+    _escritor(subida).abortar()
+    subida.estado = SubidaAudio.ESTADO_ABORTADA
+    subida.save(update_fields=["estado", "actualizada"])
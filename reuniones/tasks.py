@@ -7,65 +7,37 @@ Descripción:   Tareas asíncronas de Celery para envío de notificaciones FCM y
 --------------------------------------------------------------------------------
 """
 from celery import shared_task
+from celery.signals import worker_init, worker_ready
 import time
 import os
 import json
-import wave
-import ffmpeg
-import tempfile
 import traceback
 import logging
+import hashlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
-from .models import Acta, Reunion
+from .models import Acta, ActaEmailLog, GrabacionEnVivo, Reunion, TrabajoTranscripcion, TramoTranscripcion, TranscripcionCache
 from core.models import Perfil, DispositivoFCM
-from vosk import Model, KaldiRecognizer
-import firebase_admin
-from firebase_admin import messaging, credentials
+from core.notificaciones import enviar_a_tokens, inicializar_firebase
+from usuarios.utils import codificar_adjunto, enviar_correo_via_webhook
+from .almacenamiento import con_huella, huella_almacenada, iterar_archivo
+from .estado_acta import publicar_estado_acta
+from .indice_palabras import indexar_acta
+from .modelo_vosk import estadisticas, obtener_modelo, precargar_modelo, ruta_modelo, version_modelo
+from .transcripcion import (
+    BYTES_POR_MUESTRA, SAMPLE_RATE, DecodificadorFFmpeg, RecortadorSilencios, firma_filtros,
+    reubicar_palabras, saltar_bytes,
+    transcribir_bloques, transcribir_en_paralelo,
+)
 
 logger = logging.getLogger(__name__)
 
-VOSK_MODEL_PATH = os.path.join(settings.BASE_DIR, "vosk-model-small-es-0.42")
-vosk_model = None
-firebase_app = None
-
-
-def inicializar_firebase(): # Inicializa Firebase SDK
-    global firebase_app
-    if firebase_app is not None:
-        return firebase_app
-
-    try:
-        firebase_app = firebase_admin.get_app()
-        return firebase_app
-    except ValueError:
-        pass
-
-    project_id = getattr(settings, "FIREBASE_PROJECT_ID", None)
-    client_email = getattr(settings, "FIREBASE_CLIENT_EMAIL", None)
-    private_key = getattr(settings, "FIREBASE_PRIVATE_KEY", None)
-    private_key_id = getattr(settings, "FIREBASE_PRIVATE_KEY_ID", "dummy")
-
-    if not project_id or not client_email or not private_key:
-        logger.error("Faltan credenciales de Firebase en settings/.env.")
-        return None
-
-    cred_info = {
-        "type": "service_account",
-        "project_id": project_id,
-        "private_key_id": private_key_id,
-        "private_key": private_key.replace("\\n", "\n"),
-        "client_email": client_email,
-        "client_id": "dummy",
-        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-        "token_uri": "https://oauth2.googleapis.com/token",
-        "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-        "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{client_email}",
-    }
-
-    cred = credentials.Certificate(cred_info)
-    firebase_app = firebase_admin.initialize_app(cred)
-    return firebase_app
+BYTES_POR_SEGUNDO = SAMPLE_RATE * BYTES_POR_MUESTRA
 
 
 #Tareas de notificacion
@@ -85,27 +57,13 @@ def enviar_notificacion_nueva_reunion(reunion_id): # Notif nueva reunión
     try:
         inicializar_firebase()
         reunion = Reunion.objects.get(pk=reunion_id)
-        tokens = _obtener_tokens_dispositivos()
-        if not tokens:
-            return
         fecha_local = timezone.localtime(reunion.fecha)
-        body = f"{reunion.titulo} el {fecha_local.strftime('%d/%m/%Y %H:%M')}"
-        for token in tokens:
-            try:
-                msg = messaging.Message(
-                    notification=messaging.Notification(
-                        title="Nueva reunión agendada",
-                        body=body
-                    ),
-                    token=token,
-                    data={
-                        "tipo": "nueva_reunion",
-                        "reunion_id": str(reunion.id)
-                    }
-                )
-                messaging.send(msg)
-            except Exception:
-                pass
+        return enviar_a_tokens(
+            _obtener_tokens_dispositivos(),
+            "Nueva reunión agendada",
+            f"{reunion.titulo} el {fecha_local.strftime('%d/%m/%Y %H:%M')}",
+            {"tipo": "nueva_reunion", "reunion_id": reunion.id},
+        )
     except Exception as e:
         logger.error(f"Error notif nueva reunion: {e}")
 
@@ -115,24 +73,12 @@ def enviar_notificacion_reunion_iniciada(reunion_id): # Notif inicio reunión
     try:
         inicializar_firebase()
         reunion = Reunion.objects.get(id=reunion_id)
-
-        tokens = _obtener_tokens_dispositivos()
-        if not tokens:
-            return
-
-        mensaje = messaging.MulticastMessage(
-            notification=messaging.Notification(
-                title="¡Reunión Iniciada!",
-                body=f"La reunión '{reunion.titulo}' ha comenzado. ¡Únete ahora!"
-            ),
-            data={
-                "tipo": "reunion_iniciada",
-                "reunion_id": str(reunion.id),
-                "click_action": "FLUTTER_NOTIFICATION_CLICK"
-            },
-            tokens=tokens
+        return enviar_a_tokens(
+            _obtener_tokens_dispositivos(),
+            "¡Reunión Iniciada!",
+            f"La reunión '{reunion.titulo}' ha comenzado. ¡Únete ahora!",
+            {"tipo": "reunion_iniciada", "reunion_id": reunion.id, "click_action": "FLUTTER_NOTIFICATION_CLICK"},
         )
-        messaging.send_each_for_multicast(mensaje)
     except Exception as e:
         logger.error(f"Error notif inicio reunion: {e}")
 
@@ -142,23 +88,12 @@ def enviar_notificacion_reunion_finalizada(reunion_id): # Notif fin reunión
     try:
         inicializar_firebase()
         reunion = Reunion.objects.get(id=reunion_id)
-
-        tokens = _obtener_tokens_dispositivos()
-        if not tokens:
-            return
-
-        mensaje = messaging.MulticastMessage(
-            notification=messaging.Notification(
-                title="Reunión Finalizada",
-                body=f"La reunión '{reunion.titulo}' ha finalizado."
-            ),
-            data={
-                "tipo": "reunion_finalizada",
-                "reunion_id": str(reunion.id)
-            },
-            tokens=tokens
+        return enviar_a_tokens(
+            _obtener_tokens_dispositivos(),
+            "Reunión Finalizada",
+            f"La reunión '{reunion.titulo}' ha finalizado.",
+            {"tipo": "reunion_finalizada", "reunion_id": reunion.id},
         )
-        messaging.send_each_for_multicast(mensaje)
     except Exception as e:
         logger.error(f"Error notif fin reunion: {e}")
 
@@ -169,102 +104,469 @@ def enviar_notificacion_acta_aprobada(acta_id): # Notif acta aprobada
         inicializar_firebase()
         acta = Acta.objects.get(pk=acta_id)
         reunion = acta.reunion
-
-        tokens = _obtener_tokens_dispositivos()
-        if not tokens:
-            return
-
-        mensaje = messaging.MulticastMessage(
-            notification=messaging.Notification(
-                title="Acta Disponible",
-                body=f"El acta de '{reunion.titulo}' ha sido aprobada."
-            ),
-            data={
-                "tipo": "acta_aprobada",
-                "acta_id": str(acta.pk),
-                "reunion_id": str(reunion.id)
-            },
-            tokens=tokens
+        return enviar_a_tokens(
+            _obtener_tokens_dispositivos(),
+            "Acta Disponible",
+            f"El acta de '{reunion.titulo}' ha sido aprobada.",
+            {"tipo": "acta_aprobada", "acta_id": acta.pk, "reunion_id": reunion.id},
         )
-        messaging.send_each_for_multicast(mensaje)
     except Exception as e:
         logger.error(f"Error notif acta aprobada: {e}")
 
 
 # Tarea de transcripcion con Vosk
 
-@shared_task(name="procesar_audio_vosk")
-def procesar_audio_vosk(acta_pk): # Procesamiento de audio
-    global vosk_model
+@shared_task(
+    name="enviar_acta_por_correo", bind=True, max_retries=3, default_retry_delay=60,
+    acks_late=True, reject_on_worker_lost=True,
+)
+def enviar_acta_por_correo(self, acta_pk, lote):
+    """
+    Envía el PDF del acta a los destinatarios pendientes del lote (ActaEmailLog).
+    Si el worker muere a mitad del envío el mensaje se vuelve a entregar (acks_late) y,
+    tras un error, se reintenta: en ambos casos se sigue con las filas aún PENDIENTE.
+    """
+    try:
+        return _enviar_acta_por_correo(acta_pk, lote)
+    except Exception as e:
+        logger.error(f"[ACTA EMAIL] Error enviando el lote {lote} del acta {acta_pk}: {e}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        ActaEmailLog.objects.filter(lote=lote, estado=ActaEmailLog.ESTADO_PENDIENTE).update(
+            estado=ActaEmailLog.ESTADO_FALLIDO, error=str(e)[:255], actualizado=timezone.now(),
+        )
+        return f"Error enviando el acta {acta_pk}: {e}"
+
+
+def _enviar_acta_por_correo(acta_pk, lote):
+    """
+    El PDF (el ya generado al aprobar, si está vigente) se codifica una sola vez; los correos salen por grupos de
+    CORREO_ACTA_LOTE con a lo más CORREO_ACTA_CONCURRENCIA llamadas simultáneas
+    al webhook, y el resultado de cada grupo se guarda con una actualización masiva.
+    """
+    from .pdf import nombre_pdf_acta, pdf_acta_guardado
+
+    pendientes = ActaEmailLog.objects.filter(lote=lote, estado=ActaEmailLog.ESTADO_PENDIENTE)
+    destinatarios = list(pendientes.values_list("pk", "destinatario"))
+    if not destinatarios:
+        return f"Lote {lote} sin destinatarios pendientes."
+
+    acta = Acta.objects.select_related("reunion").get(pk=acta_pk)
+    reunion = acta.reunion
+    adjunto = codificar_adjunto(pdf_acta_guardado(acta), nombre_pdf_acta(reunion))
+    if adjunto is None:
+        pendientes.update(estado=ActaEmailLog.ESTADO_FALLIDO, error="Error al generar el PDF", actualizado=timezone.now())
+        return f"Lote {lote}: no se pudo generar el PDF."
+
+    asunto = f"Acta de Reunión: {reunion.titulo}"
+    cuerpo = f"""
+        <p>Estimado/a vecino/a,</p>
+        <p>Se adjunta el acta oficial de la reunión <strong>{reunion.titulo}</strong>.</p>
+        <p>Saludos cordiales,<br>La Directiva</p>
+    """
+
+    def enviar(destinatario): # Mismo payload para todos, solo cambia el destinatario
+        return enviar_correo_via_webhook(
+            to_email=destinatario, subject=asunto, html_body=cuerpo,
+            text_body="Se adjunta acta de reunión.", adjunto=adjunto, en_segundo_plano=True,
+        )
+
+    enviados = 0
+    tamano = settings.CORREO_ACTA_LOTE
+    with ThreadPoolExecutor(max_workers=settings.CORREO_ACTA_CONCURRENCIA) as pool:
+        for i in range(0, len(destinatarios), tamano):
+            grupo = destinatarios[i:i + tamano]
+            resultados = list(pool.map(enviar, [correo for _, correo in grupo]))
+            ok = [pk for (pk, _), exito in zip(grupo, resultados) if exito]
+            fallidos = [pk for (pk, _), exito in zip(grupo, resultados) if not exito]
+            ahora = timezone.now()
+            if ok:
+                ActaEmailLog.objects.filter(pk__in=ok).update(estado=ActaEmailLog.ESTADO_ENVIADO, actualizado=ahora)
+            if fallidos:
+                ActaEmailLog.objects.filter(pk__in=fallidos).update(
+                    estado=ActaEmailLog.ESTADO_FALLIDO, error="El webhook no confirmó el envío", actualizado=ahora,
+                )
+            enviados += len(ok)
+
+    logger.info(f"[ACTA EMAIL] Acta {acta_pk}, lote {lote}: {enviados}/{len(destinatarios)} enviados")
+    return f"Acta {acta_pk}: {enviados} de {len(destinatarios)} correos enviados."
+
+
+def _procesos_transcripcion(): # Cantidad de procesos para transcribir
+    if multiprocessing.current_process().daemon:
+        return 1  # Hijo de un pool prefork: los procesos daemon no pueden crear hijos
+    procesos = getattr(settings, "TRANSCRIPCION_PROCESOS", 0) or os.cpu_count() or 1
+    return max(1, procesos)
+
+
+def clave_transcripcion(acta_pk): # Candado por acta: una sola transcripción a la vez
+    return f"transcripcion:acta:{acta_pk}"
+
+
+def _obtener_trabajo(acta): # Checkpoint vigente o uno nuevo si cambió el audio
+    trabajo, creado = TrabajoTranscripcion.objects.get_or_create(
+        acta=acta, defaults={"archivo": acta.archivo_audio.name}
+    )
+    if creado or trabajo.archivo != acta.archivo_audio.name or trabajo.finalizado:
+        trabajo.archivo = acta.archivo_audio.name
+        trabajo.bytes_pcm = 0
+        trabajo.bytes_entrada = 0
+        trabajo.segundos_audio = 0.0
+        trabajo.segundos_proceso = 0.0
+        trabajo.finalizado = None
+        try:
+            trabajo.bytes_totales = acta.archivo_audio.size
+        except Exception:
+            trabajo.bytes_totales = 0
+        trabajo.save()
+        trabajo.tramos.all().delete()
+    elif trabajo.bytes_pcm:
+        logger.info(f"Reanudando acta {acta.pk} desde {trabajo.bytes_pcm / BYTES_POR_SEGUNDO:.0f}s de audio")
+    return trabajo
+
+
+def _transcribir_con_checkpoints(acta, trabajo):
+    """
+    Ejecuta el flujo almacenamiento -> FFmpeg -> Vosk partiendo desde el
+    checkpoint y guardando el avance cada TRANSCRIPCION_CHECKPOINT_SEGUNDOS.
+    """
+    inicio_pcm = trabajo.bytes_pcm
+    base_proceso = trabajo.segundos_proceso
+    # Lo ya transcrito hasta el checkpoint, en el orden de los tramos
+    textos_previos, palabras_previas = [], []
+    for texto, palabras in trabajo.tramos.values_list("texto", "palabras"):
+        if texto:
+            textos_previos.append(texto)
+        palabras_previas.extend(palabras or [])
+    pendiente = {"textos": [], "palabras": []}  # Lo transcrito desde el último checkpoint
+    intervalo = getattr(settings, "TRANSCRIPCION_CHECKPOINT_SEGUNDOS", 30)
+    reloj = {"inicio": time.monotonic(), "guardado": time.monotonic()}
+
+    # Flujo sin archivos temporales: almacenamiento -> FFmpeg (pipes) -> Vosk
+    # (el SHA-256 del archivo se calcula en el mismo recorrido, para la caché)
+    hasher = hashlib.sha256()
+    decodificador = DecodificadorFFmpeg(con_huella(iterar_archivo(acta.archivo_audio), hasher))
+    bloques = saltar_bytes(decodificador, inicio_pcm)  # FFmpeg decodifica rápido lo ya transcrito
+
+    # VAD: Kaldi solo recibe los tramos con voz; el mapa devuelve los tiempos al audio original
+    offset_s = inicio_pcm / BYTES_POR_SEGUNDO
+    vad = RecortadorSilencios(bloques) if settings.TRANSCRIPCION_VAD else None
+    if vad:
+        bloques = vad
+
+    def a_original(segundos): # Tiempo del reconocedor -> tiempo en el audio original
+        return offset_s + (vad.a_original_s(segundos) if vad else segundos)
+
+    def bytes_originales(bytes_rel):
+        return vad.bytes_originales(bytes_rel) if vad else bytes_rel
+
+    def guardar_checkpoint(bytes_rel, parcial): # Acumula y persiste solo lo nuevo desde el checkpoint anterior
+        if parcial["texto"]:
+            pendiente["textos"].append(parcial["texto"])
+        pendiente["palabras"].extend(reubicar_palabras(parcial["palabras"], a_original))
+        ahora = time.monotonic()
+        if ahora - reloj["guardado"] < intervalo:
+            return
+        reloj["guardado"] = ahora
+
+        bytes_pcm = inicio_pcm + bytes_originales(bytes_rel)
+        relacion = decodificador.bytes_entrada / max(decodificador.bytes_salida, 1)
+        trabajo.bytes_pcm = bytes_pcm
+        trabajo.bytes_entrada = min(int(bytes_pcm * relacion), trabajo.bytes_totales or bytes_pcm)
+        trabajo.segundos_audio = bytes_pcm / BYTES_POR_SEGUNDO
+        trabajo.segundos_proceso = base_proceso + (ahora - reloj["inicio"])
+        with transaction.atomic():
+            TramoTranscripcion.objects.update_or_create(
+                trabajo=trabajo, bytes_pcm=bytes_pcm,
+                defaults={"texto": " ".join(pendiente["textos"]), "palabras": pendiente["palabras"]},
+            )
+            trabajo.save()
+        pendiente["textos"], pendiente["palabras"] = [], []
+        cache.touch(clave_transcripcion(acta.pk), settings.TRANSCRIPCION_REANUDAR_TRAS_SEGUNDOS)  # Sigue vivo
+        publicar_estado_acta(acta, trabajo)  # Avance y ETA a la página del acta
+
+    # Transcribir (por segmentos en paralelo si hay más de un núcleo)
+    modelo = obtener_modelo()
+    procesos = _procesos_transcripcion()
+    if procesos > 1:
+        resultado = transcribir_en_paralelo(
+            modelo, ruta_modelo(), bloques, procesos,
+            settings.TRANSCRIPCION_SEGMENTO_SEGUNDOS, al_avanzar=guardar_checkpoint,
+        )
+    else:
+        resultado = transcribir_bloques(modelo, bloques, al_avanzar=guardar_checkpoint)
+
+    # Trabajo terminado: se guardan solo las métricas (sirven para el RTF histórico)
+    leidos = vad.bytes_entrada if vad else int(resultado["segundos"] * BYTES_POR_SEGUNDO)
+    trabajo.bytes_pcm = inicio_pcm + leidos
+    trabajo.bytes_entrada = trabajo.bytes_totales
+    trabajo.segundos_audio = trabajo.bytes_pcm / BYTES_POR_SEGUNDO
+    trabajo.segundos_proceso = base_proceso + (time.monotonic() - reloj["inicio"])
+    trabajo.finalizado = timezone.now()
+    trabajo.save()
+    trabajo.tramos.all().delete()
+
+    completo = not trabajo.bytes_totales or decodificador.bytes_entrada == trabajo.bytes_totales
+    return {
+        "texto": " ".join(textos_previos + ([resultado["texto"]] if resultado["texto"] else [])),
+        "palabras": palabras_previas + reubicar_palabras(resultado["palabras"], a_original),
+        "segundos": trabajo.segundos_audio,
+        "huella": hasher.hexdigest() if completo else "",  # Solo si se leyó el archivo entero
+    }
+
+
+def _indexar_palabras(acta, palabras): # El índice no debe hacer fallar la transcripción
+    try:
+        indexar_acta(acta, palabras)
+    except Exception as e:
+        logger.error(f"No se pudo indexar las palabras del acta {acta.pk}: {e}")
+
+
+def aplicar_cache_transcripcion(acta):
+    """Completa el acta con una transcripción ya hecha del mismo audio. Devuelve True si la encontró."""
+    if not acta.huella_audio and acta.archivo_audio:
+        # Subida por partes: el audio nunca pasó por el servidor, se lee una vez desde el bucket
+        acta.huella_audio = huella_almacenada(acta.archivo_audio)
+        Acta.objects.filter(pk=acta.pk).update(huella_audio=acta.huella_audio)
+    entrada = TranscripcionCache.buscar(acta.huella_audio, version_modelo(), firma_filtros(settings.TRANSCRIPCION_VAD))
+    if not entrada:
+        return False
+    acta.contenido = entrada.texto
+    acta.transcripcion_automatica = entrada.texto
+    acta.estado_transcripcion = Acta.ESTADO_COMPLETADO
+    acta.save()
+    _indexar_palabras(acta, entrada.palabras or [])
+    publicar_estado_acta(acta)
+    encolar_compresion_audio(acta)
+    logger.info(f"Acta {acta.pk} completada desde la caché de transcripciones ({entrada.huella[:12]})")
+    return True
+
+
+@shared_task(name="procesar_audio_vosk", bind=True, max_retries=3, default_retry_delay=30)
+def procesar_audio_vosk(self, acta_pk): # Procesamiento de audio (reanudable)
+    # El candado vence si el worker muere sin checkpoints: entonces el acta se puede reanudar
+    candado = clave_transcripcion(acta_pk)
+    if not cache.add(candado, self.request.id or True, settings.TRANSCRIPCION_REANUDAR_TRAS_SEGUNDOS):
+        logger.info(f"Acta {acta_pk} ya se está transcribiendo en otro worker")
+        return f"Acta {acta_pk} ya en proceso."
+    try:
+        return _procesar_audio_vosk(self, acta_pk)
+    finally:
+        cache.delete(candado)
+
+
+def _procesar_audio_vosk(task, acta_pk):
     try:
-        if vosk_model is None:
-            if not os.path.exists(VOSK_MODEL_PATH):
-                raise FileNotFoundError(f"Modelo VOSK no encontrado en {VOSK_MODEL_PATH}")
-            vosk_model = Model(VOSK_MODEL_PATH)
+        obtener_modelo()  # Ya precargado en worker_init; falla aquí si no existe
 
         acta = Acta.objects.get(pk=acta_pk)
+        if aplicar_cache_transcripcion(acta):
+            return f"Acta {acta_pk} completada desde caché."
+
         acta.estado_transcripcion = Acta.ESTADO_PROCESANDO
         acta.save()
 
-        # Crear archivos temporales
-        with tempfile.NamedTemporaryFile(suffix=".webm", delete=False) as f_in:
-            f_in.write(acta.archivo_audio.read())
-            input_webm_path = f_in.name
-
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f_out:
-            output_wav_path = f_out.name
-
-        # Convertir con FFMPEG
-        (
-            ffmpeg
-            .input(input_webm_path)
-            .output(
-                output_wav_path, 
-                format="wav", 
-                acodec="pcm_s16le", 
-                ac=1, 
-                ar="16000",
-                # Filtro de paso alto (quita ruidos graves) y compresión dinámica
-                af="highpass=f=200, lowpass=f=3000, loudnorm" 
-            )
-            .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-        )
+        trabajo = _obtener_trabajo(acta)
+        publicar_estado_acta(acta, trabajo)
+        resultado = _transcribir_con_checkpoints(acta, trabajo)
 
-        # Transcribir
-        wf = wave.open(output_wav_path, "rb")
-        rec = KaldiRecognizer(vosk_model, wf.getframerate())
-        rec.SetWords(True)
-
-        full_text = ""
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
-            if rec.AcceptWaveform(data):
-                res = json.loads(rec.Result())
-                full_text += res.get("text", "") + " "
-
-        final_res = json.loads(rec.FinalResult())
-        full_text += final_res.get("text", "")
-        wf.close()
-
-        acta.contenido = full_text
+        acta.contenido = resultado["texto"]
+        acta.transcripcion_automatica = resultado["texto"]  # Se compara con el texto aprobado
         acta.estado_transcripcion = Acta.ESTADO_COMPLETADO
+        if resultado["huella"]:
+            acta.huella_audio = resultado["huella"]
         acta.save()
-
-        # Limpieza
-        if os.path.exists(input_webm_path):
-            os.remove(input_webm_path)
-        if os.path.exists(output_wav_path):
-            os.remove(output_wav_path)
+        _indexar_palabras(acta, resultado["palabras"])
+        publicar_estado_acta(acta)
+        encolar_compresion_audio(acta)
+
+        if resultado["huella"]:
+            TranscripcionCache.guardar(
+                resultado["huella"], version_modelo(), firma_filtros(settings.TRANSCRIPCION_VAD), resultado,
+                settings.TRANSCRIPCION_CACHE_MAX_ENTRADAS,
+            )
 
         return f"Acta {acta_pk} procesada."
 
+    except Acta.DoesNotExist:
+        return f"Acta {acta_pk} no encontrada."
     except Exception as e:
+        logger.error(f"Error procesando audio del acta {acta_pk}: {e}")
+        if task.request.retries < task.max_retries:
+            # Se reintenta desde el último checkpoint (el acta sigue en PROCESANDO)
+            raise task.retry(exc=e)
         try:
             a = Acta.objects.get(pk=acta_pk)
             a.estado_transcripcion = Acta.ESTADO_ERROR
             a.save()
+            publicar_estado_acta(a)
         except:
             pass
-        return f"Error procesando: {e}"
\ No newline at end of file
+        return f"Error procesando: {e}"
+
+
+@shared_task(name="medir_precision_transcripcion")
+def medir_precision_transcripcion(acta_pk):
+    """Calcula el WER del acta aprobada contra su transcripción automática."""
+    from .calidad import medir_precision
+
+    acta = Acta.objects.filter(pk=acta_pk, aprobada=True).first()
+    if not acta or not acta.transcripcion_automatica.strip():
+        return f"Acta {acta_pk} sin transcripción automática que medir."
+
+    inicio = time.perf_counter()
+    medida = medir_precision(acta.contenido, acta.transcripcion_automatica)
+    Acta.objects.filter(pk=acta_pk).update(
+        palabras_referencia=medida["palabras"],
+        errores_transcripcion=medida["errores"],
+        precision_transcripcion=medida["precision"],
+    )
+    logger.info(
+        f"Acta {acta_pk}: WER {medida['wer']:.3f} ({medida['errores']}/{medida['palabras']} palabras) "
+        f"en {time.perf_counter() - inicio:.2f}s"
+    )
+    return f"Acta {acta_pk}: precisión {medida['precision']}%."
+
+
+@shared_task(name="generar_pdf_acta")
+def generar_pdf_acta(acta_pk):
+    """Genera (y firma, si hay certificado) el PDF del acta aprobada una sola vez."""
+    from .pdf import generar_pdf_aprobado
+
+    acta = Acta.objects.select_related("reunion").filter(pk=acta_pk, aprobada=True).first()
+    if not acta:
+        return f"Acta {acta_pk} no aprobada."
+
+    inicio = time.perf_counter()
+    nombre = generar_pdf_aprobado(acta)
+    if not nombre:
+        return f"Acta {acta_pk}: no se pudo generar el PDF."
+    logger.info(f"Acta {acta_pk}: PDF {nombre} listo en {time.perf_counter() - inicio:.2f}s")
+    return f"Acta {acta_pk}: {nombre}."
+
+
+@shared_task(name="comprimir_audio_acta")
+def comprimir_audio_acta(acta_pk):
+    """
+    Tras la transcripción: guarda una copia liviana en Opus (voz) junto a su
+    forma de onda. El original se conserva salvo que GRABACIONES_BORRAR_ORIGINAL.
+    """
+    from .audio_comprimido import comprimir_audio
+
+    acta = Acta.objects.filter(pk=acta_pk).first()
+    if not acta or not acta.archivo_audio:
+        return f"Acta {acta_pk} sin audio."
+    original = acta.archivo_audio.name
+    if acta.audio_comprimido and acta.audio_comprimido.name == original:
+        return f"Acta {acta_pk}: el audio ya está comprimido."
+
+    storage = acta.archivo_audio.storage
+    bytes_original = storage.size(original)
+    resultado = comprimir_audio(acta.archivo_audio, storage, f"audios_reuniones/opus/acta-{acta_pk}.ogg")
+    nuevo = resultado["nombre"]
+
+    # Si no se gana espacio (ya era Opus de bajo bitrate) se conserva el original
+    reemplazar = resultado["bytes"] < bytes_original * 0.9
+    with transaction.atomic():
+        acta = Acta.objects.select_for_update().get(pk=acta_pk)
+        if acta.archivo_audio.name != original:
+            storage.delete(nuevo)  # Se subió otro audio mientras tanto
+            return f"Acta {acta_pk}: el audio cambió durante la compresión."
+
+        anterior = acta.audio_comprimido.name if acta.audio_comprimido else ""
+        acta.picos_audio = resultado["picos"]
+        acta.duracion_audio_s = resultado["duracion_s"]
+        if reemplazar:
+            acta.audio_comprimido.name = nuevo
+            if settings.GRABACIONES_BORRAR_ORIGINAL:
+                acta.archivo_audio.name = nuevo
+                acta.huella_audio = ""  # La huella era del archivo original
+        acta.save()
+
+    if reemplazar:  # La versión comprimida anterior (y el original, si así se configuró) ya no se usa
+        for nombre in {anterior, original if settings.GRABACIONES_BORRAR_ORIGINAL else ""} - {"", nuevo}:
+            storage.delete(nombre)
+    else:  # audio_comprimido sigue apuntando a 'anterior': solo sobra lo recién generado
+        storage.delete(nuevo)
+
+    logger.info(
+        f"Acta {acta_pk}: audio {bytes_original / 1e6:.1f} MB -> Opus {resultado['bytes'] / 1e6:.1f} MB"
+        + ("" if reemplazar else " (se conserva el original)")
+    )
+    return f"Acta {acta_pk} comprimida."
+
+
+def encolar_compresion_audio(acta): # La compresión no debe afectar el resultado de la transcripción
+    try:
+        comprimir_audio_acta.delay(acta.pk)
+    except Exception as e:
+        logger.error(f"No se pudo encolar la compresión del audio del acta {acta.pk}: {e}")
+
+
+@shared_task(name="completar_grabaciones_en_vivo")
+def completar_grabaciones_en_vivo(acta_pk):
+    """
+    Respaldo al finalizar la reunión: cierra las grabaciones en vivo que su
+    conexión no alcanzó a cerrar (con las partes ya subidas) y las pasa al acta.
+    """
+    from .grabacion_en_vivo import completar_grabacion, consolidar_en_acta
+
+    activas = GrabacionEnVivo.objects.filter(acta_id=acta_pk, estado=GrabacionEnVivo.ESTADO_ACTIVA)
+    for grabacion_pk in activas.values_list("pk", flat=True):
+        logger.warning(f"Completando grabación en vivo {grabacion_pk} sin su conexión")
+        completar_grabacion(grabacion_pk)
+    consolidar_en_acta(acta_pk)
+    return f"Grabaciones en vivo del acta {acta_pk} consolidadas."
+
+
+def _worker_transcribe(sender): # ¿El worker consume la cola de transcripción?
+    from proyecto_tesis.celery import colas_del_worker
+    app = getattr(sender, "app", None)
+    return app is None or "cpu" in colas_del_worker(app)
+
+
+@worker_init.connect
+def precargar_modelo_vosk(sender=None, **kwargs):
+    """
+    Carga el modelo en el proceso principal del worker antes de crear el pool,
+    así los procesos de transcripción (fork) lo heredan compartido en vez de cargar uno cada uno.
+    Solo en los workers de la cola cpu: los de io y analitica no transcriben.
+    """
+    if not settings.VOSK_PRECARGAR or not _worker_transcribe(sender):
+        return
+    try:
+        precargar_modelo()
+        datos = estadisticas()
+        logger.info(
+            f"Worker listo con modelo Vosk precargado: {datos['segundos_carga']:.2f}s, "
+            f"RSS {datos['rss_actual_mb'] or 0:.0f} MB"
+        )
+    except Exception as e:
+        # El worker sigue arrancando; el modelo se intentará cargar en la primera tarea
+        logger.error(f"No se pudo precargar el modelo Vosk: {e}")
+
+
+@worker_ready.connect
+def reanudar_transcripciones_interrumpidas(sender=None, **kwargs):
+    """
+    Al arrancar un worker de la cola cpu, re-encola las actas que quedaron en
+    PROCESANDO sin avances recientes (el worker anterior murió a mitad del trabajo).
+    Las que esperan en la cola o un reintento aún no tienen checkpoint viejo, y las
+    que otro worker está transcribiendo tienen el candado tomado.
+    """
+    if not _worker_transcribe(sender):
+        return
+    try:
+        limite = timezone.now() - timedelta(seconds=settings.TRANSCRIPCION_REANUDAR_TRAS_SEGUNDOS)
+        actas = (
+            Acta.objects
+            .filter(estado_transcripcion=Acta.ESTADO_PROCESANDO, trabajo_transcripcion__actualizado__lt=limite)
+            .values_list("pk", flat=True)
+        )
+        for acta_pk in actas:
+            if cache.get(clave_transcripcion(acta_pk)) is not None:
+                continue
+            logger.info(f"Re-encolando transcripción interrumpida del acta {acta_pk}")
+            procesar_audio_vosk.delay(acta_pk)
+    except Exception as e:
+        logger.error(f"No se pudieron revisar transcripciones interrumpidas: {e}")
@@ -1,3 +1,744 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import io
+import shutil
+import tempfile
+import uuid
+import wave
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import ffmpeg
+import numpy as np
+
+from .almacenamiento import EscritorMultipart
+from .audio_comprimido import AcumuladorPicos, comprimir_audio
+from .calidad import distancia_palabras, medir_precision
+from .estado_acta import grupo_acta
+from .grabacion_en_vivo import cabecera_wav_streaming
+from .indice_palabras import _a_bytes, coincidencias_frase, normalizar
+from .models import (
+    Acta, ActaEmailLog, GrabacionEnVivo, IndicePalabra, Reunion, SubidaAudio, TrabajoTranscripcion, TramoTranscripcion,
+)
+from .pdf import generar_pdf_aprobado, huella_acta, pdf_vigente
+from .subida_audio import SubidaInvalida, completar_subida, guardar_parte_local, iniciar_subida, partes_subidas
+from .routing import websocket_urlpatterns
+from .transcripcion import (
+    BYTES_POR_MUESTRA, SAMPLE_RATE, RecortadorSilencios, saltar_bytes, segmentar_por_silencio,
+    trocear_pcm, unir_resultados,
+)
+
+
+def _pcm_tono(segundos, amplitud=8000): # Genera un tono de 440 Hz en PCM16
+    t = np.arange(int(segundos * SAMPLE_RATE)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 440 * t) * amplitud).astype(np.int16).tobytes()
+
+
+def _pcm_silencio(segundos):
+    return bytes(int(segundos * SAMPLE_RATE) * BYTES_POR_MUESTRA)
+
+
+# ==========================================
+# PRUEBAS UNITARIAS - Transcripción por segmentos
+# ==========================================
+class SegmentacionSilencioTest(SimpleTestCase):
+    def test_corta_en_el_silencio(self):
+        """El corte debe caer dentro del tramo de silencio más cercano al objetivo."""
+        pcm = _pcm_tono(8) + _pcm_silencio(1) + _pcm_tono(8)
+        segmentos = list(segmentar_por_silencio(trocear_pcm(pcm), duracion_objetivo_s=10, margen_s=4))
+
+        self.assertEqual(len(segmentos), 2)
+        corte_s = len(segmentos[0][2]) / (SAMPLE_RATE * BYTES_POR_MUESTRA)
+        self.assertGreaterEqual(corte_s, 8.0)
+        self.assertLessEqual(corte_s, 9.0)
+
+    def test_segmentos_contiguos_y_completos(self):
+        """Los segmentos deben cubrir todo el audio, en orden y sin solaparse."""
+        pcm = (_pcm_tono(3) + _pcm_silencio(0.5)) * 6
+        segmentos = list(segmentar_por_silencio(trocear_pcm(pcm), duracion_objetivo_s=4, margen_s=1))
+
+        self.assertEqual(b"".join(s[2] for s in segmentos), pcm)
+        self.assertEqual([s[0] for s in segmentos], list(range(len(segmentos))))
+        offset = 0.0
+        for _, offset_s, seg in segmentos:
+            self.assertAlmostEqual(offset_s, offset)
+            offset += len(seg) / (SAMPLE_RATE * BYTES_POR_MUESTRA)
+
+    def test_unir_resultados_respeta_orden(self):
+        """La unión concatena textos y palabras en el orden recibido."""
+        resultados = [
+            {"texto": "buenas tardes", "palabras": [{"word": "buenas", "start": 0.1, "end": 0.4}], "segundos": 5},
+            {"texto": "", "palabras": [], "segundos": 2},
+            {"texto": "se abre la sesión", "palabras": [{"word": "se", "start": 7.2, "end": 7.3}], "segundos": 4},
+        ]
+        unido = unir_resultados(resultados)
+
+        self.assertEqual(unido["texto"], "buenas tardes se abre la sesión")
+        self.assertEqual([p["word"] for p in unido["palabras"]], ["buenas", "se"])
+        self.assertEqual(unido["segundos"], 11)
+
+    def test_saltar_bytes_reanuda_en_la_posicion_exacta(self):
+        """Al reanudar desde un checkpoint se descarta exactamente lo ya transcrito."""
+        pcm = _pcm_tono(2)
+        bloques = trocear_pcm(pcm, frames=1000)
+
+        self.assertEqual(b"".join(saltar_bytes(bloques, 12345)), pcm[12345:])
+
+
+    def test_vad_descarta_silencio_y_mantiene_tiempos(self):
+        """El VAD quita el ruido de fondo y el mapa devuelve los tiempos originales."""
+        ruido = np.random.default_rng(0).normal(0, 30, 5 * SAMPLE_RATE).astype(np.int16).tobytes()
+        pcm = ruido + _pcm_tono(2) + ruido + _pcm_tono(2) + ruido
+        vad = RecortadorSilencios(trocear_pcm(pcm))
+        recortado = b"".join(vad)
+
+        self.assertLess(len(recortado), len(pcm) / 2)
+        self.assertEqual(vad.bytes_entrada, len(pcm))
+        # El último audio entregado es el final del segundo tono (14 s) más el margen de 0,5 s
+        fin_salida = len(recortado) / (SAMPLE_RATE * BYTES_POR_MUESTRA)
+        self.assertAlmostEqual(vad.a_original_s(fin_salida), 14.5, delta=0.1)
+        self.assertAlmostEqual(vad.a_original_s(0.0), 5.0 - 0.3, delta=0.1)
+
+class _UsuarioPrueba: # Usuario mínimo para el scope del WebSocket
+    is_authenticated = True
+    is_superuser = True
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    STT_GRABAR_AUDIO=False,
+)
+class TranscripcionEnVivoTest(SimpleTestCase):
+    def _comunicador(self, ruta, user):
+        comunicador = WebsocketCommunicator(URLRouter(websocket_urlpatterns), ruta)
+        comunicador.scope["user"] = user
+        return comunicador
+
+    def test_oyente_recibe_textos_sin_reconocedor(self):
+        """El oyente se une al grupo de la reunión y recibe los textos finales."""
+        async def escenario():
+            oyente = self._comunicador("/ws/transcribir/7/escuchar/", _UsuarioPrueba())
+            conectado, _ = await oyente.connect()
+            self.assertTrue(conectado)
+            await oyente.receive_json_from()  # Mensaje de estado
+
+            await get_channel_layer().group_send(
+                "reunion-7", {"type": "stt_broadcast", "payload": {"type": "final", "text": "hola"}}
+            )
+            self.assertEqual(await oyente.receive_json_from(), {"type": "final", "text": "hola"})
+            await oyente.disconnect()
+
+        async_to_sync(escenario)()
+
+    def test_estado_del_acta_llega_por_el_grupo(self):
+        """La página recibe el estado actual al conectar y luego los eventos de la tarea."""
+        async def estado_actual(acta_pk):
+            return {"estado": "PROCESANDO", "estado_display": "Procesando", "progreso": 10.0, "eta_segundos": 60}
+
+        async def escenario():
+            with mock.patch("reuniones.consumers._estado_actual", estado_actual):
+                pagina = self._comunicador("/ws/actas/5/estado/", _UsuarioPrueba())
+                conectado, _ = await pagina.connect()
+                self.assertTrue(conectado)
+                self.assertEqual((await pagina.receive_json_from())["progreso"], 10.0)
+
+                await get_channel_layer().group_send(
+                    grupo_acta(5), {"type": "acta_estado", "payload": {"estado": "COMPLETADO"}}
+                )
+                self.assertEqual(await pagina.receive_json_from(), {"estado": "COMPLETADO"})
+                await pagina.disconnect()
+
+        async_to_sync(escenario)()
+
+    def test_solo_un_hablante_por_reunion(self):
+        """Si la reunión ya tiene hablante, la nueva conexión se cierra con 4009."""
+        async def escenario():
+            await cache.aset("stt-hablante-8", "otro-canal")
+            hablante = self._comunicador("/ws/transcribir/8/", _UsuarioPrueba())
+            await hablante.connect()
+            self.assertIn("hablante activo", (await hablante.receive_json_from())["msg"])
+            self.assertEqual((await hablante.receive_output())["code"], 4009)
+
+        async_to_sync(escenario)()
+
+    def test_anonimo_no_puede_escuchar(self):
+        """Los oyentes deben estar autenticados y tener permiso para ver actas."""
+        async def escenario():
+            oyente = self._comunicador("/ws/transcribir/9/escuchar/", AnonymousUser())
+            conectado, _ = await oyente.connect()
+            self.assertFalse(conectado)
+
+        async_to_sync(escenario)()
+
+    def test_hablante_agrupa_frames_en_orden(self):
+        """Los frames pequeños se juntan en bloques mayores sin perder el orden."""
+        recibidos = []
+
+        class ReconocedorFalso:
+            def __init__(self, *args): pass
+            def SetWords(self, valor): pass
+            def AcceptWaveform(self, data):
+                recibidos.append(data)
+                return False
+            def PartialResult(self):
+                return '{"partial": ""}'
+
+        async def escenario():
+            hablante = self._comunicador("/ws/transcribir/10/", _UsuarioPrueba())
+            await hablante.connect()
+            await hablante.receive_json_from()  # Mensaje de estado
+            frames = [bytes([i]) * 640 for i in range(20)]  # 20 ms cada uno
+            for frame in frames:
+                await hablante.send_to(bytes_data=frame)
+            await asyncio.sleep(0.5)
+            await hablante.disconnect()
+            return frames
+
+        with mock.patch("vosk.KaldiRecognizer", ReconocedorFalso), \
+                mock.patch("reuniones.modelo_vosk.modelo_cargado", return_value=True), \
+                mock.patch("reuniones.modelo_vosk.obtener_modelo", return_value=object()):
+            frames = async_to_sync(escenario)()
+
+        self.assertEqual(b"".join(recibidos), b"".join(frames))
+        self.assertLess(len(recibidos), len(frames))
+
+    @skipUnless(shutil.which("ffmpeg"), "requiere ffmpeg")
+    def test_hablante_opus_se_decodifica_a_pcm(self):
+        """Con ?formato=webm el audio Opus llega al reconocedor como PCM 16 kHz."""
+        webm, _ = (
+            ffmpeg.input("pipe:0", format="s16le", ar=str(SAMPLE_RATE), ac=1)
+            .output("pipe:1", format="webm", acodec="libopus", audio_bitrate="24k")
+            .global_args("-hide_banner", "-loglevel", "error")
+            .run(input=_pcm_tono(2), capture_stdout=True)
+        )
+        recibidos = []
+
+        class ReconocedorFalso:
+            def __init__(self, modelo, rate):
+                self.rate = rate
+            def SetWords(self, valor): pass
+            def AcceptWaveform(self, data):
+                recibidos.append(data)
+                return False
+            def PartialResult(self):
+                return '{"partial": ""}'
+
+        async def escenario():
+            hablante = self._comunicador("/ws/transcribir/11/?formato=webm", _UsuarioPrueba())
+            await hablante.connect()
+            estado = await hablante.receive_json_from()
+            for i in range(0, len(webm), 1000):  # Como los fragmentos de MediaRecorder
+                await hablante.send_to(bytes_data=webm[i:i + 1000])
+            await asyncio.sleep(1.5)
+            await hablante.disconnect()
+            return estado
+
+        with mock.patch("vosk.KaldiRecognizer", ReconocedorFalso), \
+                mock.patch("reuniones.modelo_vosk.modelo_cargado", return_value=True), \
+                mock.patch("reuniones.modelo_vosk.obtener_modelo", return_value=object()):
+            estado = async_to_sync(escenario)()
+
+        self.assertEqual((estado["formato"], estado["rate"]), ("webm", SAMPLE_RATE))
+        self.assertGreater(len(b"".join(recibidos)), 1.5 * SAMPLE_RATE * BYTES_POR_MUESTRA)
+
+
+class GrabacionEnVivoTest(SimpleTestCase):
+    def test_partes_forman_un_wav_legible(self):
+        """Cabecera WAV de streaming + partes agregadas = archivo WAV válido."""
+        pcm = _pcm_tono(1)
+        with tempfile.TemporaryDirectory() as carpeta:
+            storage = FileSystemStorage(location=carpeta)
+            escritor = EscritorMultipart(storage, "en_vivo/prueba.wav", "audio/wav")
+            escritor.iniciar()
+            escritor.subir_parte(cabecera_wav_streaming(SAMPLE_RATE) + pcm[:10000])
+            escritor.subir_parte(pcm[10000:])
+            escritor.completar()
+
+            with wave.open(storage.path(escritor.nombre), "rb") as wf:
+                self.assertEqual((wf.getframerate(), wf.getnchannels(), wf.getsampwidth()), (SAMPLE_RATE, 1, 2))
+                self.assertEqual(wf.readframes(SAMPLE_RATE * 2), pcm)
+        self.assertEqual([p["PartNumber"] for p in escritor.partes], [1, 2])
+
+    def test_sin_conexion_los_respaldos_forman_la_ultima_parte(self):
+        """Si la conexión muere antes de juntar 5 MB, el audio de los tramos de respaldo no se pierde."""
+        from . import grabacion_en_vivo
+
+        storage = FileSystemStorage(location=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, storage.location)
+        escritor = EscritorMultipart(storage, "en_vivo/r.webm", "audio/webm")
+        escritor.iniciar()
+        grabacion = GrabacionEnVivo(pk=1, archivo=escritor.nombre, formato="webm")
+        with mock.patch.object(grabacion_en_vivo, "default_storage", storage), \
+                mock.patch.object(GrabacionEnVivo.objects, "get", return_value=grabacion), \
+                mock.patch.object(GrabacionEnVivo.objects, "filter") as actualizar, \
+                mock.patch.object(grabacion, "save"):
+            for tramo in (b"uno-", b"dos"):
+                grabacion_en_vivo.guardar_respaldo(1, tramo)
+                grabacion.respaldos = actualizar.return_value.update.call_args.kwargs["respaldos"]
+            respaldos = list(grabacion.respaldos)
+            grabacion_en_vivo.completar_grabacion(1)
+
+        with storage.open(escritor.nombre, "rb") as f:
+            self.assertEqual(f.read(), b"uno-dos")
+        self.assertEqual(grabacion.estado, GrabacionEnVivo.ESTADO_COMPLETADA)
+        self.assertFalse(any(storage.exists(n) for n in respaldos))
+
+    def test_no_reemplaza_el_audio_ni_toca_un_acta_aprobada(self):
+        """Consolidar conserva el audio que el acta ya tenía y no modifica un acta aprobada."""
+        from . import grabacion_en_vivo
+
+        grabacion = GrabacionEnVivo(pk=2, archivo="en_vivo/b.webm", estado=GrabacionEnVivo.ESTADO_COMPLETADA, texto="Hola")
+        for aprobada in (False, True):
+            acta = Acta(reunion_id=3, archivo_audio="audios_reuniones/subido.webm", contenido="", aprobada=aprobada)
+            relacion = mock.MagicMock()
+            relacion.filter.return_value.exclude.return_value = [grabacion]
+            with mock.patch.object(Acta.objects, "select_for_update") as bloqueo, \
+                    mock.patch.object(Acta, "grabaciones_en_vivo", new=relacion), \
+                    mock.patch.object(grabacion_en_vivo.transaction, "atomic"), \
+                    mock.patch.object(GrabacionEnVivo.objects, "filter"), \
+                    mock.patch.object(grabacion_en_vivo, "publicar_estado_acta"), \
+                    mock.patch.object(grabacion_en_vivo, "encolar_compresion_audio") as comprimir, \
+                    mock.patch.object(acta, "save") as guardar:
+                bloqueo.return_value.get.return_value = acta
+                with self.assertLogs("reuniones.grabacion_en_vivo", "INFO"):  # Se informa lo que no se incorporó
+                    self.assertEqual(grabacion_en_vivo.consolidar_en_acta(3), not aprobada)
+            self.assertEqual(acta.archivo_audio.name, "audios_reuniones/subido.webm")
+            comprimir.assert_not_called()
+            self.assertEqual(guardar.called, not aprobada)
+
+
+class IndicePalabrasTest(SimpleTestCase):
+    def test_normalizar_quita_tildes_y_conserva_ene(self):
+        """Los términos del índice no dependen de mayúsculas, tildes ni puntuación."""
+        self.assertEqual(normalizar("Presupuésto,"), "presupuesto")
+        self.assertEqual(normalizar("AÑO"), "año")
+
+    def test_frase_solo_coincide_con_palabras_seguidas(self):
+        """Una frase coincide solo donde sus términos aparecen consecutivos."""
+        # "junta de vecinos ... de la junta de vecinos": posiciones 0-2 y 6-8
+        def entrada(posiciones, inicios):
+            return IndicePalabra(posiciones=_a_bytes(posiciones, "<u4"), inicios_ms=_a_bytes(inicios, "<u4"))
+
+        junta = entrada([0, 7], [0, 7000])
+        de = entrada([1, 4, 8], [1000, 4000, 8000])
+        vecinos = entrada([2, 9], [2000, 9000])
+        self.assertEqual(coincidencias_frase([junta, de, vecinos]), [0.0, 7.0])
+        self.assertEqual(coincidencias_frase([vecinos, junta]), [])
+
+
+class BusquedaActasTest(TestCase):
+    def test_busqueda_encuentra_palabras_editadas_en_actas_indexadas(self):
+        """Una palabra que la directiva agregó al acta (no está en el índice) se busca en el contenido de todas las actas."""
+        from .api import ActaViewSet
+        from .indice_palabras import indexar_acta
+
+        reunion = Reunion.objects.create(titulo="Asamblea", tabla="Cuentas", fecha=timezone.now())
+        acta = Acta.objects.create(reunion=reunion, contenido="Informe de tesorería aprobado por la asamblea.")
+        indexar_acta(acta, [{"word": "informe", "start": 0.0, "end": 0.4}, {"word": "aprobado", "start": 0.5, "end": 0.9}])
+        otra = Acta.objects.create(
+            reunion=Reunion.objects.create(titulo="Otra", tabla="-", fecha=timezone.now()), contenido="Sin novedades.",
+        )
+
+        vista = ActaViewSet()
+        vista.request = SimpleNamespace(query_params={"search": "tesorería"})
+        encontradas = list(vista.get_queryset())
+
+        self.assertTrue(IndicePalabra.objects.filter(acta=acta).exists())
+        self.assertIn(acta, encontradas)
+        self.assertNotIn(otra, encontradas)
+
+
+class PrecisionTranscripcionTest(SimpleTestCase):
+    def test_distancia_igual_a_la_definicion(self):
+        """La versión vectorizada coincide con Levenshtein celda por celda."""
+        def levenshtein(a, b):
+            previa = list(range(len(b) + 1))
+            for i, x in enumerate(a, start=1):
+                actual = [i]
+                for j, y in enumerate(b, start=1):
+                    actual.append(min(previa[j] + 1, actual[j - 1] + 1, previa[j - 1] + (x != y)))
+                previa = actual
+            return previa[-1]
+
+        rng = np.random.default_rng(7)
+        for _ in range(50):
+            a = list(rng.choice(["la", "junta", "de", "vecinos"], size=rng.integers(0, 12)))
+            b = list(rng.choice(["la", "junta", "de", "vecinos"], size=rng.integers(0, 12)))
+            self.assertEqual(distancia_palabras(a, b), levenshtein(a, b))
+
+    def test_wer_ignora_mayusculas_y_puntuacion(self):
+        """Tildes, mayúsculas y puntuación no cuentan como errores; sí las palabras cambiadas u omitidas."""
+        medida = medir_precision("Se aprobó el presupuesto anual.", "se aprobo el presupuesto")
+        self.assertEqual((medida["palabras"], medida["errores"]), (5, 1))
+        medida = medir_precision("Se aprobó el presupuesto anual.", "se reprobó presupuesto anual")
+        self.assertEqual(medida["errores"], 2)
+        self.assertAlmostEqual(medida["precision"], 60.0)
+
+
+class SubidaAudioTest(SimpleTestCase):
+    def test_partes_en_desorden_se_ensamblan_al_completar(self):
+        """Con almacenamiento local las partes llegan en cualquier orden y solo se unen al final."""
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        storage = FileSystemStorage(location=directorio)
+        storage.save("audios_reuniones/a.wav", io.BytesIO(b""))
+
+        contenido = b"0123456789AB"
+        subida = SubidaAudio(archivo="audios_reuniones/a.wav", tamano=len(contenido), tamano_parte=5)
+        with mock.patch("reuniones.subida_audio.default_storage", storage):
+            guardar_parte_local(subida, 3, io.BytesIO(contenido[10:]))
+            guardar_parte_local(subida, 1, io.BytesIO(contenido[:5]))
+            self.assertEqual([p["PartNumber"] for p in partes_subidas(subida)], [1, 3])
+
+            with self.assertRaises(SubidaInvalida):  # Parte incompleta: no cuenta
+                guardar_parte_local(subida, 2, io.BytesIO(contenido[5:8]))
+            with mock.patch.object(subida, "save"), self.assertRaises(SubidaInvalida):
+                completar_subida(subida)
+
+            guardar_parte_local(subida, 2, io.BytesIO(contenido[5:10]))
+            with mock.patch.object(subida, "save"):
+                completar_subida(subida)
+
+        with open(storage.path("audios_reuniones/a.wav"), "rb") as f:
+            self.assertEqual(f.read(), contenido)
+        self.assertEqual(subida.estado, SubidaAudio.ESTADO_COMPLETADA)
+
+
+    def test_subidas_simultaneas_con_el_mismo_nombre_no_comparten_objeto(self):
+        """Cada subida escribe en su propia clave (acta y subida), aunque el archivo se llame igual."""
+        storage = FileSystemStorage(location=tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, storage.location)
+        en_curso = mock.MagicMock()  # Ninguna subida previa que retomar
+        en_curso.filter.return_value.order_by.return_value.first.return_value = None
+        nombres = []
+        for acta_pk, subida_pk in ((1, 10), (2, 11)):
+            subida = SubidaAudio(pk=subida_pk)
+            with mock.patch("reuniones.subida_audio.default_storage", storage), \
+                    mock.patch.object(SubidaAudio.objects, "filter", return_value=en_curso), \
+                    mock.patch.object(SubidaAudio.objects, "create", return_value=subida), \
+                    mock.patch.object(subida, "save"):
+                nombres.append(iniciar_subida(SimpleNamespace(pk=acta_pk), None, "grabacion.webm", 100).archivo)
+        self.assertEqual(nombres, ["audios_reuniones/acta-1-10-grabacion.webm", "audios_reuniones/acta-2-11-grabacion.webm"])
+
+    def test_cache_de_transcripcion_calcula_la_huella_si_falta(self):
+        """El audio subido por partes llega sin huella: se calcula desde el almacenamiento antes de buscar en la caché."""
+        from . import tasks
+
+        acta = Acta(reunion_id=3, archivo_audio="audios_reuniones/a.webm", huella_audio="")
+        with mock.patch.object(tasks, "huella_almacenada", return_value="ab" * 32) as huella, \
+                mock.patch.object(Acta.objects, "filter") as guardar, \
+                mock.patch.object(tasks.TranscripcionCache, "buscar", return_value=None) as buscar:
+            self.assertFalse(tasks.aplicar_cache_transcripcion(acta))
+        huella.assert_called_once_with(acta.archivo_audio)
+        guardar.return_value.update.assert_called_once_with(huella_audio="ab" * 32)
+        self.assertEqual(buscar.call_args.args[0], "ab" * 32)
+
+
+class CompresionAudioTest(SimpleTestCase):
+    def test_picos_no_dependen_del_tamano_de_bloque(self):
+        """Los tramos que cruzan dos bloques PCM se calculan igual que con el audio entero."""
+        muestras = (np.random.default_rng(3).normal(0, 3000, 16000 * 3 + 700)).astype("<i2")
+        entero, por_bloques = AcumuladorPicos(), AcumuladorPicos()
+        entero.agregar(muestras.tobytes())
+        for i in range(0, len(muestras), 777):
+            por_bloques.agregar(muestras[i:i + 777].tobytes())
+        self.assertEqual(entero.resultado(), por_bloques.resultado())
+        self.assertEqual(len(por_bloques.resultado()), 31)  # 3 s a 10 picos/s + el tramo final
+
+    @skipUnless(shutil.which("ffmpeg"), "requiere ffmpeg")
+    def test_wav_se_comprime_a_opus_con_forma_de_onda(self):
+        """El WAV pasa a Ogg/Opus mucho más liviano, con la duración y los picos del audio."""
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        storage = FileSystemStorage(location=directorio)
+
+        t = np.arange(16000 * 4) / 16000
+        tono = (np.sin(2 * np.pi * 300 * t) * 8000 * (t < 2)).astype("<i2")  # 2 s de tono y 2 s de silencio
+        wav = io.BytesIO()
+        with wave.open(wav, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(16000)
+            wf.writeframes(tono.tobytes())
+        original = storage.save("audios_reuniones/original.wav", io.BytesIO(wav.getvalue()))
+
+        archivo = SimpleNamespace(storage=storage, name=original)  # Como un FieldFile
+        resultado = comprimir_audio(archivo, storage, "audios_reuniones/opus/acta-1.ogg")
+        self.assertLess(resultado["bytes"], len(wav.getvalue()) / 5)
+        with storage.open(resultado["nombre"], "rb") as f:
+            self.assertEqual(f.read(4), b"OggS")
+        self.assertAlmostEqual(resultado["duracion_s"], 4.0, delta=0.05)
+        picos = np.frombuffer(resultado["picos"], dtype="u1")
+        self.assertGreater(picos[:15].min(), 200)  # Tono
+        self.assertLess(picos[25:].max(), 10)  # Silencio
+
+
+    @override_settings(GRABACIONES_BORRAR_ORIGINAL=False)
+    def test_sin_ahorro_se_conserva_la_copia_comprimida_anterior(self):
+        """Si la nueva copia no ahorra espacio se borra solo ella; el original y la copia vigente quedan."""
+        from . import tasks
+
+        storage = mock.MagicMock()
+        storage.size.return_value = 1000
+        acta = Acta(reunion_id=5, archivo_audio="audios_reuniones/a.ogg", audio_comprimido="audios_reuniones/opus/acta-5.ogg")
+        for campo in (acta.archivo_audio, acta.audio_comprimido):
+            campo.storage = storage
+        resultado = {"nombre": "audios_reuniones/opus/acta-5_x.ogg", "bytes": 950, "picos": b"", "duracion_s": 1.0}
+
+        with mock.patch.object(Acta.objects, "filter") as consulta, \
+                mock.patch.object(Acta.objects, "select_for_update") as bloqueo, \
+                mock.patch("reuniones.audio_comprimido.comprimir_audio", return_value=resultado), \
+                mock.patch.object(tasks.transaction, "atomic"), \
+                mock.patch.object(acta, "save"):
+            consulta.return_value.first.return_value = acta
+            bloqueo.return_value.get.return_value = acta
+            tasks.comprimir_audio_acta(5)
+
+        storage.delete.assert_called_once_with("audios_reuniones/opus/acta-5_x.ogg")
+        self.assertEqual(acta.audio_comprimido.name, "audios_reuniones/opus/acta-5.ogg")
+        self.assertEqual(acta.archivo_audio.name, "audios_reuniones/a.ogg")
+
+
+@override_settings(CORREO_ACTA_LOTE=2, CORREO_ACTA_CONCURRENCIA=2)
+class EnvioActaCorreoTest(TestCase):
+    def setUp(self):
+        reunion = Reunion.objects.create(titulo="Asamblea", tabla="Cuentas", fecha=timezone.now())
+        self.acta = Acta.objects.create(reunion=reunion, contenido="Se aprueba el presupuesto.")
+        self.lote = uuid.uuid4()
+        for correo in ("a@x.cl", "b@x.cl", "c@x.cl"):
+            ActaEmailLog.objects.create(acta=self.acta, lote=self.lote, destinatario=correo)
+        # Ya enviado en un intento anterior del mismo lote, y una fila de otro envío
+        ActaEmailLog.objects.create(acta=self.acta, lote=self.lote, destinatario="d@x.cl", estado=ActaEmailLog.ESTADO_ENVIADO)
+        ActaEmailLog.objects.create(acta=self.acta, lote=uuid.uuid4(), destinatario="e@x.cl")
+
+    def _estados(self):
+        return dict(ActaEmailLog.objects.values_list("destinatario", "estado"))
+
+    def test_pdf_se_codifica_una_vez_y_el_log_se_actualiza_por_grupo(self):
+        """El adjunto se codifica una sola vez y cada grupo guarda en bloque solo los resultados que tuvo."""
+        from . import tasks
+
+        with mock.patch("reuniones.pdf.pdf_acta", return_value=b"%PDF-1.4") as pdf, \
+                mock.patch.object(tasks, "codificar_adjunto", wraps=tasks.codificar_adjunto) as codificar, \
+                mock.patch.object(tasks, "enviar_correo_via_webhook", side_effect=lambda **k: k["to_email"] != "b@x.cl") as webhook, \
+                CaptureQueriesContext(connection) as consultas:
+            resultado = tasks.enviar_acta_por_correo.apply(args=[self.acta.pk, str(self.lote)]).get()
+
+        pdf.assert_called_once()
+        codificar.assert_called_once()
+        self.assertEqual(sorted(llamada.kwargs["to_email"] for llamada in webhook.call_args_list), ["a@x.cl", "b@x.cl", "c@x.cl"])
+        self.assertEqual(len({id(llamada.kwargs["adjunto"]) for llamada in webhook.call_args_list}), 1)
+        self.assertEqual(self._estados(), {
+            "a@x.cl": ActaEmailLog.ESTADO_ENVIADO, "b@x.cl": ActaEmailLog.ESTADO_FALLIDO,
+            "c@x.cl": ActaEmailLog.ESTADO_ENVIADO, "d@x.cl": ActaEmailLog.ESTADO_ENVIADO,
+            "e@x.cl": ActaEmailLog.ESTADO_PENDIENTE,
+        })
+        # Grupo [a, b]: un éxito y un fallo; grupo [c]: solo éxitos, sin actualización vacía
+        actualizaciones = [q for q in consultas.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(actualizaciones), 3)
+        self.assertIn("2 de 3", resultado)
+
+    def test_error_se_reintenta_y_al_final_marca_los_pendientes(self):
+        """Un error inesperado se reintenta; agotados los reintentos, las filas pendientes del lote quedan FALLIDO."""
+        from . import tasks
+
+        with mock.patch("reuniones.pdf.pdf_acta_guardado", side_effect=OSError("almacenamiento caído")) as pdf, \
+                mock.patch.object(tasks, "enviar_correo_via_webhook") as webhook, \
+                self.assertLogs("reuniones.tasks", "ERROR"):
+            tasks.enviar_acta_por_correo.apply(args=[self.acta.pk, str(self.lote)])
+
+        self.assertEqual(pdf.call_count, tasks.enviar_acta_por_correo.max_retries + 1)
+        webhook.assert_not_called()
+        self.assertEqual(self._estados(), {
+            "a@x.cl": ActaEmailLog.ESTADO_FALLIDO, "b@x.cl": ActaEmailLog.ESTADO_FALLIDO,
+            "c@x.cl": ActaEmailLog.ESTADO_FALLIDO, "d@x.cl": ActaEmailLog.ESTADO_ENVIADO,
+            "e@x.cl": ActaEmailLog.ESTADO_PENDIENTE,
+        })
+        self.assertEqual(ActaEmailLog.objects.filter(error="almacenamiento caído").count(), 3)
+
+    def test_migracion_separa_los_envios_antiguos_por_destinatario(self):
+        """Cada fila antigua con varios correos queda en una fila por destinatario, con su lote y como ENVIADO."""
+        from django.apps import apps
+
+        migracion = importlib.import_module("reuniones.migrations.0009_actaemaillog_por_destinatario")
+        ActaEmailLog.objects.all().delete()
+        antigua = ActaEmailLog.objects.create(acta=self.acta, destinatario="a@x.cl, b@x.cl;c@x.cl")
+        ActaEmailLog.objects.create(acta=self.acta, lote=antigua.lote, destinatario="d@x.cl")  # Lote por defecto compartido
+
+        migracion.separar_destinatarios(apps, None)
+
+        filas = list(ActaEmailLog.objects.order_by("pk").values_list("destinatario", "lote", "estado"))
+        self.assertEqual([f[0] for f in filas], ["a@x.cl", "d@x.cl", "b@x.cl", "c@x.cl"])
+        self.assertEqual({f[2] for f in filas}, {ActaEmailLog.ESTADO_ENVIADO})
+        self.assertEqual(len({filas[0][1], filas[2][1], filas[3][1]}), 1)
+        self.assertNotEqual(filas[0][1], filas[1][1])
+
+
+class PdfActaAprobadaTest(TestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        self.storage = FileSystemStorage(location=directorio)
+        parche = mock.patch.object(Acta._meta.get_field("pdf_aprobado"), "storage", self.storage)
+        parche.start()
+        self.addCleanup(parche.stop)
+        reunion = Reunion.objects.create(titulo="Asamblea", tabla="Cuentas", fecha=timezone.now())
+        self.acta = Acta.objects.create(reunion=reunion, contenido="Se aprueba el presupuesto.", aprobada=True)
+
+    def test_pdf_se_genera_una_vez_y_se_regenera_si_cambia_el_contenido(self):
+        """Con el mismo contenido se reutiliza el PDF guardado; al editarlo se renderiza otro y se borra el anterior."""
+        with mock.patch("reuniones.pdf.pdf_acta", return_value=b"%PDF-1.4") as pdf:
+            primero = generar_pdf_aprobado(self.acta)
+            acta = Acta.objects.select_related("reunion").get(pk=self.acta.pk)
+            self.assertEqual((acta.pdf_aprobado.name, acta.huella_pdf), (primero, huella_acta(acta)))
+            self.assertEqual(generar_pdf_aprobado(acta), primero)
+            self.assertTrue(pdf_vigente(acta))
+            self.assertEqual(pdf.call_count, 1)
+
+            acta.contenido += " Se cierra la sesión."
+            acta.save()
+            self.assertFalse(pdf_vigente(acta))
+            segundo = generar_pdf_aprobado(acta)
+
+        self.assertEqual(pdf.call_count, 2)
+        self.assertNotEqual(primero, segundo)
+        self.assertEqual(Acta.objects.get(pk=acta.pk).pdf_aprobado.name, segundo)
+        self.assertFalse(self.storage.exists(primero))
+        self.assertTrue(self.storage.exists(segundo))
+
+    def test_editar_la_plantilla_invalida_el_pdf_guardado(self):
+        """La huella incluye el código fuente de la plantilla, no solo su ruta."""
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio)
+        plantilla = Path(directorio, "reuniones", "acta_pdf_template.html")
+        plantilla.parent.mkdir()
+        plantilla.write_text("<p>{{ acta.contenido }}</p>")
+        motor = [{
+            "BACKEND": "django.template.backends.django.DjangoTemplates", "DIRS": [directorio],
+            "OPTIONS": {"loaders": ["django.template.loaders.filesystem.Loader"]},  # Sin caché de plantillas
+        }]
+
+        with self.settings(TEMPLATES=motor), mock.patch("reuniones.pdf.pdf_acta", return_value=b"%PDF-1.4"):
+            generar_pdf_aprobado(self.acta)
+            self.assertTrue(pdf_vigente(self.acta))
+            plantilla.write_text("<h1>Acta</h1><p>{{ acta.contenido }}</p>")
+            self.assertFalse(pdf_vigente(self.acta))
+
+
+class ProcesosTranscripcionTest(SimpleTestCase):
+    @override_settings(TRANSCRIPCION_PROCESOS=4)
+    def test_hijo_daemon_transcribe_en_un_solo_proceso(self):
+        """Dentro de un proceso daemon (hijo prefork) no se crea el pool de procesos."""
+        from . import tasks
+
+        self.assertEqual(tasks._procesos_transcripcion(), 4)
+        with mock.patch.object(tasks.multiprocessing, "current_process", return_value=SimpleNamespace(daemon=True)):
+            self.assertEqual(tasks._procesos_transcripcion(), 1)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    TRANSCRIPCION_VAD=False, TRANSCRIPCION_CHECKPOINT_SEGUNDOS=0,
+)
+class CheckpointTranscripcionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reunion = Reunion.objects.create(titulo="Asamblea", tabla="Cuentas", fecha=timezone.now())
+        self.acta = Acta.objects.create(
+            reunion=reunion, archivo_audio="audios_reuniones/acta.webm", estado_transcripcion=Acta.ESTADO_PROCESANDO,
+        )
+
+    def _trabajo(self, segundos): # Trabajo con checkpoint en 'segundos' de audio
+        from . import tasks
+
+        return TrabajoTranscripcion.objects.create(
+            acta=self.acta, archivo=self.acta.archivo_audio.name, bytes_pcm=segundos * tasks.BYTES_POR_SEGUNDO,
+        )
+
+    def _envejecer(self, trabajo): # Sin avances desde antes del plazo de reanudación
+        TrabajoTranscripcion.objects.filter(pk=trabajo.pk).update(actualizado=timezone.now() - timedelta(hours=1))
+
+    def test_cada_checkpoint_guarda_solo_las_palabras_nuevas(self):
+        """Al reanudar se parte de los tramos guardados y cada checkpoint agrega solo lo transcrito desde el anterior."""
+        from . import tasks
+
+        trabajo = self._trabajo(10)
+        TramoTranscripcion.objects.create(
+            trabajo=trabajo, bytes_pcm=trabajo.bytes_pcm, texto="hola", palabras=[{"word": "hola", "start": 0.2, "end": 0.5}],
+        )
+        uno = {"word": "uno", "start": 0.1, "end": 0.4}
+        dos = {"word": "dos", "start": 1.1, "end": 1.4}
+        guardados = []
+
+        def transcribir(modelo, bloques, al_avanzar=None):
+            al_avanzar(tasks.BYTES_POR_SEGUNDO, {"texto": "uno", "palabras": [uno]})
+            al_avanzar(2 * tasks.BYTES_POR_SEGUNDO, {"texto": "dos", "palabras": [dos]})
+            guardados.extend(TramoTranscripcion.objects.filter(trabajo=trabajo).values_list("bytes_pcm", "texto", "palabras"))
+            return {"texto": "uno dos", "palabras": [uno, dos], "segundos": 2.0}
+
+        decodificador = mock.MagicMock(bytes_entrada=0, bytes_salida=0)
+        with mock.patch.object(tasks, "iterar_archivo", return_value=iter([])), \
+                mock.patch.object(tasks, "DecodificadorFFmpeg", return_value=decodificador), \
+                mock.patch.object(tasks, "saltar_bytes", return_value=iter([])), \
+                mock.patch.object(tasks, "obtener_modelo"), \
+                mock.patch.object(tasks, "_procesos_transcripcion", return_value=1), \
+                mock.patch.object(tasks, "transcribir_bloques", side_effect=transcribir), \
+                mock.patch.object(tasks, "publicar_estado_acta"):
+            resultado = tasks._transcribir_con_checkpoints(self.acta, trabajo)
+
+        s = tasks.BYTES_POR_SEGUNDO
+        self.assertEqual(guardados, [
+            (10 * s, "hola", [{"word": "hola", "start": 0.2, "end": 0.5}]),
+            (11 * s, "uno", [{**uno, "start": 10.1, "end": 10.4}]),
+            (12 * s, "dos", [{**dos, "start": 11.1, "end": 11.4}]),
+        ])
+        self.assertEqual(resultado["texto"], "hola uno dos")
+        self.assertEqual([p["word"] for p in resultado["palabras"]], ["hola", "uno", "dos"])
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.bytes_pcm, 12 * s)
+        self.assertIsNotNone(trabajo.finalizado)
+        self.assertFalse(TramoTranscripcion.objects.filter(trabajo=trabajo).exists())  # Ya no hacen falta
+
+    def test_no_se_transcribe_dos_veces_la_misma_acta(self):
+        """Con el candado del acta tomado, una segunda ejecución de la tarea termina sin transcribir."""
+        from . import tasks
+
+        cache.add(tasks.clave_transcripcion(self.acta.pk), "otro-worker")
+        with mock.patch.object(tasks, "_transcribir_con_checkpoints") as transcribir:
+            tasks.procesar_audio_vosk.apply(args=[self.acta.pk])
+        transcribir.assert_not_called()
+        self.assertEqual(cache.get(tasks.clave_transcripcion(self.acta.pk)), "otro-worker")
+
+    def test_al_arrancar_solo_se_reanudan_trabajos_viejos_sin_candado(self):
+        """Se re-encolan solo las actas con checkpoint viejo cuyo candado venció (no las que esperan en la cola)."""
+        from . import tasks
+
+        Acta.objects.create(  # Recién encolada: sin trabajo todavía
+            reunion=Reunion.objects.create(titulo="Otra", tabla="-", fecha=timezone.now()),
+            estado_transcripcion=Acta.ESTADO_PROCESANDO,
+        )
+        self._envejecer(self._trabajo(10))
+
+        with mock.patch.object(tasks.procesar_audio_vosk, "delay") as encolar:
+            cache.add(tasks.clave_transcripcion(self.acta.pk), "otro-worker")
+            tasks.reanudar_transcripciones_interrumpidas()
+            encolar.assert_not_called()
+
+            cache.delete(tasks.clave_transcripcion(self.acta.pk))
+            tasks.reanudar_transcripciones_interrumpidas()
+        encolar.assert_called_once_with(self.acta.pk)
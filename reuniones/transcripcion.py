@@ -0,0 +1,565 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Utilidades de transcripción con Vosk. Permite transcribir audio
+               PCM de forma secuencial o dividiéndolo en segmentos cortados en
+               los silencios, que se procesan en paralelo en un pool de procesos
+               y luego se unen en orden con sus marcas de tiempo. Incluye el
+               decodificador FFmpeg por pipes (sin archivos temporales) y su
+               variante asíncrona para el audio Opus de la transcripción en vivo.
+--------------------------------------------------------------------------------
+"""
+import asyncio
+import bisect
+import collections
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import ffmpeg
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Frecuencia del audio normalizado por FFmpeg
+BYTES_POR_MUESTRA = 2  # PCM 16 bits mono
+FRAMES_POR_LECTURA = 4000  # Mismo tamaño de lectura que usaba el flujo original
+
+VENTANA_ENERGIA_S = 0.03  # Tamaño de cada ventana de energía (30 ms)
+SUAVIZADO_VENTANAS = 10  # Promedio móvil de ~300 ms para no cortar en micro-pausas
+MARGEN_CORTE_S = 20.0  # Rango (+/-) alrededor del punto objetivo donde se busca el silencio
+
+# Filtro de paso alto/bajo (quita ruidos graves y agudos) y normalización de volumen
+FILTRO_AUDIO = "highpass=f=200, lowpass=f=3000, loudnorm"
+
+_modelo_proceso = None  # Modelo disponible en los procesos hijos (heredado vía fork)
+
+
+def firma_filtros(vad=False):
+    """Describe el preprocesamiento del audio; si cambia, la caché de transcripciones no se reutiliza."""
+    if not vad:
+        return FILTRO_AUDIO
+    return (
+        f"{FILTRO_AUDIO} | vad {VAD_UMBRAL_DB}/{VAD_HISTERESIS_DB}dB "
+        f"{VAD_COLGADO_S}/{VAD_PREVIO_S}s"
+    )
+
+
+# ---------------------------
+# Reconocimiento
+# ---------------------------
+
+def _acumular_resultado(res, offset_s, textos, palabras): # Agrega un resultado de Kaldi
+    texto = (res.get("text") or "").strip()
+    if texto:
+        textos.append(texto)
+    for p in res.get("result", []):
+        palabras.append({
+            "word": p.get("word", ""),
+            "start": round(p.get("start", 0.0) + offset_s, 3),
+            "end": round(p.get("end", 0.0) + offset_s, 3),
+            "conf": p.get("conf", 1.0),
+        })
+
+
+def transcribir_bloques(modelo, bloques, offset_s=0.0, al_avanzar=None):
+    """
+    Transcribe un iterable de bloques PCM (16 kHz, mono, s16le).
+    Devuelve {"texto": str, "palabras": [...], "segundos": float} con los
+    tiempos de cada palabra desplazados en offset_s.
+    al_avanzar(bytes_pcm, parcial) se llama tras cada frase finalizada por
+    Kaldi, que es un punto seguro para reanudar con un reconocedor nuevo.
+    """
+    from vosk import KaldiRecognizer
+
+    rec = KaldiRecognizer(modelo, SAMPLE_RATE)
+    rec.SetWords(True)
+
+    textos, palabras = [], []
+    total_bytes = 0
+    for data in bloques:
+        if not data:
+            continue
+        total_bytes += len(data)
+        if rec.AcceptWaveform(data):
+            n_textos, n_palabras = len(textos), len(palabras)
+            _acumular_resultado(json.loads(rec.Result()), offset_s, textos, palabras)
+            if al_avanzar:
+                al_avanzar(total_bytes, {
+                    "texto": " ".join(textos[n_textos:]),
+                    "palabras": palabras[n_palabras:],
+                })
+    _acumular_resultado(json.loads(rec.FinalResult()), offset_s, textos, palabras)
+
+    return {
+        "texto": " ".join(textos),
+        "palabras": palabras,
+        "segundos": total_bytes / (SAMPLE_RATE * BYTES_POR_MUESTRA),
+    }
+
+
+def trocear_pcm(pcm, frames=FRAMES_POR_LECTURA): # Divide un buffer en lecturas de tamaño fijo
+    paso = frames * BYTES_POR_MUESTRA
+    for i in range(0, len(pcm), paso):
+        yield pcm[i:i + paso]
+
+
+def saltar_bytes(bloques, n): # Descarta los primeros n bytes (reanudación desde checkpoint)
+    for data in bloques:
+        if n <= 0:
+            yield data
+        elif len(data) <= n:
+            n -= len(data)
+        else:
+            yield data[n:]
+            n = 0
+
+
+def leer_bloques_wav(wf, frames=FRAMES_POR_LECTURA): # Lee un WAV abierto bloque a bloque
+    while True:
+        data = wf.readframes(frames)
+        if len(data) == 0:
+            break
+        yield data
+
+
+def unir_resultados(resultados):
+    """
+    Une resultados de segmentos (ya ordenados) en un único resultado,
+    como si el audio se hubiese procesado de corrido.
+    """
+    textos = [r["texto"] for r in resultados if r.get("texto")]
+    palabras = []
+    for r in resultados:
+        palabras.extend(r.get("palabras", []))
+    return {
+        "texto": " ".join(textos),
+        "palabras": palabras,
+        "segundos": sum(r.get("segundos", 0.0) for r in resultados),
+    }
+
+
+# ---------------------------
+# Decodificación con FFmpeg (streaming)
+# ---------------------------
+
+class DecodificadorFFmpeg:
+    """
+    Convierte un iterable de fragmentos de audio (webm, ogg, mp3, wav...) a
+    PCM 16 kHz mono s16le usando FFmpeg por pipes. Un hilo escribe los
+    fragmentos en stdin mientras se itera stdout, así la memoria usada es
+    constante y no se crean archivos temporales.
+    """
+
+    def __init__(self, fragmentos, filtro=FILTRO_AUDIO, frames=FRAMES_POR_LECTURA):
+        self.fragmentos = fragmentos
+        self.filtro = filtro
+        self.tamano_bloque = frames * BYTES_POR_MUESTRA
+        self.bytes_entrada = 0  # Bytes del archivo original ya enviados a FFmpeg
+        self.bytes_salida = 0  # Bytes PCM entregados
+        self._error_entrada = None
+        self._stderr = collections.deque(maxlen=30)  # Últimas líneas para diagnosticar errores
+
+    def _iniciar(self):
+        opciones = {"format": "s16le", "acodec": "pcm_s16le", "ac": 1, "ar": str(SAMPLE_RATE)}
+        if self.filtro:
+            opciones["af"] = self.filtro
+        return (
+            ffmpeg
+            .input("pipe:0")
+            .output("pipe:1", **opciones)
+            .global_args("-hide_banner", "-loglevel", "error")
+            .run_async(pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
+        )
+
+    def _alimentar(self, proc): # Hilo: copia los fragmentos hacia stdin de FFmpeg
+        try:
+            for fragmento in self.fragmentos:
+                proc.stdin.write(fragmento)
+                self.bytes_entrada += len(fragmento)
+        except BrokenPipeError:
+            pass  # FFmpeg terminó antes (error o cierre desde el consumidor)
+        except Exception as e:
+            self._error_entrada = e
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    def _drenar_stderr(self, proc): # Hilo: evita que FFmpeg se bloquee con stderr lleno
+        for linea in proc.stderr:
+            self._stderr.append(linea.decode("utf-8", "replace").rstrip())
+
+    def __iter__(self):
+        proc = self._iniciar()
+        hilos = [
+            threading.Thread(target=self._alimentar, args=(proc,), daemon=True),
+            threading.Thread(target=self._drenar_stderr, args=(proc,), daemon=True),
+        ]
+        for h in hilos:
+            h.start()
+
+        completo = False
+        try:
+            while True:
+                data = proc.stdout.read(self.tamano_bloque)
+                if not data:
+                    break
+                self.bytes_salida += len(data)
+                yield data
+            completo = True
+        finally:
+            if not completo and proc.poll() is None:
+                proc.kill()  # El consumidor se detuvo (error): no dejar FFmpeg huérfano
+            proc.stdout.close()
+            proc.wait()
+            for h in hilos:
+                h.join(timeout=5)
+
+        if self._error_entrada is not None:
+            raise RuntimeError(f"Error leyendo el audio de origen: {self._error_entrada}")
+        if proc.returncode != 0:
+            raise RuntimeError("FFmpeg falló: " + " | ".join(self._stderr))
+
+
+# Contenedores aceptados en la transcripción en vivo (formato de entrada de FFmpeg)
+FORMATOS_EN_VIVO = {"webm": "matroska", "ogg": "ogg"}
+
+
+class DecodificadorEnVivo:
+    """
+    Decodifica en streaming el audio comprimido (Opus en WebM u Ogg) que envía
+    el cliente de transcripción en vivo y entrega PCM 16 kHz mono a medida que
+    FFmpeg lo produce. Versión asyncio: no bloquea el event loop de Channels.
+    """
+
+    def __init__(self, formato, al_recibir_pcm, tamano_lectura=FRAMES_POR_LECTURA):
+        self.formato = FORMATOS_EN_VIVO[formato]
+        self.al_recibir_pcm = al_recibir_pcm  # Corrutina (pcm, llegada)
+        self.tamano_lectura = tamano_lectura
+        self.ultima_llegada = None  # Momento en que llegó el último fragmento comprimido
+        self.bytes_entrada = 0
+        self.bytes_salida = 0
+        self._proc = None
+        self._tareas = []
+        self._stderr = collections.deque(maxlen=30)
+
+    def _argumentos(self):
+        # Sin filtros ni buffers de análisis: la latencia debe ser la del códec
+        return (
+            ffmpeg
+            .input("pipe:0", format=self.formato, fflags="nobuffer", probesize="4096", analyzeduration="0")
+            .output("pipe:1", format="s16le", acodec="pcm_s16le", ac=1, ar=str(SAMPLE_RATE))
+            .global_args("-hide_banner", "-loglevel", "error")
+            .compile()
+        )
+
+    async def iniciar(self):
+        self._proc = await asyncio.create_subprocess_exec(
+            *self._argumentos(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._tareas = [asyncio.create_task(self._leer()), asyncio.create_task(self._drenar_stderr())]
+
+    async def escribir(self, data, llegada): # Envía un fragmento comprimido a FFmpeg
+        self.ultima_llegada = llegada
+        self.bytes_entrada += len(data)
+        self._proc.stdin.write(data)
+        await self._proc.stdin.drain()  # Si FFmpeg va atrasado, se espera aquí
+
+    async def _leer(self):
+        while True:
+            pcm = await self._proc.stdout.read(self.tamano_lectura)
+            if not pcm:
+                break
+            self.bytes_salida += len(pcm)
+            await self.al_recibir_pcm(pcm, self.ultima_llegada)
+        if self._stderr:
+            logger.warning("FFmpeg en vivo terminó: %s", " | ".join(self._stderr))
+
+    async def _drenar_stderr(self):
+        async for linea in self._proc.stderr:
+            self._stderr.append(linea.decode("utf-8", "replace").rstrip())
+
+    async def cerrar(self, esperar=False):
+        """Cierra stdin; con esperar=True se entrega el audio restante antes de terminar."""
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except Exception:
+            pass
+        if esperar:
+            try:
+                await asyncio.wait_for(asyncio.gather(*self._tareas), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+        if self._proc.returncode is None:
+            self._proc.kill()
+        for tarea in self._tareas:
+            tarea.cancel()
+        await self._proc.wait()
+
+
+# ---------------------------
+# Detección de voz (VAD)
+# ---------------------------
+
+VAD_VENTANA_S = 0.03  # Cuadros de 30 ms
+VAD_UMBRAL_DB = 12.0  # Voz: energía sobre el piso de ruido en al menos estos dB
+VAD_HISTERESIS_DB = 4.0  # Para salir de voz la energía debe bajar de (umbral - histéresis)
+VAD_COLGADO_S = 0.5  # Se sigue conservando este tiempo después de la última voz
+VAD_PREVIO_S = 0.3  # Audio conservado antes del inicio de cada tramo de voz
+VAD_PISO_VENTANA_S = 10.0  # Historial usado para estimar el piso de ruido
+VAD_PISO_MINIMO_DB = -65.0  # Bajo este nivel (dBFS) nunca se considera voz
+
+
+class RecortadorSilencios:
+    """
+    Etapa VAD por energía: deja pasar solo los tramos con voz (con un margen
+    antes y después) y guarda un mapa de tiempos para llevar las marcas de
+    las palabras de vuelta al audio original. El piso de ruido se estima en
+    línea (percentil 10 de los últimos segundos), así funciona después de
+    loudnorm y con distinto ruido de sala.
+    """
+
+    def __init__(self, bloques):
+        self.bloques = bloques
+        self.bytes_entrada = 0  # PCM original leído
+        self.bytes_salida = 0  # PCM entregado al reconocedor
+        self._mapa_salida = [0]  # Inicio de cada tramo conservado (bytes de salida)...
+        self._mapa_entrada = [0]  # ...y su posición en el audio original
+        self._fin_emitido = 0  # Posición original donde terminó lo último entregado
+
+    # -- Mapa de tiempos --
+    def bytes_originales(self, bytes_salida): # Posición en el original de un byte de salida
+        i = bisect.bisect_right(self._mapa_salida, bytes_salida) - 1
+        return self._mapa_entrada[i] + (bytes_salida - self._mapa_salida[i])
+
+    def a_original_s(self, segundos_salida):
+        bytes_salida = int(round(segundos_salida * SAMPLE_RATE)) * BYTES_POR_MUESTRA
+        return self.bytes_originales(bytes_salida) / (SAMPLE_RATE * BYTES_POR_MUESTRA)
+
+    # -- Recorte --
+    def _emitir(self, salida, posicion, cuadro):
+        if posicion != self._fin_emitido:  # Empieza un tramo nuevo tras un corte
+            self._mapa_salida.append(self.bytes_salida)
+            self._mapa_entrada.append(posicion)
+        salida.append(cuadro)
+        self.bytes_salida += len(cuadro)
+        self._fin_emitido = posicion + len(cuadro)
+
+    def __iter__(self):
+        tam_cuadro = int(SAMPLE_RATE * VAD_VENTANA_S) * BYTES_POR_MUESTRA
+        n_colgado = int(VAD_COLGADO_S / VAD_VENTANA_S)
+        historial = collections.deque(maxlen=int(VAD_PISO_VENTANA_S / VAD_VENTANA_S))
+        previos = collections.deque(maxlen=int(VAD_PREVIO_S / VAD_VENTANA_S))  # (posición, cuadro)
+        referencia_db = 20 * np.log10(32768.0)
+
+        en_voz, colgado = False, 0
+        resto = b""
+        for data in self.bloques:
+            buffer = resto + data
+            n = len(buffer) // tam_cuadro
+            resto = buffer[n * tam_cuadro:]
+            if n == 0:
+                continue
+
+            # Energía de todos los cuadros del bloque de una vez (dBFS)
+            muestras = np.frombuffer(buffer[:n * tam_cuadro], dtype=np.int16).reshape(n, -1).astype(np.float32)
+            energia_db = 10 * np.log10(np.mean(muestras * muestras, axis=1) + 1e-9) - referencia_db
+            historial.extend(energia_db.tolist())
+            piso = float(np.percentile(historial, 10))
+            umbral_alto = max(piso + VAD_UMBRAL_DB, VAD_PISO_MINIMO_DB)
+            umbral_bajo = umbral_alto - VAD_HISTERESIS_DB
+
+            salida = []
+            for i in range(n):
+                cuadro = buffer[i * tam_cuadro:(i + 1) * tam_cuadro]
+                posicion = self.bytes_entrada
+                self.bytes_entrada += tam_cuadro
+                e = energia_db[i]
+                if en_voz:
+                    colgado = n_colgado if e >= umbral_bajo else colgado - 1
+                    self._emitir(salida, posicion, cuadro)
+                    en_voz = colgado > 0
+                elif e >= umbral_alto:
+                    en_voz, colgado = True, n_colgado
+                    for pos_previa, previo in previos:  # Margen antes de la voz
+                        self._emitir(salida, pos_previa, previo)
+                    previos.clear()
+                    self._emitir(salida, posicion, cuadro)
+                else:
+                    previos.append((posicion, cuadro))
+            if salida:
+                yield b"".join(salida)
+
+        if resto:
+            posicion = self.bytes_entrada
+            self.bytes_entrada += len(resto)
+            if en_voz:
+                salida = []
+                self._emitir(salida, posicion, resto)
+                yield b"".join(salida)
+
+
+def reubicar_palabras(palabras, convertir):
+    """Copia las palabras llevando start/end al tiempo original con convertir(segundos)."""
+    return [
+        {**p, "start": round(convertir(p["start"]), 3), "end": round(convertir(p["end"]), 3)}
+        for p in palabras
+    ]
+
+
+# ---------------------------
+# Segmentación por silencios
+# ---------------------------
+
+def _energia_por_ventana(pcm):
+    """Energía media (RMS^2) de cada ventana de 30 ms del buffer PCM."""
+    muestras_ventana = int(SAMPLE_RATE * VENTANA_ENERGIA_S)
+    muestras = np.frombuffer(pcm, dtype=np.int16)
+    n = len(muestras) // muestras_ventana
+    if n == 0:
+        return np.zeros(0)
+    ventanas = muestras[: n * muestras_ventana].astype(np.float32).reshape(n, muestras_ventana)
+    energia = np.mean(ventanas * ventanas, axis=1)
+    if n >= SUAVIZADO_VENTANAS:
+        kernel = np.ones(SUAVIZADO_VENTANAS) / SUAVIZADO_VENTANAS
+        energia = np.convolve(energia, kernel, mode="same")
+    return energia
+
+
+def buscar_corte_silencio(pcm, desde_s, hasta_s):
+    """
+    Devuelve la posición (en bytes, alineada a muestra) del punto más
+    silencioso del buffer entre desde_s y hasta_s.
+    """
+    bytes_por_s = SAMPLE_RATE * BYTES_POR_MUESTRA
+    ini = max(0, int(desde_s * bytes_por_s))
+    fin = min(len(pcm), int(hasta_s * bytes_por_s))
+    ini -= ini % BYTES_POR_MUESTRA
+    fin -= fin % BYTES_POR_MUESTRA
+    energia = _energia_por_ventana(pcm[ini:fin])
+    if len(energia) == 0:
+        return fin
+    ventana_bytes = int(SAMPLE_RATE * VENTANA_ENERGIA_S) * BYTES_POR_MUESTRA
+    idx = int(np.argmin(energia))
+    return ini + idx * ventana_bytes + ventana_bytes // 2
+
+
+def segmentar_por_silencio(bloques, duracion_objetivo_s, margen_s=MARGEN_CORTE_S):
+    """
+    Agrupa bloques PCM en segmentos de aproximadamente duracion_objetivo_s,
+    cortando en el silencio más cercano al objetivo. Genera tuplas
+    (indice, offset_segundos, pcm_bytes). Solo mantiene en memoria el
+    segmento en construcción.
+    """
+    bytes_por_s = SAMPLE_RATE * BYTES_POR_MUESTRA
+    margen_s = min(margen_s, duracion_objetivo_s / 2)
+    limite = int((duracion_objetivo_s + margen_s) * bytes_por_s)
+
+    buffer = bytearray()
+    indice = 0
+    offset_bytes = 0
+    for data in bloques:
+        buffer.extend(data)
+        while len(buffer) >= limite:
+            corte = buscar_corte_silencio(
+                buffer, duracion_objetivo_s - margen_s, duracion_objetivo_s + margen_s
+            )
+            yield indice, offset_bytes / bytes_por_s, bytes(buffer[:corte])
+            del buffer[:corte]
+            offset_bytes += corte
+            indice += 1
+
+    if buffer:
+        yield indice, offset_bytes / bytes_por_s, bytes(buffer)
+
+
+# ---------------------------
+# Pool de procesos
+# ---------------------------
+
+def _inicializar_proceso(ruta_modelo): # Se ejecuta una vez en cada proceso hijo
+    global _modelo_proceso
+    if _modelo_proceso is None:
+        # Solo ocurre con 'spawn' (Windows); con 'fork' el modelo ya viene del padre
+        from vosk import Model
+        _modelo_proceso = Model(str(ruta_modelo))
+
+
+def _proceso_listo(): # Tarea vacía para crear los procesos del pool
+    return True
+
+
+def _transcribir_segmento(indice, offset_s, pcm): # Trabajo de cada proceso hijo
+    resultado = transcribir_bloques(_modelo_proceso, trocear_pcm(pcm), offset_s)
+    return indice, resultado
+
+
+def _contexto_multiproceso():
+    """Usa 'fork' cuando existe para compartir las páginas del modelo (copy-on-write)."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+def transcribir_en_paralelo(modelo, ruta_modelo, bloques, procesos, duracion_segmento_s,
+                            offset_s=0.0, al_avanzar=None):
+    """
+    Transcribe el audio dividido en segmentos usando un pool de procesos que
+    comparte el modelo ya cargado. Como máximo hay 2 segmentos pendientes por
+    proceso, así la memoria no depende del largo de la grabación.
+    al_avanzar(bytes_pcm, parcial) se llama cada vez que se completa el
+    siguiente segmento en orden (bytes_pcm = fin del tramo ya transcrito).
+    """
+    global _modelo_proceso
+    _modelo_proceso = modelo  # Los hijos creados con fork heredan esta referencia
+
+    terminados = {}  # Segmentos listos que aún no se pueden unir (falta uno anterior)
+    fines = {}  # Byte final de cada segmento
+    ordenados = []
+    siguiente = 0
+
+    def recoger(futuros):
+        nonlocal siguiente
+        for f in futuros:
+            i, res = f.result()
+            terminados[i] = res
+        while siguiente in terminados:
+            res = terminados.pop(siguiente)
+            ordenados.append(res)
+            if al_avanzar:
+                al_avanzar(fines.pop(siguiente), res)
+            siguiente += 1
+
+    max_pendientes = procesos * 2
+    with ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=_contexto_multiproceso(),
+        initializer=_inicializar_proceso,
+        initargs=(str(ruta_modelo),),
+    ) as pool:
+        # Con 'fork' los hijos se crean en el primer submit: se fuerza aquí, antes de
+        # iterar los bloques, para que no hereden los pipes de FFmpeg (stdin no
+        # recibiría EOF mientras un hijo mantenga abierto el extremo de escritura).
+        pool.submit(_proceso_listo).result()
+
+        pendientes = set()
+        for indice, inicio_s, pcm in segmentar_por_silencio(bloques, duracion_segmento_s):
+            fines[indice] = int(inicio_s * SAMPLE_RATE) * BYTES_POR_MUESTRA + len(pcm)
+            pendientes.add(pool.submit(_transcribir_segmento, indice, offset_s + inicio_s, pcm))
+            if len(pendientes) >= max_pendientes:
+                listos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                recoger(listos)
+        recoger(pendientes)
+
+    logger.info("Transcripción paralela: %s segmentos con %s procesos", len(ordenados), procesos)
+    return unir_resultados(ordenados)
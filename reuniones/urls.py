@@ -24,10 +24,17 @@ urlpatterns = [
     path('grabaciones/', views.lista_grabaciones, name='lista_grabaciones'),
     path("<int:pk>/acta/rechazar/", views.rechazar_acta, name="rechazar_acta"),
     path("actas/<int:pk>/enviar-pdf/", views.enviar_acta_pdf_por_correo, name="enviar_acta_pdf_por_correo"),
+    path("actas/<int:pk>/enviar-pdf/<uuid:lote>/", views.estado_envio_acta, name="estado_envio_acta"),
     path("<int:pk>/borrador/guardar/", views.guardar_borrador_acta, name="guardar_borrador_acta"),
     path("<int:pk>/borrador/aprobar/", views.aprobar_borrador_acta, name="aprobar_borrador_acta"),
     path("<int:pk>/acta/subir-audio/", views.subir_audio_acta, name="subir_audio_acta"),
+    path("<int:pk>/acta/subida/", views.iniciar_subida_audio, name="iniciar_subida_audio"),
+    path("<int:pk>/acta/subida/<int:subida_id>/urls/", views.urls_partes_audio, name="urls_partes_audio"),
+    path("<int:pk>/acta/subida/<int:subida_id>/parte/<int:numero>/", views.recibir_parte_audio, name="recibir_parte_audio"),
+    path("<int:pk>/acta/subida/<int:subida_id>/completar/", views.completar_subida_audio, name="completar_subida_audio"),
+    path("<int:pk>/acta/subida/<int:subida_id>/abortar/", views.abortar_subida_audio, name="abortar_subida_audio"),
     path("api/acta/<int:pk>/estado/", views.get_acta_estado, name="get_acta_estado"),
+    path("api/acta/<int:pk>/picos/", views.picos_audio_acta, name="picos_audio_acta"),
     path('reunion/<int:pk>/calificar_acta/', views.calificar_acta, name='calificar_acta'),
     path('<int:pk>/iniciar/', views.iniciar_reunion, name='iniciar_reunion'),
     path('<int:pk>/finalizar/', views.finalizar_reunion, name='finalizar_reunion'),
@@ -7,54 +7,48 @@ Descripción:   Controladores (vistas) para la interfaz web. Maneja la lógica d
                generar PDFs y procesar subida de audios.
 --------------------------------------------------------------------------------
 """
-from asgiref.sync import sync_to_async
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.core.cache import cache
 from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from io import BytesIO
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
+from django.urls import reverse
+from django.views.decorators.http import require_POST, require_http_methods
 from django.views.decorators.csrf import csrf_protect
 from django.utils import timezone
-from django.utils.text import slugify
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
 from datetime import timedelta
 
-from .models import Reunion, Asistencia, Acta, EstadoReunion
+from .models import Reunion, Asistencia, Acta, ActaEmailLog, EstadoReunion, GrabacionEnVivo, SubidaAudio
+from .grabacion_en_vivo import clave_hablante, consolidar_en_acta
 from .forms import ReunionForm, ActaForm, CalificacionActaForm
 from core.authz import role_required
 from core.models import Perfil
-
-from .tasks import procesar_audio_vosk
-from .tasks import enviar_notificacion_acta_aprobada
+from core.outbox import encolar_tarea
+
+from .tasks import procesar_audio_vosk, aplicar_cache_transcripcion
+from .almacenamiento import huella_archivo
+from .audio_comprimido import PICOS_POR_SEGUNDO
+from .pdf import nombre_pdf_acta, pdf_acta, pdf_vigente
+from .subida_audio import (
+    SubidaInvalida, abortar_subida, completar_subida, guardar_parte_local, iniciar_subida,
+    partes_subidas, urls_partes,
+)
+from .tasks import enviar_acta_por_correo, generar_pdf_acta, medir_precision_transcripcion
+from .estado_acta import estado_acta
+from .tasks import completar_grabaciones_en_vivo
 
 import logging
-from usuarios.utils import enviar_correo_via_webhook
+import uuid
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
-def _pdf_bytes_desde_xhtml(template_path: str, context: dict) -> bytes:
-    """
-    Renderiza un template HTML a PDF (bytes) usando xhtml2pdf.
-    Devuelve bytes del PDF listo para adjuntar.
-    """
-    template = get_template(template_path)
-    html = template.render(context)
-
-    result = BytesIO()
-    pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), dest=result, encoding="UTF-8")
-
-    if not pdf.err:
-        return result.getvalue()
-
-    logger.error(f"Error al generar PDF: {pdf.err}")
-    return b""
-
-
 # ---------------------------
 # Vistas de Reuniones
 # ---------------------------
@@ -159,6 +153,8 @@ def guardar_borrador_acta(request, pk): # Guardar borrador de acta
         acta_guardada = form.save(commit=False)
         acta_guardada.reunion = reunion
         acta_guardada.save()
+        if acta_guardada.aprobada:  # Se regenera el PDF oficial solo si cambió el contenido
+            encolar_tarea(generar_pdf_acta, acta_guardada.pk)
         messages.success(request, "Borrador del acta guardado.")
     else:
         messages.error(request, "Error al guardar el borrador.")
@@ -181,13 +177,12 @@ def aprobar_borrador_acta(request, pk): # Aprobar acta (finalizar edición)
         acta.aprobada = True
         acta.aprobado_por = request.user
         acta.aprobado_en = timezone.now()
-        acta.save()
+        acta.save()  # La señal de Acta deja en el outbox la notificación de acta aprobada
 
-        # Notificación async (si Celery está activo)
-        try:
-            enviar_notificacion_acta_aprobada.delay(acta.pk)
-        except Exception as e:
-            logger.error(f"Error al encolar notificación acta aprobada: {e}")
+        # Precisión de la transcripción automática contra el texto aprobado
+        encolar_tarea(medir_precision_transcripcion, acta.pk)
+        # PDF oficial pre-generado: las descargas y correos no vuelven a renderizarlo
+        encolar_tarea(generar_pdf_acta, acta.pk)
 
         messages.success(request, "El acta ha sido aprobada oficialmente.")
     except Acta.DoesNotExist:
@@ -314,16 +309,16 @@ def acta_export_pdf(request, pk): # Exportar acta a PDF
         messages.error(request, "Esta reunión aún no tiene un acta guardada.")
         return redirect("reuniones:detalle_reunion", pk=pk)
 
-    pdf_bytes = _pdf_bytes_desde_xhtml(
-        "reuniones/acta_pdf_template.html",
-        {"reunion": reunion, "acta": acta}
-    )
+    if pdf_vigente(acta):  # Acta aprobada sin cambios: se sirve el PDF guardado (URL firmada)
+        return redirect(acta.pdf_aprobado.url)
+
+    pdf_bytes = pdf_acta(acta)
 
     if not pdf_bytes:
         messages.error(request, "Error al generar el PDF.")
         return redirect("reuniones:detalle_reunion", pk=pk)
 
-    filename = f"Acta_{slugify(getattr(reunion, 'titulo', f'reunion-{reunion.pk}'))}.pdf"
+    filename = nombre_pdf_acta(reunion)
     response = HttpResponse(pdf_bytes, content_type="application/pdf")
     response["Content-Disposition"] = f'inline; filename="{filename}"'
     return response
@@ -341,47 +336,44 @@ def enviar_acta_pdf_por_correo(request, pk): # Enviar acta PDF por email
     except Acta.DoesNotExist:
         return JsonResponse({"ok": False, "message": "La reunión no tiene acta"}, status=400)
 
-    correos = request.POST.getlist("correos[]")
+    correos = list(dict.fromkeys(c.strip() for c in request.POST.getlist("correos[]") if c.strip()))
     if not correos:
         return JsonResponse({"ok": False, "message": "No se recibieron correos"}, status=400)
 
-    # 1) Generar PDF
-    pdf_bytes = _pdf_bytes_desde_xhtml(
-        "reuniones/acta_pdf_template.html",
-        {"reunion": reunion, "acta": acta}
-    )
-    if not pdf_bytes:
-        return JsonResponse({"ok": False, "message": "Error al generar el PDF"}, status=500)
-
-    filename = f"Acta_{slugify(getattr(reunion, 'titulo', f'reunion-{reunion.pk}'))}.pdf"
-
-    # ✅ DEBUG: confirma que el PDF existe y tiene peso
-    logger.warning(f"[ACTA EMAIL] PDF generado: {filename} | bytes={len(pdf_bytes)}")
-
-    enviados = 0
-    for correo in correos:
-        ok = enviar_correo_via_webhook(
-            to_email=correo,
-            subject=f"Acta de Reunión: {reunion.titulo}",
-            html_body=f"""
-                <p>Estimado/a vecino/a,</p>
-                <p>Se adjunta el acta oficial de la reunión <strong>{reunion.titulo}</strong>.</p>
-                <p>Saludos cordiales,<br>La Directiva</p>
-            """,
-            text_body="Se adjunta acta de reunión.",
-            attachment_bytes=pdf_bytes,   
-            filename=filename,            
-            content_type="application/pdf"
+    # Un registro por destinatario; el PDF se genera y envía en segundo plano (cola io)
+    with transaction.atomic():
+        lote = uuid.uuid4()
+        ActaEmailLog.objects.bulk_create(
+            [ActaEmailLog(acta=acta, lote=lote, destinatario=c, enviado_por=request.user) for c in correos]
         )
+        encolar_tarea(enviar_acta_por_correo, acta.pk, str(lote))
+
+    return JsonResponse({
+        "ok": True,
+        "message": f"Envío del acta a {len(correos)} destinatarios en curso.",
+        "lote": str(lote),
+        "estado_url": reverse("reuniones:estado_envio_acta", args=[reunion.pk, lote]),
+    })
 
-        if ok:
-            enviados += 1
-        else:
-            logger.warning(f"[ACTA EMAIL] No se pudo enviar acta a: {correo}")
 
+@login_required
+@role_required("actas", "send")
+def estado_envio_acta(request, pk, lote): # Avance del envío por correo (consulta periódica)
+    registros = ActaEmailLog.objects.filter(acta__reunion_id=pk, lote=lote)
+    conteo = dict(registros.order_by().values_list("estado").annotate(n=Count("pk")))
+    if not conteo:
+        return JsonResponse({"ok": False, "message": "Envío no encontrado"}, status=404)
+
+    pendientes = conteo.get(ActaEmailLog.ESTADO_PENDIENTE, 0)
     return JsonResponse({
         "ok": True,
-        "message": f"Acta enviada correctamente a {enviados} destinatarios."
+        "terminado": pendientes == 0,
+        "pendientes": pendientes,
+        "enviados": conteo.get(ActaEmailLog.ESTADO_ENVIADO, 0),
+        "fallidos": conteo.get(ActaEmailLog.ESTADO_FALLIDO, 0),
+        "correos_fallidos": list(
+            registros.filter(estado=ActaEmailLog.ESTADO_FALLIDO).values_list("destinatario", flat=True)[:50]
+        ),
     })
 
 
@@ -414,6 +406,7 @@ def finalizar_reunion(request, pk): # Finalizar reunión
     if reunion.estado == EstadoReunion.EN_CURSO:
         reunion.estado = EstadoReunion.REALIZADA
         reunion.save()
+        _cerrar_transcripcion_en_vivo(reunion)
         messages.success(request, f"La reunión '{reunion.titulo}' ha finalizado.")
     else:
         messages.warning(request, "Esta reunión no se puede finalizar.")
@@ -421,6 +414,28 @@ def finalizar_reunion(request, pk): # Finalizar reunión
     return redirect("reuniones:detalle_reunion", pk=reunion.pk)
 
 
+def _cerrar_transcripcion_en_vivo(reunion):
+    """
+    Pide al hablante en vivo cerrar su sesión: su conexión completa la
+    grabación y la pasa al acta junto con el texto reconocido.
+    """
+    canal = cache.get(clave_hablante(reunion.pk))
+    if canal:
+        try:
+            async_to_sync(get_channel_layer().send)(canal, {"type": "stt_finalizar"})
+        except Exception as e:
+            logger.error(f"No se pudo avisar al hablante de la reunión {reunion.pk}: {e}")
+
+    acta = Acta.objects.filter(reunion=reunion).first()
+    if not acta:
+        return
+    if acta.grabaciones_en_vivo.filter(estado=GrabacionEnVivo.ESTADO_ACTIVA).exists():
+        # Respaldo por si la conexión se cortó sin cerrar la grabación
+        completar_grabaciones_en_vivo.apply_async((acta.pk,), countdown=60)
+    else:
+        consolidar_en_acta(acta.pk)
+
+
 @require_POST
 @login_required
 @role_required("reuniones", "cancel")
@@ -478,24 +493,30 @@ def reuniones_json_feed(request): # Feed JSON para calendario frontend
 # Subida y procesamiento de audio (Vosk)
 # ---------------------------
 
+def _acta_para_audio(reunion):
+    """Devuelve (acta, None) si se le puede subir un audio, o (None, mensaje de error)."""
+    if reunion.estado != EstadoReunion.REALIZADA:
+        return None, "Solo se pueden subir audios a reuniones finalizadas."
+    try:
+        acta = reunion.acta
+    except Acta.DoesNotExist:
+        return None, "La reunión no tiene un acta asociada."
+    if acta.aprobada:
+        return None, "No se puede procesar un audio para un acta que ya está aprobada."
+    if acta.estado_transcripcion in (Acta.ESTADO_PENDIENTE, Acta.ESTADO_PROCESANDO):
+        return None, "Ya hay un audio procesándose para esta acta."
+    return acta, None
+
+
 @require_POST
 @login_required
 @role_required("actas", "edit")
 def subir_audio_acta(request, pk): # Subir audio para transcripción automática
     reunion = get_object_or_404(Reunion, pk=pk)
 
-    if reunion.estado != EstadoReunion.REALIZADA:
-        messages.error(request, "Solo se pueden subir audios a reuniones finalizadas.")
-        return redirect("reuniones:detalle_reunion", pk=pk)
-
-    try:
-        acta = reunion.acta
-    except Acta.DoesNotExist:
-        messages.error(request, "La reunión no tiene un acta asociada.")
-        return redirect("reuniones:detalle_reunion", pk=pk)
-
-    if acta.aprobada:
-        messages.error(request, "No se puede procesar un audio para un acta que ya está aprobada.")
+    acta, error = _acta_para_audio(reunion)
+    if error:
+        messages.error(request, error)
         return redirect("reuniones:detalle_reunion", pk=pk)
 
     archivo = request.FILES.get("archivo_audio")
@@ -503,14 +524,16 @@ def subir_audio_acta(request, pk): # Subir audio para transcripción automática
         messages.error(request, "No se seleccionó ningún archivo de audio.")
         return redirect("reuniones:detalle_reunion", pk=pk)
 
-    if acta.estado_transcripcion in (Acta.ESTADO_PENDIENTE, Acta.ESTADO_PROCESANDO):
-        messages.warning(request, "Ya hay un audio procesándose para esta acta.")
-        return redirect("reuniones:detalle_reunion", pk=pk)
-
     acta.archivo_audio = archivo
+    acta.huella_audio = huella_archivo(archivo)
     acta.estado_transcripcion = Acta.ESTADO_PENDIENTE
     acta.save()
 
+    # Mismo audio ya transcrito: se completa al instante sin pasar por la cola
+    if aplicar_cache_transcripcion(acta):
+        messages.success(request, "Este audio ya se había transcrito: el acta se completó al instante.")
+        return redirect("reuniones:detalle_reunion", pk=pk)
+
     procesar_audio_vosk.delay(acta.pk)
 
     messages.success(
@@ -521,6 +544,101 @@ def subir_audio_acta(request, pk): # Subir audio para transcripción automática
     return redirect("reuniones:detalle_reunion", pk=pk)
 
 
+# --- Subida por partes (reanudable, directo al bucket) ---
+
+def _subida_de_reunion(pk, subida_id):
+    return get_object_or_404(SubidaAudio, pk=subida_id, acta_id=pk, estado=SubidaAudio.ESTADO_INICIADA)
+
+
+@require_POST
+@login_required
+@role_required("actas", "edit")
+def iniciar_subida_audio(request, pk): # Crea (o retoma) la subida y dice qué partes faltan
+    reunion = get_object_or_404(Reunion, pk=pk)
+    acta, error = _acta_para_audio(reunion)
+    if error:
+        return JsonResponse({"ok": False, "message": error}, status=400)
+
+    try:
+        tamano = int(request.POST.get("tamano", 0))
+        subida = iniciar_subida(
+            acta, request.user, request.POST.get("nombre", ""), tamano, request.POST.get("content_type", ""),
+        )
+        subidas = [p["PartNumber"] for p in partes_subidas(subida)]
+    except (ValueError, SubidaInvalida) as e:
+        return JsonResponse({"ok": False, "message": str(e) or "Datos de subida inválidos."}, status=400)
+
+    return JsonResponse({
+        "ok": True,
+        "subida_id": subida.pk,
+        "tamano_parte": subida.tamano_parte,
+        "total_partes": subida.total_partes(),
+        "partes_subidas": subidas,
+    })
+
+
+@require_POST
+@login_required
+@role_required("actas", "edit")
+def urls_partes_audio(request, pk, subida_id): # URLs (firmadas) para subir las partes pedidas
+    subida = _subida_de_reunion(pk, subida_id)
+    try:
+        numeros = [int(n) for n in request.POST.get("partes", "").split(",") if n.strip()]
+    except ValueError:
+        return JsonResponse({"ok": False, "message": "Números de parte inválidos."}, status=400)
+
+    def url_servidor(numero):
+        return reverse("reuniones:recibir_parte_audio", args=[pk, subida.pk, numero])
+
+    urls = urls_partes(subida, numeros[:100], url_servidor)  # Se piden por tandas
+    return JsonResponse({"ok": True, "urls": {str(n): u for n, u in urls.items()}})
+
+
+@require_http_methods(["PUT"])
+@login_required
+@role_required("actas", "edit")
+def recibir_parte_audio(request, pk, subida_id, numero): # Solo con almacenamiento local (desarrollo)
+    subida = _subida_de_reunion(pk, subida_id)
+    try:
+        guardar_parte_local(subida, numero, request)
+    except SubidaInvalida as e:
+        return JsonResponse({"ok": False, "message": str(e)}, status=400)
+    return JsonResponse({"ok": True})
+
+
+@require_POST
+@login_required
+@role_required("actas", "edit")
+def completar_subida_audio(request, pk, subida_id): # Ensambla y recién entonces encola la transcripción
+    subida = _subida_de_reunion(pk, subida_id)
+    acta, error = _acta_para_audio(get_object_or_404(Reunion, pk=pk))
+    if error:
+        return JsonResponse({"ok": False, "message": error}, status=400)
+
+    try:
+        completar_subida(subida)
+    except SubidaInvalida as e:
+        return JsonResponse({"ok": False, "message": str(e)}, status=409)
+    except Exception as e:
+        logger.error(f"No se pudo completar la subida {subida.pk}: {e}")
+        return JsonResponse({"ok": False, "message": "No se pudo ensamblar el archivo."}, status=500)
+
+    acta.archivo_audio.name = subida.archivo
+    acta.huella_audio = ""  # La tarea la calcula desde el bucket antes de buscar en la caché de transcripciones
+    acta.estado_transcripcion = Acta.ESTADO_PENDIENTE
+    acta.save()
+    procesar_audio_vosk.delay(acta.pk)
+    return JsonResponse({"ok": True, "message": "¡Audio subido! El procesamiento ha comenzado en segundo plano."})
+
+
+@require_POST
+@login_required
+@role_required("actas", "edit")
+def abortar_subida_audio(request, pk, subida_id): # El usuario cancela la subida
+    abortar_subida(_subida_de_reunion(pk, subida_id))
+    return JsonResponse({"ok": True})
+
+
 @login_required
 @role_required("actas", "edit")
 def lista_grabaciones(request): # Listado de grabaciones disponibles
@@ -528,7 +646,7 @@ def lista_grabaciones(request): # Listado de grabaciones disponibles
         acta__archivo_audio__isnull=False
     ).exclude(
         acta__archivo_audio=""
-    ).select_related("acta").order_by("-fecha")
+    ).select_related("acta").defer("acta__picos_audio").order_by("-fecha")
 
     context = {
         "reuniones": reuniones_con_audio,
@@ -538,12 +656,22 @@ def lista_grabaciones(request): # Listado de grabaciones disponibles
 
 
 @login_required
-def get_acta_estado(request, pk): # API para consultar estado de transcripción
-    acta = get_object_or_404(Acta, pk=pk)
-    return JsonResponse({
-        "estado": acta.estado_transcripcion,
-        "estado_display": acta.get_estado_transcripcion_display()
+@role_required("actas", "edit")
+def picos_audio_acta(request, pk): # Forma de onda reducida para el reproductor
+    acta = get_object_or_404(Acta.objects.only("pk", "picos_audio", "duracion_audio_s"), pk=pk)
+    respuesta = JsonResponse({
+        "duracion": acta.duracion_audio_s,
+        "picos_por_segundo": PICOS_POR_SEGUNDO,
+        "picos": list(bytes(acta.picos_audio or b"")),
     })
+    respuesta["Cache-Control"] = "private, max-age=3600"
+    return respuesta
+
+
+@login_required
+def get_acta_estado(request, pk): # API para consultar estado de transcripción (respaldo del WebSocket)
+    acta = get_object_or_404(Acta, pk=pk)
+    return JsonResponse(estado_acta(acta))
 
 
 @require_POST
@@ -27,6 +27,7 @@ if __name__ == "__main__":
         '-A',               # Flag para definir la aplicación
         'proyecto_tesis',   # Nombre de la aplicación Celery
         'worker',           # Modo de ejecución (worker)
+        '-Q', 'cpu,io,analitica',  # En desarrollo un solo worker atiende todas las colas
         '--loglevel=info',  # Nivel de detalle de los logs
         '-P', 'eventlet',   # Pool de ejecución (eventlet para compatibilidad Windows)
         '-c', '2'           # Concurrencia (número de workers hijos)
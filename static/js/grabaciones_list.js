@@ -0,0 +1,56 @@
+/* static/js/grabaciones_list.js */
+
+document.addEventListener('DOMContentLoaded', () => {
+
+    // =====================================================
+    // FORMA DE ONDA: se dibuja con los picos precalculados y
+    // un clic ubica el audio sin descargar el archivo completo
+    // =====================================================
+    const dibujar = (canvas, picos, avance) => {
+        const ctx = canvas.getContext('2d');
+        const ancho = canvas.width = canvas.clientWidth;
+        const alto = canvas.height;
+        ctx.clearRect(0, 0, ancho, alto);
+        if (!picos.length) return;
+
+        const porColumna = picos.length / ancho;
+        for (let x = 0; x < ancho; x++) {
+            // Máximo de los picos que caen en esta columna
+            let max = 0;
+            const fin = Math.min(picos.length, Math.ceil((x + 1) * porColumna));
+            for (let i = Math.floor(x * porColumna); i < fin; i++) max = Math.max(max, picos[i]);
+            const h = Math.max(1, (max / 255) * alto);
+            ctx.fillStyle = x / ancho <= avance ? '#dc3545' : '#adb5bd';
+            ctx.fillRect(x, (alto - h) / 2, 1, h);
+        }
+    };
+
+    document.querySelectorAll('canvas.forma-onda').forEach(async (canvas) => {
+        const audio = canvas.parentElement.querySelector('audio');
+        let datos;
+        try {
+            const r = await fetch(canvas.dataset.picosUrl);
+            datos = await r.json();
+        } catch {
+            canvas.remove();
+            return;
+        }
+        if (!datos.picos.length || !datos.duracion) {
+            canvas.remove();
+            return;
+        }
+
+        const redibujar = () => dibujar(canvas, datos.picos, (audio.currentTime || 0) / datos.duracion);
+        redibujar();
+        window.addEventListener('resize', redibujar);
+        audio.addEventListener('timeupdate', redibujar);
+
+        canvas.addEventListener('click', (e) => {
+            const fraccion = (e.clientX - canvas.getBoundingClientRect().left) / canvas.clientWidth;
+            // Con preload="none" el navegador pide solo el rango necesario desde esa posición
+            audio.currentTime = fraccion * datos.duracion;
+            audio.play();
+        });
+    });
+
+});
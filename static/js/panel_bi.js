@@ -100,3 +100,41 @@ function dibujarAsistenciaReuniones(data) {
     });
 }
 
+
+/**
+ * Descarga del informe PDF: se genera en segundo plano, así que el botón
+ * solicita el informe, muestra el progreso y abre el enlace cuando está listo.
+ */
+function prepararDescargaInforme(boton) {
+    if (!boton) return;
+    const textoOriginal = boton.innerHTML;
+    const restaurar = () => { boton.innerHTML = textoOriginal; boton.classList.remove('disabled'); };
+
+    boton.addEventListener('click', async (e) => {
+        e.preventDefault();
+        if (boton.classList.contains('disabled')) return;
+        boton.classList.add('disabled');
+        boton.innerHTML = 'Preparando informe...';
+        try {
+            const resp = await fetch(boton.href + window.location.search, { headers: { 'X-Requested-With': 'XMLHttpRequest' } });
+            let data = await resp.json();
+            for (let intento = 0; data.ok && !data.descarga_url && intento < 200; intento++) {
+                boton.innerHTML = `Generando informe... ${data.progreso}%`;
+                await new Promise(r => setTimeout(r, 2000));
+                try {
+                    data = await (await fetch(data.estado_url)).json();
+                } catch {
+                    // Error de red puntual: se reintenta en la próxima consulta
+                }
+            }
+            if (data.descarga_url) {
+                window.location.href = data.descarga_url;
+            } else {
+                alert(data.message || 'No se pudo generar el informe.');
+            }
+        } catch {
+            alert('Error de red al solicitar el informe.');
+        }
+        restaurar();
+    });
+}
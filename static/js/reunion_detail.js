@@ -223,7 +223,9 @@ document.addEventListener('DOMContentLoaded', () => {
 
                 const data = await resp.json();
                 if (resp.ok && data.ok) {
-                    setMsg('Acta enviada correctamente', true);
+                    // El envío corre en segundo plano: se consulta su avance hasta terminar
+                    setMsg(data.message, true);
+                    seguirEnvio(data.estado_url);
                 } else {
                     setMsg(data.message || 'Error al enviar');
                 }
@@ -231,25 +233,161 @@ document.addEventListener('DOMContentLoaded', () => {
                 setMsg('Error de red');
             }
         });
+
+        const seguirEnvio = async (url) => {
+            for (let intento = 0; intento < 200; intento++) {
+                await new Promise(r => setTimeout(r, 3000));
+                try {
+                    const resp = await fetch(url);
+                    const data = await resp.json();
+                    if (!resp.ok || !data.ok) return;
+                    if (!data.terminado) {
+                        msgOk.textContent = `Enviando acta... ${data.enviados + data.fallidos} de ${data.enviados + data.fallidos + data.pendientes}`;
+                        continue;
+                    }
+                    if (data.fallidos) {
+                        setMsg(`Acta enviada a ${data.enviados} destinatarios. Fallaron: ${data.correos_fallidos.join(', ')}`);
+                    } else {
+                        setMsg(`Acta enviada correctamente a ${data.enviados} destinatarios.`, true);
+                    }
+                    return;
+                } catch {
+                    // Error de red puntual: se reintenta en la próxima consulta
+                }
+            }
+        };
     }
 
     // =====================================================
-    // 3. POLLING ESTADO DE TRANSCRIPCIÓN
+    // 2b. SUBIDA DE AUDIO POR PARTES (reanudable, directo al bucket)
+    // =====================================================
+    const formAudio = document.getElementById('formSubirAudio');
+    const inputAudio = document.getElementById('audio_file_input');
+    const subidaProgreso = document.getElementById('subida-progreso');
+
+    const postForm = async (url, datos) => {
+        const fd = new FormData();
+        Object.entries(datos).forEach(([k, v]) => fd.append(k, v));
+        const resp = await fetch(url, { method: 'POST', headers: { 'X-CSRFToken': getCSRF() }, body: fd });
+        const data = await resp.json();
+        if (!resp.ok || !data.ok) throw new Error(data.message || 'Error en la subida');
+        return data;
+    };
+
+    const subirParte = async (url, blob) => {
+        // Las URLs firmadas van al bucket (sin cabeceras extra); las relativas, al servidor
+        const headers = url.startsWith('/') ? { 'X-CSRFToken': getCSRF() } : {};
+        for (let intento = 1; ; intento++) {
+            try {
+                const resp = await fetch(url, { method: 'PUT', headers, body: blob });
+                if (resp.ok) return;
+                if (intento >= 4) throw new Error(`HTTP ${resp.status}`);
+            } catch (e) {
+                if (intento >= 4) throw e;
+            }
+            await new Promise(r => setTimeout(r, 1000 * 2 ** intento));  // Reintento con espera creciente
+        }
+    };
+
+    if (formAudio && inputAudio && config.urls.subidaAudio && window.fetch && window.Blob) {
+        formAudio.addEventListener('submit', async (e) => {
+            const archivo = inputAudio.files[0];
+            if (!archivo) return;  // El servidor muestra el mensaje de error
+            e.preventDefault();
+
+            const boton = document.getElementById('btnSubirAudio');
+            if (boton) boton.disabled = true;
+            const base = config.urls.subidaAudio;
+
+            try {
+                // Si ya había una subida de este archivo, el servidor indica qué partes tiene
+                const subida = await postForm(base, {
+                    nombre: archivo.name, tamano: archivo.size, content_type: archivo.type || ''
+                });
+                const hechas = new Set(subida.partes_subidas);
+                const pendientes = [];
+                for (let n = 1; n <= subida.total_partes; n++) if (!hechas.has(n)) pendientes.push(n);
+
+                let listas = hechas.size;
+                const mostrar = () => {
+                    subidaProgreso.textContent = `Subiendo audio: ${Math.round(100 * listas / subida.total_partes)}%`;
+                };
+                mostrar();
+
+                // Tandas de URLs; dentro de cada tanda, 3 partes en paralelo
+                for (let i = 0; i < pendientes.length; i += 30) {
+                    const tanda = pendientes.slice(i, i + 30);
+                    const { urls } = await postForm(`${base}${subida.subida_id}/urls/`, { partes: tanda.join(',') });
+                    const cola = [...tanda];
+                    const trabajador = async () => {
+                        while (cola.length) {
+                            const n = cola.shift();
+                            const inicio = (n - 1) * subida.tamano_parte;
+                            await subirParte(urls[n], archivo.slice(inicio, inicio + subida.tamano_parte));
+                            listas++;
+                            mostrar();
+                        }
+                    };
+                    await Promise.all([trabajador(), trabajador(), trabajador()]);
+                }
+
+                subidaProgreso.textContent = 'Verificando archivo...';
+                await postForm(`${base}${subida.subida_id}/completar/`, {});
+                location.reload();
+            } catch (err) {
+                subidaProgreso.textContent = `${err.message}. Vuelve a seleccionar el archivo para continuar donde quedó.`;
+                if (boton) boton.disabled = false;
+            }
+        });
+    }
+
+    // =====================================================
+    // 3. ESTADO DE TRANSCRIPCIÓN (WebSocket, con polling de respaldo)
     // =====================================================
     const barra = document.getElementById('transcripcion-pendiente');
-    if (barra && config.urls.estadoActa) {
+
+    const mostrarEstado = (d) => {
+        if (['COMPLETADO', 'ERROR'].includes(d.estado)) {
+            location.reload();
+            return true;
+        }
+        // Avance y tiempo restante estimado
+        const progreso = document.getElementById('transcripcion-progreso');
+        if (progreso && d.progreso !== null) {
+            let texto = `Avance: ${Math.round(d.progreso)}%`;
+            if (d.eta_segundos !== null) {
+                texto += ` · quedan ~${Math.max(1, Math.ceil(d.eta_segundos / 60))} min`;
+            }
+            progreso.textContent = texto;
+        }
+        return false;
+    };
+
+    const iniciarPolling = () => {
         const poll = setInterval(async () => {
             try {
                 const r = await fetch(config.urls.estadoActa);
-                const d = await r.json();
-                if (['COMPLETADO', 'ERROR'].includes(d.estado)) {
-                    clearInterval(poll);
-                    location.reload();
-                }
+                if (mostrarEstado(await r.json())) clearInterval(poll);
             } catch {
                 clearInterval(poll);
             }
         }, 5000);
+    };
+
+    if (barra && config.urls.estadoActa) {
+        if (config.urls.wsEstadoActa && 'WebSocket' in window) {
+            const protocolo = location.protocol === 'https:' ? 'wss' : 'ws';
+            const ws = new WebSocket(`${protocolo}://${location.host}${config.urls.wsEstadoActa}`);
+            let terminado = false;
+            ws.onmessage = (e) => {
+                terminado = mostrarEstado(JSON.parse(e.data));
+                if (terminado) ws.close();
+            };
+            // Si el WebSocket no está disponible (o se corta) se vuelve a consultar por HTTP
+            ws.onclose = () => { if (!terminado) iniciarPolling(); };
+        } else {
+            iniciarPolling();
+        }
     }
 
 });
@@ -11,6 +11,7 @@ from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
 from .models import Taller
 from .tasks import notificar_nuevo_taller, notificar_cancelacion_taller
+from core.outbox import encolar_tarea
 
 @receiver(pre_save, sender=Taller)
 def detectar_cambios_taller(sender, instance, **kwargs):
@@ -32,8 +33,8 @@ def detectar_cambios_taller(sender, instance, **kwargs):
 def trigger_notificacion_taller(sender, instance, created, **kwargs):
     # 1. Caso Nuevo Taller: Si se crea y está programado, notificar.
     if created and instance.estado == Taller.Estado.PROGRAMADO:
-        notificar_nuevo_taller.delay(instance.id)
+        encolar_tarea(notificar_nuevo_taller, instance.id)
     
     # 2. Caso Taller Cancelado: Si se detectó cancelación en pre_save, notificar.
     elif hasattr(instance, '_se_cancelo_ahora') and instance._se_cancelo_ahora:
-        notificar_cancelacion_taller.delay(instance.id)
\ No newline at end of file
+        encolar_tarea(notificar_cancelacion_taller, instance.id)
\ No newline at end of file
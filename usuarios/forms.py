@@ -14,16 +14,13 @@ import secrets  # Generación segura de números aleatorios
 import string  # Constantes de cadena (letras, dígitos)
 
 from django import forms  # Importa módulo de formularios de Django
-from django.conf import settings  # Importa configuraciones del proyecto
 from django.contrib.auth import get_user_model  # Obtiene el modelo de usuario activo
 from django.core.validators import RegexValidator  # Validador basado en regex
 from django.db import transaction  # Manejo de transacciones de base de datos
-from django.template.loader import render_to_string  # Renderiza templates a texto
-from django.utils.html import strip_tags  # Elimina etiquetas HTML
 
 from core.models import Perfil  # Importa el modelo Perfil
 from core.rut import normalizar_rut, dv_mod11, validar_rut  # Utilidades para RUT
-from usuarios.utils import enviar_correo_via_webhook  # Utilidad de envío de correo
+from usuarios.tasks import enviar_correo_bienvenida  # Envío del correo en segundo plano
 
 User = get_user_model()  # Referencia al modelo User
 
@@ -297,34 +294,12 @@ class UsuarioCrearForm(forms.ModelForm):
             debe_cambiar_password=True,
         )
 
-        #  Enviar correo por WEBHOOK
+        #  Enviar correo por WEBHOOK desde la cola io, una vez confirmada la creación
+        #  (robust: un broker caído no rompe la creación del usuario)
         if user.email:
-            try:
-                host = getattr(settings, "RENDER_EXTERNAL_HOSTNAME", "127.0.0.1:8000")
-                protocol = "https" if getattr(settings, "RENDER_EXTERNAL_HOSTNAME", None) else "http"
-                link_login = f"{protocol}://{host}/accounts/login/"
-
-                contexto = {
-                    "nombre": user.first_name,
-                    "rut": user.username,
-                    "password": password_provisoria,
-                    "link_login": link_login,
-                }
-
-                html_body = render_to_string("usuarios/email_bienvenida.html", contexto)
-                text_body = strip_tags(html_body)
-                asunto = "Bienvenido a Villa Vista al Mar - Credenciales de Acceso"
-
-                # Llama a la utilidad de envío
-                enviar_correo_via_webhook(
-                    to_email=user.email,
-                    subject=asunto,
-                    html_body=html_body,
-                    text_body=text_body,
-                )
-            except Exception:
-                # no romper creación por error de correo
-                pass
+            transaction.on_commit(
+                lambda: enviar_correo_bienvenida.delay(user.pk, password_provisoria), robust=True,
+            )
 
         return user
 
@@ -0,0 +1,73 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Correos de cuentas de usuario (bienvenida y códigos de
+               recuperación) enviados desde la cola io. La petición solo
+               encola: ante una ráfaga los envíos esperan turno en el
+               limitador del webhook en vez de fallar.
+--------------------------------------------------------------------------------
+"""
+# usuarios/tasks.py
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .utils import enviar_correo_via_webhook
+
+logger = logging.getLogger(__name__)
+
+
+def _enviar(email, asunto, plantilla, contexto): # Renderiza la plantilla y la envía esperando turno
+    html_body = render_to_string(plantilla, contexto)
+    return enviar_correo_via_webhook(
+        to_email=email,
+        subject=asunto,
+        html_body=html_body,
+        text_body=strip_tags(html_body),
+        en_segundo_plano=True,
+    )
+
+
+@shared_task(name="enviar_correo_bienvenida")
+def enviar_correo_bienvenida(usuario_id, password_provisoria):
+    """Envía las credenciales de acceso a un vecino recién creado."""
+    user = get_user_model().objects.get(pk=usuario_id)
+    if not user.email:
+        return f"Usuario {user.username} sin correo."
+
+    host = getattr(settings, "RENDER_EXTERNAL_HOSTNAME", "127.0.0.1:8000")
+    protocol = "https" if getattr(settings, "RENDER_EXTERNAL_HOSTNAME", None) else "http"
+    contexto = {
+        "nombre": user.first_name,
+        "rut": user.username,
+        "password": password_provisoria,
+        "link_login": f"{protocol}://{host}/accounts/login/",
+    }
+    ok = _enviar(user.email, "Bienvenido a Villa Vista al Mar - Credenciales de Acceso",
+                 "usuarios/email_bienvenida.html", contexto)
+    if not ok:
+        logger.error(f"[CORREO] No se pudo enviar la bienvenida a {user.email}")
+    return f"Bienvenida {'enviada' if ok else 'no enviada'} a {user.email}."
+
+
+@shared_task(name="enviar_codigo_recuperacion")
+def enviar_codigo_recuperacion(usuario_id, plantilla, asunto):
+    """
+    Envía el código de recuperación vigente del usuario. El código se lee de la
+    base (no viaja por el broker); si ya expiró no se envía.
+    """
+    user = get_user_model().objects.select_related("perfil").get(pk=usuario_id)
+    perfil = user.perfil
+    if not perfil.recovery_code or not perfil.recovery_code_expires or perfil.recovery_code_expires <= timezone.now():
+        return f"Código de recuperación de {user.username} expirado, no se envió."
+
+    ok = _enviar(user.email, asunto, plantilla, {"user": user, "codigo": perfil.recovery_code})
+    if not ok:
+        logger.error(f"[CORREO] No se pudo enviar el código de recuperación a {user.email}")
+    return f"Código de recuperación {'enviado' if ok else 'no enviado'} a {user.email}."
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Perfil
+from usuarios import tasks, utils
+
+
+class LimitadorTasaTests(SimpleTestCase):
+    def test_rafaga_y_luego_tasa_constante(self):
+        """Tras la ráfaga inicial cada envío espera su turno según la tasa, sin fallar."""
+        reloj = [100.0]
+        with mock.patch.object(utils.time, "monotonic", lambda: reloj[0]), \
+                mock.patch.object(utils.time, "sleep") as dormir:
+            limitador = utils.LimitadorTasa(tasa=2, capacidad=2)
+            self.assertTrue(all(limitador.adquirir() for _ in range(4)))
+        self.assertEqual([c.args[0] for c in dormir.call_args_list], [0.5, 1.0])
+
+    def test_espera_mayor_al_maximo_no_consume_ficha(self):
+        """Si la espera supera el máximo se rechaza el envío y la ficha queda para el siguiente."""
+        reloj = [0.0]
+        with mock.patch.object(utils.time, "monotonic", lambda: reloj[0]), \
+                mock.patch.object(utils.time, "sleep"):
+            limitador = utils.LimitadorTasa(tasa=1, capacidad=1)
+            self.assertTrue(limitador.adquirir(espera_max=0))
+            self.assertFalse(limitador.adquirir(espera_max=0.5))
+            reloj[0] = 1.0
+            self.assertTrue(limitador.adquirir(espera_max=0))
+
+
+class SesionWebhookTests(SimpleTestCase):
+    def setUp(self):
+        utils._sesion_pid = None  # Sesiones nuevas con la configuración de la prueba
+        self.addCleanup(setattr, utils, "_sesion_pid", None)
+
+    @override_settings(APPSCRIPT_WEBHOOK_REINTENTOS=4)
+    def test_no_se_reintenta_lo_que_pudo_haber_enviado_el_correo(self):
+        """Solo las tareas reintentan, y nunca tras un timeout de lectura ni ante un 5xx distinto de 503."""
+        tarea = utils._sesion_webhook(con_reintentos=True).get_adapter("https://x").max_retries
+        self.assertEqual((tarea.connect, tarea.read, tarea.status), (4, 0, 4))
+        self.assertEqual(set(tarea.status_forcelist), {429, 503})
+        web = utils._sesion_webhook().get_adapter("https://x").max_retries
+        self.assertEqual(web.total, 0)
+
+    @override_settings(APPSCRIPT_WEBHOOK_URL="https://x", APPSCRIPT_WEBHOOK_SECRET="s", APPSCRIPT_WEBHOOK_ESPERA_MAX_S=120)
+    def test_solo_en_segundo_plano_se_espera_turno_en_el_limitador(self):
+        """Sin en_segundo_plano el envío no espera al limitador; las tareas esperan hasta el máximo."""
+        utils._sesion_webhook()
+        with mock.patch.object(utils._limitador, "adquirir", return_value=False) as adquirir:
+            self.assertFalse(utils.enviar_correo_via_webhook("a@x.cl", "Asunto", "<p>Hola</p>"))
+            utils.enviar_correo_via_webhook("a@x.cl", "Asunto", "<p>Hola</p>", en_segundo_plano=True)
+        self.assertEqual([c.args[0] for c in adquirir.call_args_list], [0, 120])
+
+
+class CorreosEnSegundoPlanoTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="11111111-1", email="vecino@x.cl", password="123")
+        self.perfil = Perfil.objects.create(usuario=self.user, rol="vecino", rut="11.111.111-1", direccion="Test")
+
+    def test_recuperacion_web_encola_el_correo_sin_llamar_al_webhook(self):
+        """La vista guarda el código y encola el correo; la petición no llama al webhook."""
+        with mock.patch.object(utils, "enviar_correo_via_webhook") as webhook, \
+                mock.patch("usuarios.views.enviar_codigo_recuperacion.delay") as encolar:
+            respuesta = self.client.post(reverse("web_recuperar_paso1"), {"email": "vecino@x.cl"})
+
+        self.assertRedirects(respuesta, reverse("web_recuperar_paso2"), fetch_redirect_response=False)
+        encolar.assert_called_once_with(
+            self.user.pk, "registration/email_codigo_otp.html", "Código de Recuperación - Junta de Vecinos",
+        )
+        webhook.assert_not_called()
+        self.perfil.refresh_from_db()
+        self.assertEqual(len(self.perfil.recovery_code), 6)
+
+    def test_tarea_envia_el_codigo_vigente_esperando_turno(self):
+        """La tarea lee el código de la base y envía en segundo plano; un código expirado no se envía."""
+        self.perfil.recovery_code = "123456"
+        self.perfil.recovery_code_expires = timezone.now() + timedelta(minutes=15)
+        self.perfil.save()
+
+        with mock.patch.object(tasks, "enviar_correo_via_webhook", return_value=True) as webhook:
+            tasks.enviar_codigo_recuperacion(self.user.pk, "registration/email_codigo_otp.html", "Asunto")
+            self.perfil.recovery_code_expires = timezone.now() - timedelta(minutes=1)
+            self.perfil.save()
+            tasks.enviar_codigo_recuperacion(self.user.pk, "registration/email_codigo_otp.html", "Asunto")
+
+        webhook.assert_called_once()
+        self.assertTrue(webhook.call_args.kwargs["en_segundo_plano"])
+        self.assertEqual(webhook.call_args.kwargs["to_email"], "vecino@x.cl")
+        self.assertIn("123456", webhook.call_args.kwargs["html_body"])
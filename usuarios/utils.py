@@ -4,18 +4,120 @@ Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
 Fecha de Modificación: 19/12/2025
 Descripción:   Utilidad auxiliar para enviar correos electrónicos utilizando un 
                Webhook de Google Apps Script. Permite enviar correos simples y 
-               con adjuntos (PDFs) codificados en Base64.
+               con adjuntos (PDFs) codificados en Base64. Las llamadas usan una
+               sesión HTTP compartida por proceso (keep-alive); las tareas en
+               segundo plano reintentan con espera exponencial ante 429/503 y
+               esperan turno en un limitador de tasa para no superar la cuota
+               de Apps Script en envíos masivos.
 --------------------------------------------------------------------------------
 """
 # usuarios/utils.py
 import base64
 import logging
+import os
+import threading
+import time
+
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
 
+class LimitadorTasa:
+    """
+    Token bucket: permite ráfagas de 'capacidad' envíos y luego 'tasa' por segundo.
+    adquirir() espera su turno (hasta 'espera_max' segundos) en vez de fallar.
+    Es por proceso, no global: como todos los correos salen de la cola io (pool
+    threads, un proceso por worker), con N workers io la tasa total es N veces
+    APPSCRIPT_WEBHOOK_POR_SEGUNDO y la cuota debe repartirse entre ellos.
+    """
+
+    def __init__(self, tasa, capacidad):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self._fichas = float(capacidad)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reservar(self): # Toma una ficha; devuelve cuánto esperar hasta que esté disponible
+        with self._lock:
+            ahora = time.monotonic()
+            self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            self._fichas -= 1  # Puede quedar negativo: la deuda ordena a los que esperan
+            return max(0.0, -self._fichas / self.tasa)
+
+    def adquirir(self, espera_max=None):
+        espera = self._reservar()
+        if espera_max is not None and espera > espera_max:
+            with self._lock:
+                self._fichas += 1  # Se devuelve la ficha: este envío no se hará
+            return False
+        if espera:
+            time.sleep(espera)
+        return True
+
+
+_sesiones = {}  # {con_reintentos: sesión}
+_sesion_pid = None
+_sesion_lock = threading.Lock()
+_limitador = None
+
+
+def _sesion_webhook(con_reintentos=False):
+    """
+    Sesión HTTP del proceso (se recrea tras un fork para no compartir sockets).
+    Solo las tareas en segundo plano usan la sesión con reintentos: en una
+    petición web no se puede esperar el backoff.
+    """
+    global _sesiones, _sesion_pid, _limitador
+    if _sesion_pid == os.getpid() and con_reintentos in _sesiones:
+        return _sesiones[con_reintentos]
+    with _sesion_lock:
+        if _sesion_pid != os.getpid():
+            _sesiones = {}
+            _limitador = LimitadorTasa(settings.APPSCRIPT_WEBHOOK_POR_SEGUNDO, settings.APPSCRIPT_WEBHOOK_RAFAGA)
+            _sesion_pid = os.getpid()
+        if con_reintentos not in _sesiones:
+            intentos = settings.APPSCRIPT_WEBHOOK_REINTENTOS if con_reintentos else 0
+            reintentos = Retry(
+                total=intentos,
+                connect=intentos,  # No se llegó a enviar: reintentar es seguro
+                read=0,  # Timeout leyendo la respuesta: el correo pudo salir, no se repite
+                status=intentos,
+                other=0,
+                status_forcelist=(429, 503),  # Rechazos antes de ejecutar el script; otro 5xx pudo haber enviado
+                allowed_methods=frozenset({"POST"}),
+                backoff_factor=1,  # 1, 2, 4, 8 s...
+                backoff_jitter=0.5,  # ...más un azar para no reintentar todos a la vez
+                backoff_max=30,
+                respect_retry_after_header=True,
+                raise_on_status=False,  # La última respuesta se evalúa con raise_for_status
+            )
+            sesion = requests.Session()
+            sesion.mount("https://", HTTPAdapter(
+                pool_maxsize=settings.APPSCRIPT_WEBHOOK_CONEXIONES, max_retries=reintentos,
+            ))
+            _sesiones[con_reintentos] = sesion
+    return _sesiones[con_reintentos]
+
+
+def codificar_adjunto(attachment_bytes: bytes, filename: str, content_type: str = "application/pdf") -> dict | None:
+    """Campos del adjunto para el payload del webhook (Base64). None si el archivo viene vacío."""
+    if not attachment_bytes:
+        # PDF vacío → no adjuntamos (pero lo dejamos registrado)
+        logger.error("[WEBHOOK EMAIL] PDF vacío (0 bytes). No se adjunta.")
+        return None
+    return {
+        "filename": filename,
+        "content_type": content_type,
+        "attachment": base64.b64encode(attachment_bytes).decode("utf-8"),  # Codifica a Base64 para envío HTTP
+    }
+
+
 def enviar_correo_via_webhook(
     to_email: str,
     subject: str,
@@ -24,10 +126,17 @@ def enviar_correo_via_webhook(
     attachment_bytes: bytes | None = None,
     filename: str | None = None,
     content_type: str = "application/pdf",
+    adjunto: dict | None = None,
+    en_segundo_plano: bool = False,
 ) -> bool:
     """
     Envía un correo usando el Webhook de Google Apps Script.
-    Soporta adjuntos enviando Base64 + filename.
+    Soporta adjuntos enviando Base64 + filename. En envíos masivos se pasa
+    'adjunto' ya codificado (codificar_adjunto) para no repetir el Base64.
+    Las peticiones web no lo llaman directamente: encolan una tarea de la cola
+    io (usuarios.tasks, reuniones, votaciones) que pasa en_segundo_plano=True,
+    espera turno en el limitador y reintenta ante 429/503. Con el valor por
+    defecto no se espera ni se reintenta.
     """
 
     # Obtiene URL y secreto desde settings
@@ -47,35 +156,23 @@ def enviar_correo_via_webhook(
         "text_body": text_body or " ",
     }
 
-    # DEBUG: confirma si viene adjunto y cuánto pesa
-    logger.warning(
-        f"[WEBHOOK EMAIL] to={to_email} filename={filename} "
-        f"has_attachment_bytes={attachment_bytes is not None} "
-        f"bytes_len={(len(attachment_bytes) if attachment_bytes is not None else 'None')}"
-    )
-
-    # Adjuntar si viene archivo (aunque sea b"" lo detectamos)
-    if attachment_bytes is not None and filename:
-        if len(attachment_bytes) == 0:
-            # PDF vacío → no adjuntamos (pero lo dejamos registrado)
-            logger.error("[WEBHOOK EMAIL] PDF vacío (0 bytes). No se adjunta.")
-        else:
-            payload["filename"] = filename
-            payload["content_type"] = content_type
-            # Codifica a Base64 para envío HTTP
-            payload["attachment"] = base64.b64encode(attachment_bytes).decode("utf-8")
-
-            logger.warning(
-                f"[WEBHOOK EMAIL] Adjuntando: {filename} "
-                f"attachment_b64_len={len(payload['attachment'])}"
-            )
+    # Adjuntar si viene archivo (ya codificado o en bytes)
+    if adjunto is None and attachment_bytes is not None and filename:
+        adjunto = codificar_adjunto(attachment_bytes, filename, content_type)
+    if adjunto:
+        payload.update(adjunto)
+
+    sesion = _sesion_webhook(con_reintentos=en_segundo_plano)
+    if not _limitador.adquirir(settings.APPSCRIPT_WEBHOOK_ESPERA_MAX_S if en_segundo_plano else 0):
+        logger.error(f"[WEBHOOK EMAIL] Cola de envío saturada, no se envió a {to_email}")
+        return False
 
     try:
-        # Envía la petición POST al Webhook
-        resp = requests.post(
+        # Envía la petición POST al Webhook (conexión reutilizada, reintentos en la sesión)
+        resp = sesion.post(
             url,
-            json=payload,   #  correcto
-            timeout=30,     # un poco más por el tamaño del PDF
+            json=payload,
+            timeout=(5, 30) if en_segundo_plano else (5, 20),  # Conexión / respuesta (más en tareas, por el PDF)
         )
         resp.raise_for_status()
 
@@ -33,9 +33,7 @@ from django.core.paginator import Paginator
 from django.db.models import Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.template.loader import render_to_string
 from django.utils import timezone
-from django.utils.html import strip_tags
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods, require_POST
 
@@ -48,7 +46,7 @@ from django.contrib.auth.password_validation import validate_password
 from core.authz import role_required
 from core.models import Perfil
 from .forms import UsuarioCrearForm, UsuarioEditarForm
-from .utils import enviar_correo_via_webhook # <-- USAMOS EL WEBHOOK
+from .tasks import enviar_codigo_recuperacion  # Correo por el webhook desde la cola io
 
 User = get_user_model()
 
@@ -482,27 +480,14 @@ def web_recuperar_paso1(request):
                 perfil.recovery_code_expires = timezone.now() + timedelta(minutes=15)
                 perfil.save(update_fields=['recovery_code', 'recovery_code_expires']) # <-- Actualización eficiente
 
-                # 3. Construir correo HTML/TXT
-                html_message = render_to_string(
-                    'registration/email_codigo_otp.html',
-                    {
-                        'user': user,
-                        'codigo': codigo,
-                    },
-                )
-                plain_message = strip_tags(html_message)
-
-                subject = 'Código de Recuperación - Junta de Vecinos'
-
-                # 4. Enviar correo VIA WEBHOOK (Offloading: evita que el hilo HTTP espere)
-                ok = enviar_correo_via_webhook(
-                    to_email=user.email,
-                    subject=subject,
-                    html_body=html_message,
-                    text_body=plain_message,
-                )
-
-                if ok:
+                # 3. Encolar el correo (cola io): ante una ráfaga espera turno en vez de fallar
+                try:
+                    enviar_codigo_recuperacion.delay(
+                        user.pk, 'registration/email_codigo_otp.html', 'Código de Recuperación - Junta de Vecinos',
+                    )
+                except Exception:
+                    messages.error(request, "No se pudo enviar el correo de recuperación. Intenta nuevamente.")
+                else:
                     # Guardamos el email en sesión
                     request.session['recuperar_email'] = user.email
                     messages.success(
@@ -510,12 +495,6 @@ def web_recuperar_paso1(request):
                         f"Código enviado a {user.email}. Revisa tu bandeja de entrada."
                     )
                     return redirect('web_recuperar_paso2')
-                else:
-                    messages.error(
-                        request,
-                        "No se pudo enviar el correo de recuperación. "
-                        "Verifica la configuración del webhook."
-                    )
             else:
                 messages.error(request, "El usuario no tiene un perfil asociado.")
         else:
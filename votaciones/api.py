@@ -11,10 +11,7 @@ from django.shortcuts import get_object_or_404  # Helper para obtener objeto o 4
 from django.utils import timezone  # Utilidades de fecha y hora
 from django.db import transaction  # Manejo de transacciones atómicas
 from django.db.models import Count  # Funciones de agregación
-from django.utils.html import strip_tags  # Limpieza de HTML para textos planos
-from usuarios.utils import enviar_correo_via_webhook  # Utilidad de envío de correos
-from django.conf import settings  # Configuraciones del proyecto
-from django.template.loader import render_to_string  # Renderizado de templates
+import logging  # Registro de errores
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.authentication import TokenAuthentication, SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
@@ -22,6 +19,12 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import Votacion, Opcion, Voto, LogIntentoVoto
+from . import codigo_voto  # Estado del envío del código MFA (caché)
+from .tasks import enviar_codigo_voto  # Envío del código en segundo plano
+
+logger = logging.getLogger(__name__)
+
+VALIDEZ_CODIGO_S = 5 * 60  # Igual que Perfil.generar_mfa
 
 def _dto_votacion(v, user):
     """
@@ -88,45 +91,46 @@ def solicitar_codigo_voto(request):
             status=400,
         )
 
-    # Genera el código en el perfil del usuario
-    codigo = user.perfil.generar_mfa()
+    perfil = user.perfil
 
-    subject = "Código de Seguridad para Votación"
-    nombre = (user.first_name or user.username or "Vecino").strip()
+    # Toques repetidos mientras el código sigue vigente: no se genera ni reenvía otro
+    if not codigo_voto.reservar_envio(user.pk, VALIDEZ_CODIGO_S):
+        estado = codigo_voto.estado_envio(perfil)
+        return Response({
+            "ok": True,
+            "mensaje": f"Ya enviamos un código a {user.email}. Revisa tu correo.",
+            **estado,
+        })
 
-    # Prepara el contexto para el correo
-    contexto = {
-        'nombre': nombre,
-        'codigo': codigo
-    }
-    
-    # Renderiza la plantilla HTML del correo
-    html_body = render_to_string('votaciones/email_codigo_voto.html', contexto)
-    
-    # Genera versión en texto plano
-    text_body = strip_tags(html_body)
-
-    # Envía el correo usando el webhook configurado
-    ok = enviar_correo_via_webhook(
-        to_email=user.email,
-        subject=subject,
-        html_body=html_body,
-        text_body=text_body,
-    )
+    # Genera el código y encola el correo (cola io); la petición no espera al webhook
+    perfil.generar_mfa()
+    try:
+        enviar_codigo_voto.delay(user.pk)
+    except Exception as e:
+        codigo_voto.marcar_envio(perfil, codigo_voto.ESTADO_FALLIDO, "Servicio de envío no disponible.")
+        logger.error(f"No se pudo encolar el código de voto de {user.username}: {e}")
+        return Response(
+            {"ok": False, "mensaje": "No se pudo enviar el código. Intenta nuevamente."},
+            status=503,
+        )
 
-    if ok:
-        return Response({"ok": True, "mensaje": f"Código enviado a {user.email}"})
-
-    return Response(
-        {
-            "ok": False,
-            "mensaje": (
-                "No se pudo enviar el correo (webhook). "
-                "Verifique la configuración del servicio de correos."
-            ),
-        },
-        status=500,
-    )
+    return Response({
+        "ok": True,
+        "mensaje": f"Enviando código a {user.email}",
+        **codigo_voto.estado_envio(perfil),
+    })
+
+
+@api_view(["GET"])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def estado_codigo_voto(request):
+    """
+    Endpoint: Estado del envío del último código (PENDIENTE, ENVIADO, FALLIDO o null).
+    """
+    if not hasattr(request.user, "perfil"):
+        return Response({"ok": False, "mensaje": "El usuario no tiene perfil asociado."}, status=400)
+    return Response({"ok": True, **codigo_voto.estado_envio(request.user.perfil)})
 
 @api_view(["POST"])
 @authentication_classes([TokenAuthentication])
@@ -194,6 +198,7 @@ def votar(request, pk: int):
     # Invalida el código MFA usado
     user.perfil.mfa_code = None
     user.perfil.save()
+    codigo_voto.liberar_envio(user.pk)  # El próximo voto podrá pedir un código nuevo
 
     # Registra intento exitoso en el log
     try:
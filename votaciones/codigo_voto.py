@@ -0,0 +1,60 @@
+"""
+--------------------------------------------------------------------------------
+Integrantes:           Matias Pinilla, Herna Leris, Kassandra Ramos
+Fecha de Modificación: 18/10/2026
+Descripción:   Estado del envío del código MFA de votación. Se guarda en caché
+               (Redis) mientras el código esté vigente: así la petición solo
+               genera el código y encola el correo, los toques repetidos no
+               reenvían y la app puede consultar si el correo ya salió.
+--------------------------------------------------------------------------------
+"""
+from django.core.cache import cache
+from django.utils import timezone
+
+ESTADO_PENDIENTE = "PENDIENTE"
+ESTADO_ENVIADO = "ENVIADO"
+ESTADO_FALLIDO = "FALLIDO"
+
+
+def clave_envio(usuario_pk): # Un envío vigente por usuario
+    return f"codigo-voto-{usuario_pk}"
+
+
+def _vigencia_s(perfil): # Lo que le queda al código (mínimo 1 s para la caché)
+    if not perfil.mfa_expires:
+        return 1
+    return max(1, int((perfil.mfa_expires - timezone.now()).total_seconds()))
+
+
+def reservar_envio(usuario_pk, ttl):
+    """
+    True si corresponde generar y enviar un código nuevo. False si hay un envío
+    vigente (pendiente o ya entregado). cache.add es atómico: dos toques
+    simultáneos no generan dos correos.
+    """
+    if cache.add(clave_envio(usuario_pk), {"estado": ESTADO_PENDIENTE}, ttl):
+        return True
+    actual = cache.get(clave_envio(usuario_pk))
+    if actual is None or actual["estado"] == ESTADO_FALLIDO:  # Expiró recién o falló: se permite reintentar
+        cache.set(clave_envio(usuario_pk), {"estado": ESTADO_PENDIENTE}, ttl)
+        return True
+    return False
+
+
+def liberar_envio(usuario_pk): # El código se usó: el siguiente pedido genera uno nuevo
+    cache.delete(clave_envio(usuario_pk))
+
+
+def marcar_envio(perfil, estado, detalle=""):
+    """Registra el resultado del envío por lo que resta de vigencia del código."""
+    datos = {"estado": estado, "detalle": detalle}
+    ttl = _vigencia_s(perfil) if estado != ESTADO_FALLIDO else 300  # Un fallo se recuerda aunque el código expire
+    cache.set(clave_envio(perfil.usuario_id), datos, ttl)
+
+
+def estado_envio(perfil):
+    """{"estado", "detalle", "expira"} del último código, o estado None si no hay envío vigente."""
+    datos = cache.get(clave_envio(perfil.usuario_id)) or {"estado": None, "detalle": ""}
+    vigente = perfil.mfa_expires and perfil.mfa_expires > timezone.now()
+    datos["expira"] = perfil.mfa_expires.isoformat() if vigente else None
+    return datos
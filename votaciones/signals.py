@@ -11,9 +11,10 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import Votacion
 from .tasks import notificar_nueva_votacion
+from core.outbox import encolar_tarea
 
 @receiver(post_save, sender=Votacion)
 def trigger_notificacion_votacion(sender, instance, created, **kwargs):
     # Solo notificamos si es una creación Y la votación está marcada como activa
     if created and instance.activa:
-        notificar_nueva_votacion.delay(instance.id)
\ No newline at end of file
+        encolar_tarea(notificar_nueva_votacion, instance.id)
\ No newline at end of file
@@ -8,39 +8,19 @@ Descripción:   Tareas asíncronas para enviar notificaciones Push (FCM) a los
 """
 # votaciones/tasks.py
 from celery import shared_task
-from django.conf import settings
-import firebase_admin
-from firebase_admin import messaging, credentials
+from firebase_admin import messaging
+from core.notificaciones import inicializar_firebase
+from django.contrib.auth import get_user_model
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+from usuarios.utils import enviar_correo_via_webhook
 from .models import Votacion
+from . import codigo_voto
 import logging
 
 logger = logging.getLogger(__name__)
 
-def inicializar_firebase():
-    """Inicializa Firebase si no está activo ya"""
-    if not firebase_admin._apps:
-        try:
-            project_id = getattr(settings, "FIREBASE_PROJECT_ID", None)
-            client_email = getattr(settings, "FIREBASE_CLIENT_EMAIL", None)
-            private_key = getattr(settings, "FIREBASE_PRIVATE_KEY", None)
-            
-            if project_id and client_email and private_key:
-                cred = credentials.Certificate({
-                    "type": "service_account",
-                    "project_id": project_id,
-                    "private_key_id": getattr(settings, "FIREBASE_PRIVATE_KEY_ID", "dummy"),
-                    "private_key": private_key.replace("\\n", "\n"),
-                    "client_email": client_email,
-                    "client_id": "dummy",
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                    "client_x509_cert_url": f"https://www.googleapis.com/robot/v1/metadata/x509/{client_email}",
-                })
-                firebase_admin.initialize_app(cred)
-        except Exception as e:
-            logger.error(f"Error inicializando Firebase en Votaciones: {e}")
-
 @shared_task
 def notificar_nueva_votacion(votacion_id):
     """
@@ -72,4 +52,35 @@ def notificar_nueva_votacion(votacion_id):
     except Votacion.DoesNotExist:
         return f"Votación {votacion_id} no encontrada."
     except Exception as e:
-        return f"Error enviando notif votación: {e}"
\ No newline at end of file
+        return f"Error enviando notif votación: {e}"
+
+
+@shared_task(name="enviar_codigo_voto")
+def enviar_codigo_voto(usuario_id):
+    """
+    Envía por correo el código MFA vigente del usuario (cola io) y deja el
+    resultado en caché para que la app lo consulte.
+    """
+    user = get_user_model().objects.select_related("perfil").get(pk=usuario_id)
+    perfil = user.perfil
+
+    # El código se lee de la base (no viaja por el broker); si ya expiró no se envía
+    if not perfil.mfa_code or not perfil.mfa_expires or perfil.mfa_expires <= timezone.now():
+        codigo_voto.marcar_envio(perfil, codigo_voto.ESTADO_FALLIDO, "El código expiró antes de enviarse.")
+        return f"Código de {user.username} expirado, no se envió."
+
+    nombre = (user.first_name or user.username or "Vecino").strip()
+    html_body = render_to_string("votaciones/email_codigo_voto.html", {"nombre": nombre, "codigo": perfil.mfa_code})
+    ok = enviar_correo_via_webhook(
+        to_email=user.email,
+        subject="Código de Seguridad para Votación",
+        html_body=html_body,
+        text_body=strip_tags(html_body),
+        en_segundo_plano=True,
+    )
+
+    if ok:
+        codigo_voto.marcar_envio(perfil, codigo_voto.ESTADO_ENVIADO)
+        return f"Código enviado a {user.email}."
+    codigo_voto.marcar_envio(perfil, codigo_voto.ESTADO_FALLIDO, "No se pudo enviar el correo (webhook).")
+    return f"No se pudo enviar el código a {user.email}."
@@ -1,7 +1,7 @@
 from django.test import TestCase
 
 # Create your tests here.
-from django.test import TestCase, Client
+from django.test import TestCase, Client, SimpleTestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
@@ -9,8 +9,10 @@ from django.contrib.auth.models import User, Permission
 from rest_framework.test import APIClient
 from rest_framework import status
 import hashlib
+from types import SimpleNamespace
 from django.conf import settings
 from .models import Votacion, Opcion, Voto
+from . import codigo_voto
 from core.models import Perfil
 
 # ==========================================
@@ -110,4 +112,28 @@ class PruebasSistemaVotacion(TestCase):
         url = reverse('votaciones:crear_votacion')
         response = self.client.get(url)
         # Esperamos redirección (302) o Prohibido (403), no éxito (200)
-        self.assertNotEqual(response.status_code, 200)
\ No newline at end of file
+        self.assertNotEqual(response.status_code, 200)
+
+# ==========================================
+# 4. ENVÍO DEL CÓDIGO MFA (sin base de datos)
+# ==========================================
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class CodigoVotoEnvioTest(SimpleTestCase):
+    def test_toques_repetidos_no_reenvian_salvo_fallo(self):
+        """Mientras el código está vigente solo el primer pedido envía; tras un fallo se puede reintentar."""
+        perfil = SimpleNamespace(usuario_id=7, mfa_expires=timezone.now() + timedelta(minutes=5))
+        codigo_voto.liberar_envio(7)
+
+        self.assertTrue(codigo_voto.reservar_envio(7, 300))
+        self.assertFalse(codigo_voto.reservar_envio(7, 300))
+        self.assertEqual(codigo_voto.estado_envio(perfil)["estado"], codigo_voto.ESTADO_PENDIENTE)
+
+        codigo_voto.marcar_envio(perfil, codigo_voto.ESTADO_FALLIDO, "webhook")
+        self.assertTrue(codigo_voto.reservar_envio(7, 300))
+
+        codigo_voto.marcar_envio(perfil, codigo_voto.ESTADO_ENVIADO)
+        self.assertFalse(codigo_voto.reservar_envio(7, 300))
+        codigo_voto.liberar_envio(7)  # Código usado al votar
+        self.assertTrue(codigo_voto.reservar_envio(7, 300))
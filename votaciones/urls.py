@@ -26,6 +26,7 @@ urlpatterns = [
     # API Endpoints (App Móvil)
     path('api/v1/abiertas/', api_views.abiertas, name='api_abiertas'),
     path('api/v1/solicitar-codigo/', api_views.solicitar_codigo_voto, name='solicitar_codigo_voto'),
+    path('api/v1/solicitar-codigo/estado/', api_views.estado_codigo_voto, name='estado_codigo_voto'),
     path('api/v1/<int:pk>/votar/', api_views.votar, name='api_votar'),
     path('api/v1/<int:pk>/resultados/', ResultadosView.as_view(), name='api_resultados'),
 ]
\ No newline at end of file